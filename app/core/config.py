@@ -28,6 +28,118 @@ class Settings(BaseSettings):
 
     API_KEY: str | None = None
 
+    # Ollama backend pool (see services/backend_pool.py). Server roots, e.g.
+    # OLLAMA_BACKENDS='["http://gpu1:11434", "http://gpu2:11434"]'.
+    # Empty means the single server OLLAMA_URL points at.
+    OLLAMA_BACKENDS: list[str] = []
+    OLLAMA_HEALTH_INTERVAL: float = 10.0
+
+    # Shared Ollama connection pool (see services/ollama_client.py)
+    OLLAMA_TIMEOUT: float = 120.0
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0
+    OLLAMA_MAX_CONNECTIONS: int = 100
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OLLAMA_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Resilience of Ollama calls (see services/resilience.py and services/circuit_breaker.py)
+    OLLAMA_FIRST_TOKEN_TIMEOUT: float = 60.0
+    OLLAMA_RETRIES: int = 2
+    OLLAMA_RETRY_BACKOFF: float = 0.1
+    OLLAMA_RETRY_BACKOFF_MAX: float = 2.0
+    # Start a second request on another backend if the first has not answered
+    # (non-streaming) or sent its first token (streaming) after this many seconds. 0 disables.
+    OLLAMA_HEDGE_DELAY: float = 0.0
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_TIMEOUT: float = 10.0
+
+    # Exact-match response cache (see services/response_cache.py)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_TEMPERATURE: float = 0.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    RESPONSE_CACHE_TTL: float = 3600.0
+    # SQLite file shared by the workers of a host (see services/disk_cache.py); unset keeps the cache in memory only
+    RESPONSE_CACHE_DISK_PATH: str | None = None
+    RESPONSE_CACHE_DISK_MAX_BYTES: int = 1024 * 1024 * 1024
+    RESPONSE_CACHE_DISK_TTL: float = 7 * 24 * 3600.0
+
+    # POST /v1/embeddings and micro-batching of embedding calls (see services/embedding_batcher.py)
+    EMBEDDING_DEFAULT_MODEL: str = "nomic-embed-text"
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 10000
+
+    # Semantic cache: replies to paraphrased inputs (see services/semantic_cache.py)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_EMBED_MODEL: str = "nomic-embed-text"
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 2048
+    SEMANTIC_CACHE_TTL: float = 3600.0
+
+    # Conversation sessions for previous_response_id (see services/session_store.py)
+    SESSION_MAX_ENTRIES: int = 10000
+    SESSION_MAX_BYTES: int = 64 * 1024 * 1024
+    SESSION_TTL: float = 3600.0
+    # Estimated tokens of history sent to Ollama; older turns are dropped beyond it (0 = no limit)
+    HISTORY_MAX_TOKENS: int = 4096
+
+    # Single-flight coalescing of identical in-flight requests (see services/single_flight.py)
+    COALESCE_ENABLED: bool = False
+    COALESCE_MAX_TEMPERATURE: float = 0.0
+
+    # Admission control in front of LLMEngine (see services/scheduler.py)
+    SCHEDULER_MAX_CONCURRENCY: int = 4
+    SCHEDULER_MODEL_CONCURRENCY: dict[str, int] = {}
+    SCHEDULER_MAX_QUEUE: int = 64
+    SCHEDULER_QUEUE_TIMEOUT: float = 30.0
+
+    # Agentic tool loop (see services/tool_registry.py)
+    TOOL_TIMEOUT: float = 30.0
+    TOOL_MAX_ITERATIONS: int = 8
+    TOOL_PROCESS_WORKERS: int | None = None
+    TOOL_CACHE_TTL: float = 300.0
+    TOOL_CACHE_MAX_ENTRIES: int = 256
+    TOOL_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+    # Modules imported on first use to register tools (see app/tools/)
+    TOOL_PLUGINS: list[str] = ["tools.weather"]
+
+    # Model list snapshot behind /v1/models (see services/model_catalog.py)
+    MODELS_REFRESH_INTERVAL: float = 30.0
+    MODELS_VALIDATE: bool = True
+
+    # Model residency (see services/residency.py). keep_alive values use Ollama's
+    # format: a duration string like "10m", seconds, or -1 to keep loaded forever.
+    HOT_MODELS: list[str] = []
+    PINNED_MODELS: list[str] = []
+    MODEL_WARMUP_PROMPTS: dict[str, str] = {}
+    MODEL_KEEP_ALIVE: dict[str, str | int] = {}
+    DEFAULT_KEEP_ALIVE: str | int | None = None
+    RESIDENCY_INTERVAL: float = 30.0
+    COLD_START_THRESHOLD: float = 1.0
+
+    # SSE token coalescing: 0 sends one frame per token
+    SSE_COALESCE_MS: float = 0.0
+    SSE_COALESCE_BYTES: int = 512
+
+    # Seconds between checks for a client that went away during a generation
+    DISCONNECT_POLL_INTERVAL: float = 0.5
+
+    # Request tracing and Server-Timing (see core/tracing.py); 0 disables the slow-request log
+    TRACING_ENABLED: bool = True
+    TRACE_SLOW_MS: float = 5000.0
+
+    # Sampling profiler for selected requests (see core/profiler.py)
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_HEADER_ENABLED: bool = False
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_DIR: str = "profiles"
+
+    # POST /v1/responses/batch
+    BATCH_MAX_CONCURRENCY: int = 4
+
+    # POST /v1/chat/completions: maximum candidates per request (n)
+    CHAT_MAX_N: int = 8
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 
@@ -0,0 +1,205 @@
+"""
+In-process performance metrics rendered in the Prometheus text format.
+
+Histograms and counters are plain module-level objects that any module can
+record into; GET /metrics (endpoints/metrics.py) renders them with render().
+Everything is labelled per model.
+
+Recorded series:
+  llm_request_duration_seconds     → end-to-end latency of /v1/responses calls
+  llm_time_to_first_token_seconds  → time until the first streamed token
+  llm_queue_wait_seconds           → time spent waiting for a scheduler slot
+  llm_tokens_per_second            → generation speed reported by Ollama
+  llm_model_load_seconds           → model load time reported by Ollama
+  llm_requests_total               → requests by outcome
+  llm_prompt_tokens_total / llm_completion_tokens_total → token usage
+  llm_cancelled_requests_total     → generations stopped because the client disconnected
+  llm_cold_starts_total            → requests that paid more than COLD_START_THRESHOLD to load the model
+"""
+
+import bisect
+import threading
+from typing import Callable
+
+from core.config import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ("model",)):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for values, total in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {_format_value(total)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets and labels."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        labels: tuple[str, ...] = ("model",),
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.labels = labels
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for values, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(self.labels, values, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+request_duration = Histogram(
+    "llm_request_duration_seconds", "End-to-end latency of generation requests."
+)
+time_to_first_token = Histogram(
+    "llm_time_to_first_token_seconds", "Time from request start to the first streamed token."
+)
+queue_wait = Histogram(
+    "llm_queue_wait_seconds", "Time spent waiting for a generation slot."
+)
+tokens_per_second = Histogram(
+    "llm_tokens_per_second", "Generation speed reported by Ollama (eval_count / eval_duration).",
+    buckets=RATE_BUCKETS,
+)
+model_load = Histogram(
+    "llm_model_load_seconds", "Model load time reported by Ollama (load_duration)."
+)
+requests_total = Counter(
+    "llm_requests_total", "Generation requests by outcome.", labels=("model", "status")
+)
+prompt_tokens = Counter("llm_prompt_tokens_total", "Prompt tokens evaluated by Ollama.")
+completion_tokens = Counter("llm_completion_tokens_total", "Tokens generated by Ollama.")
+cancelled_requests = Counter(
+    "llm_cancelled_requests_total",
+    "Generations stopped because the client disconnected.",
+    labels=("model", "mode"),
+)
+cold_starts = Counter("llm_cold_starts_total", "Requests whose Ollama call had to load the model first.")
+
+_metrics: list[Counter | Histogram] = [
+    request_duration,
+    time_to_first_token,
+    queue_wait,
+    tokens_per_second,
+    model_load,
+    requests_total,
+    prompt_tokens,
+    completion_tokens,
+    cancelled_requests,
+    cold_starts,
+]
+
+# Gauges computed at scrape time: name -> (description, label names, collect callable)
+_gauges: dict[str, tuple[str, tuple[str, ...], Callable[[], dict]]] = {}
+
+
+def register_metric(metric: Counter | Histogram) -> None:
+    """Add a counter or histogram defined elsewhere to the /metrics output."""
+    _metrics.append(metric)
+
+
+def register_gauge(
+    name: str,
+    description: str,
+    collect: Callable[[], dict],
+    labels: tuple[str, ...] = ("model",),
+) -> None:
+    """Register a gauge whose {label values tuple: value} are collected when /metrics is scraped."""
+    _gauges[name] = (description, labels, collect)
+
+
+def record_ollama_stats(model: str, body: dict, warmup: bool = False) -> None:
+    """
+    Record the timing and token counts of a final Ollama chunk or response.
+
+    Loads done by warm-up calls (warmup=True) are timed but not counted as
+    cold starts, which only count requests that had to wait for a load.
+    """
+    prompt_count = body.get("prompt_eval_count") or 0
+    eval_count = body.get("eval_count") or 0
+    prompt_tokens.inc(model, amount=prompt_count)
+    completion_tokens.inc(model, amount=eval_count)
+    if eval_count and body.get("eval_duration"):
+        tokens_per_second.observe(eval_count / (body["eval_duration"] / 1e9), model)
+    if body.get("load_duration"):
+        load_seconds = body["load_duration"] / 1e9
+        model_load.observe(load_seconds, model)
+        if load_seconds >= settings.COLD_START_THRESHOLD and not warmup:
+            cold_starts.inc(model)
+
+
+def render() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for name, (description, labels, collect) in _gauges.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} gauge")
+        for values, value in sorted(collect().items()):
+            lines.append(f"{name}{_format_labels(labels, values)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,104 @@
+"""
+Sampling profiler for selected requests.
+
+A request is profiled when PROFILE_SAMPLE_RATE picks it at random, or when it
+carries an "X-Profile: 1" header and PROFILE_HEADER_ENABLED is set. While it
+is being served, a background thread records the stack of the event loop
+thread every PROFILE_INTERVAL_MS. When it ends, the samples are written to
+PROFILE_DIR/<trace id>.folded in the collapsed-stack format read by
+flamegraph.pl and speedscope ("outer;inner;leaf <count>" per line).
+
+Only the standard library is used, and nothing runs on the event loop while
+sampling: the overhead is the sampling thread. Other requests served at the
+same time run on the same thread, so their stacks appear in the profile too.
+At most one request is profiled at a time.
+"""
+
+import logging
+import os
+import random
+import sys
+import threading
+from collections import Counter
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_active: "ProfileSession | None" = None
+
+
+class ProfileSession:
+    """
+    Samples one thread's stack from a background thread until stopped.
+
+    Attributes:
+        path: File the collapsed stacks are written to once stopped.
+        samples: Count of each "outer;...;leaf" stack seen.
+    """
+
+    def __init__(self, thread_id: int, interval: float, path: str):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.path = path
+        self.samples: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling; the file is written from the sampling thread."""
+        global _active
+        self._stopped.set()
+        if _active is self:
+            _active = None
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[_collapse(frame)] += 1
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w") as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            logger.warning("Could not write profile %s: %s", self.path, e)
+            return
+        logger.info("Profile with %d samples written to %s", sum(self.samples.values()), self.path)
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def is_selected(headers: dict[bytes, bytes]) -> bool:
+    """Return True if a request with these (lowercase) headers should be profiled."""
+    if settings.PROFILE_HEADER_ENABLED and headers.get(b"x-profile") == b"1":
+        return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def start_if_selected(trace_id: str, headers: dict[bytes, bytes]) -> ProfileSession | None:
+    """Start profiling the calling thread for this request if it is selected and no profile is running."""
+    global _active
+    if _active is not None or not is_selected(headers):
+        return None
+    _active = ProfileSession(
+        threading.get_ident(),
+        settings.PROFILE_INTERVAL_MS / 1000,
+        os.path.join(settings.PROFILE_DIR, f"{trace_id}.folded"),
+    )
+    _active.start()
+    return _active
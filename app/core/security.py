@@ -3,16 +3,22 @@ API key authentication for the application.
 
 Provides a FastAPI dependency that validates the x-api-key request header.
 If no API_KEY is configured in settings, authentication is skipped entirely.
+The dependency returns the key sent by the client so that routes can use it
+to identify the caller (e.g. for fair-share scheduling). It is a coroutine,
+so it does not take a threadpool worker on every request.
 """
 
 from fastapi import Header, HTTPException
+from core import tracing
 from core.config import settings
 
 
-def verify_api_key(x_api_key: str = Header(default=None)):
+async def verify_api_key(x_api_key: str | None = Header(default=None)) -> str | None:
+    # async so that FastAPI runs it on the event loop instead of the threadpool
+    with tracing.span("auth"):
+        if settings.API_KEY is None:
+            return x_api_key
 
-    if settings.API_KEY is None:
-        return
-
-    if x_api_key != settings.API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid API Key")
+        if x_api_key != settings.API_KEY:
+            raise HTTPException(status_code=401, detail="Invalid API Key")
+        return x_api_key
@@ -0,0 +1,172 @@
+"""
+Lightweight per-request tracing.
+
+TracingMiddleware starts a Trace for every HTTP request and keeps it in a
+context variable, so any code running for that request can time a stage with
+
+    with tracing.span("ollama"):
+        ...
+
+without passing anything around. span() is a no-op outside of a request.
+
+The spans are summed per name and sent back in a Server-Timing header
+(e.g. "auth;dur=0.1, prompt;dur=0.4, queue;dur=0.0, ollama;dur=812.3, total;dur=815.0"),
+which browsers' dev tools display as a timeline. For streamed responses the
+header leaves with the first byte, so it covers the work done before the
+stream started; the full trace is still available to the slow-trace log.
+
+Requests that take longer than TRACE_SLOW_MS are logged as one JSON line
+with every span. Selected requests are also profiled (see core/profiler.py).
+"""
+
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from core import profiler
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """A timed stage, in seconds relative to the start of its trace."""
+
+    name: str
+    start: float
+    duration: float
+
+
+class Trace:
+    """
+    The spans recorded while serving one request.
+
+    Attributes:
+        id: Random hex id, used in logs and profile file names.
+        name: "METHOD /path" of the request.
+        spans: Closed spans in the order they ended.
+    """
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.start = time.perf_counter()
+        self.spans: list[Span] = []
+        self._open: dict[str, float] = {}
+
+    def add(self, name: str, start: float, end: float) -> None:
+        """Record a span from perf_counter() values."""
+        self.spans.append(Span(name, start - self.start, end - start))
+
+    def begin(self, name: str) -> None:
+        """Open a span that end_open() closes (for stages that end outside the caller)."""
+        self._open[name] = time.perf_counter()
+
+    def end_open(self) -> None:
+        """Close every span opened with begin()."""
+        now = time.perf_counter()
+        for name, start in self._open.items():
+            self.add(name, start, now)
+        self._open.clear()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def totals(self) -> dict[str, float]:
+        """Seconds spent per span name, in order of first appearance."""
+        totals: dict[str, float] = {}
+        for s in self.spans:
+            totals[s.name] = totals.get(s.name, 0.0) + s.duration
+        return totals
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: one entry per span name plus the total so far, in ms."""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.totals().items()]
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.id,
+            "request": self.name,
+            "duration_ms": round(self.elapsed() * 1000, 1),
+            "spans": [
+                {"name": s.name, "start_ms": round(s.start * 1000, 1), "duration_ms": round(s.duration * 1000, 1)}
+                for s in self.spans
+            ],
+        }
+
+
+_current: ContextVar[Trace | None] = ContextVar("trace", default=None)
+
+
+def current() -> Trace | None:
+    """Return the trace of the request being served, if any."""
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block as a span of the current trace."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter())
+
+
+def begin(name: str) -> None:
+    """Open a span on the current trace that ends when the response headers are sent."""
+    trace = _current.get()
+    if trace is not None:
+        trace.begin(name)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that traces each HTTP request.
+
+    Adds the Server-Timing header, logs slow traces and runs the profiler on
+    the requests it selects.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(f"{scope['method']} {scope['path']}")
+        token = _current.set(trace)
+        session = profiler.start_if_selected(trace.id, dict(scope["headers"]))
+        status = 500
+
+        async def traced_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                trace.end_open()
+                status = message["status"]
+                headers = [*message.get("headers", []), (b"server-timing", trace.server_timing().encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            _current.reset(token)
+            trace.end_open()
+            if session is not None:
+                session.stop()
+            if settings.TRACE_SLOW_MS > 0 and trace.elapsed() * 1000 >= settings.TRACE_SLOW_MS:
+                logger.warning("Slow request %s", json.dumps({**trace.to_dict(), "status": status}))
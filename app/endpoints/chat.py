@@ -0,0 +1,325 @@
+"""
+Route handler for the /v1/chat/completions endpoint.
+
+Unlike /v1/responses, the request carries the whole conversation as a
+messages list, and it can ask for n candidate completions. The candidates are
+generated concurrently through LLMEngine, each with its own seed and its own
+scheduler slot, rather than by n sequential requests. Streams interleave the
+candidates' tokens as they arrive, each chunk tagged with its choice index.
+"""
+
+import asyncio
+import contextlib
+import json
+import random
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from core import metrics, tracing
+from core.config import settings
+from core.security import verify_api_key
+from endpoints.common import (
+    Admission,
+    ClientDisconnected,
+    SlotStreamingResponse,
+    abort_on_disconnect,
+    rejected,
+    release_when_done,
+    unavailable,
+    unless_disconnected,
+)
+from schemas.chat import (
+    ChatCompletion,
+    ChatCompletionChoice,
+    ChatCompletionRequest,
+    ChatMessage,
+    ChatUsage,
+    new_completion_id,
+)
+from schemas.responses import Response
+from services.backend_pool import pool
+from services.circuit_breaker import CircuitOpenError
+from services.llm_engine import LLMEngine
+from services.model_catalog import catalog
+from services.prompt_builder import build_messages_from_chat
+from services.scheduler import SchedulerRejection
+
+router = APIRouter()
+
+_DONE_FRAME = "data: [DONE]\n\n"
+
+
+def _seeds(request: ChatCompletionRequest) -> list[int | None]:
+    """One distinct seed per candidate; None for a single candidate without a seed."""
+    if request.n == 1 and request.seed is None:
+        return [None]
+    base = request.seed if request.seed is not None else random.randrange(2**31)
+    return [base + i for i in range(request.n)]
+
+
+async def _generate(
+    engine: LLMEngine,
+    request: ChatCompletionRequest,
+    model: str,
+    messages: list[dict],
+    api_key: str | None,
+    seed: int | None,
+) -> Response:
+    """Generate one candidate, in a scheduler slot of its own unless it comes from cache."""
+    admission = Admission(model, api_key, request.priority)
+    start = time.perf_counter()
+    status = "error"
+    try:
+        response = await engine.generate_response(
+            model=model,
+            messages=messages,
+            temperature=request.temperature,
+            use_cache=request.cache,
+            max_output_tokens=request.max_tokens,
+            stop=request.stop,
+            seed=seed,
+            admit=admission,
+        )
+        status = "ok"
+        return response
+    except SchedulerRejection:
+        status = "rejected"  # counted once per request by the route
+        raise
+    except asyncio.CancelledError:
+        status = "cancelled"
+        raise
+    finally:
+        admission.release()
+        if status != "rejected":
+            metrics.request_duration.observe(time.perf_counter() - start, model)
+            metrics.requests_total.inc(model, status)
+
+
+async def _open(
+    engine: LLMEngine,
+    request: ChatCompletionRequest,
+    model: str,
+    messages: list[dict],
+    seed: int | None,
+    admission: Admission,
+):
+    """Start streaming one candidate, in a scheduler slot of its own unless it is replayed from cache."""
+    start = time.perf_counter()
+    try:
+        _, chunks = await engine.stream_response(
+            model=model,
+            messages=messages,
+            temperature=request.temperature,
+            use_cache=request.cache,
+            max_output_tokens=request.max_tokens,
+            stop=request.stop,
+            seed=seed,
+            admit=admission,
+        )
+    except BaseException as e:
+        if admission.release() and not isinstance(e, SchedulerRejection):
+            metrics.requests_total.inc(model, "error")
+        raise
+    return release_when_done(chunks, admission, start)
+
+
+async def _stream(
+    engine: LLMEngine,
+    request: ChatCompletionRequest,
+    model: str,
+    messages: list[dict],
+    seed: int | None,
+    admission: Admission,
+):
+    """Stream one more candidate, opened once the response is being sent."""
+    async with contextlib.aclosing(await _open(engine, request, model, messages, seed, admission)) as chunks:
+        async for chunk in chunks:
+            yield chunk
+
+
+async def _gather(tasks: list[asyncio.Task]) -> list:
+    """Await every task, cancelling the others as soon as one fails."""
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+def _usage(responses: list[Response]) -> ChatUsage | None:
+    """Sum the usage of the candidates; None when every one came from cache."""
+    if all(r.usage is None for r in responses):
+        return None
+    usage = ChatUsage()
+    for r in responses:
+        if r.usage is not None:
+            usage.prompt_tokens += r.usage.input_tokens
+            usage.completion_tokens += r.usage.output_tokens
+            usage.total_tokens += r.usage.total_tokens
+    return usage
+
+
+async def _interleave(streams: list):
+    """
+    Merge the candidates' chunk streams, yielding (index, chunk) pairs as chunks arrive.
+
+    Each stream is read by its own task. Closing the merged stream cancels
+    those tasks, which closes every candidate's stream and so its Ollama
+    response, even when the task was waiting on the queue.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    end = object()
+
+    async def pump(index: int, chunks):
+        try:
+            async with contextlib.aclosing(chunks):
+                async for chunk in chunks:
+                    await queue.put((index, chunk))
+        except Exception as e:
+            await queue.put((index, e))
+        finally:
+            await queue.put((index, end))
+
+    tasks = [asyncio.create_task(pump(i, s)) for i, s in enumerate(streams)]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            index, item = await queue.get()
+            if item is end:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield index, item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _sse_chunks(completion_id: str, model: str, n: int, pairs):
+    """
+    Encode interleaved (index, chunk) pairs as chat.completion.chunk events.
+
+    Every candidate first gets a role delta; text chunks become content deltas
+    and each candidate's finish_reason is sent in a delta of its own. The
+    summed usage, if any, follows in a last chunk with no choices.
+    """
+    base = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+
+    def frame(choices: list[dict], **extra) -> str:
+        return f"data: {json.dumps({**base, 'choices': choices, **extra})}\n\n"
+
+    yield frame([{"index": i, "delta": {"role": "assistant"}, "finish_reason": None} for i in range(n)])
+    usage = ChatUsage()
+    counted = False
+    async for index, chunk in pairs:
+        if isinstance(chunk, str):
+            yield frame([{"index": index, "delta": {"content": chunk}, "finish_reason": None}])
+            continue
+        if chunk.get("usage"):
+            counted = True
+            usage.prompt_tokens += chunk["usage"]["input_tokens"]
+            usage.completion_tokens += chunk["usage"]["output_tokens"]
+            usage.total_tokens += chunk["usage"]["total_tokens"]
+        if "finish_reason" in chunk:
+            yield frame([{"index": index, "delta": {}, "finish_reason": chunk["finish_reason"]}])
+    if counted:
+        yield frame([], usage=usage.model_dump())
+    yield _DONE_FRAME
+
+
+@router.post("/v1/chat/completions")
+async def create_chat_completion(
+    request: ChatCompletionRequest,
+    http_request: Request,
+    api_key: str | None = Depends(verify_api_key),
+    engine: LLMEngine = Depends(LLMEngine),
+):
+    """
+    Generate n candidate completions of a chat conversation.
+
+    The messages list is sent as it is, except that the oldest turns are
+    dropped beyond HISTORY_MAX_TOKENS. Each candidate is a separate generation:
+    it gets the request seed + its index as seed, and, unless it is served
+    from cache, takes and gives back its own scheduler slot, so all n run at
+    the same time as far as the model's concurrency limit allows. Unknown
+    models return 404, n above CHAT_MAX_N returns 400, and scheduler
+    rejections and open circuit breakers return 429/503 as on /v1/responses.
+    A stream opens its first candidate before it starts, so that a full queue
+    is still answered with 429.
+
+    Args:
+        request: Validated request body containing the messages and sampling settings.
+        http_request: The raw request, watched for client disconnects.
+        api_key: Caller's key from verify_api_key, used for fair-share scheduling.
+        engine: LLMEngine instance injected by FastAPI.
+
+    Returns:
+        ChatCompletion | StreamingResponse: The candidates, or an SSE stream if stream=True.
+    """
+    model = request.model or settings.DEFAULT_MODEL
+    if settings.MODELS_VALIDATE and not catalog.is_known(model):
+        raise HTTPException(status_code=404, detail=f"Model '{model}' not found")
+    if request.n > settings.CHAT_MAX_N:
+        raise HTTPException(status_code=400, detail=f"n must be at most {settings.CHAT_MAX_N}")
+
+    with tracing.span("prompt"):
+        messages = build_messages_from_chat(
+            [m.model_dump() for m in request.messages], settings.HISTORY_MAX_TOKENS
+        )
+
+    retry_after = pool.unavailable_for()
+    if retry_after is not None:
+        metrics.requests_total.inc(model, "rejected")
+        raise unavailable(retry_after)
+
+    seeds = _seeds(request)
+
+    if request.stream:
+        admissions = [Admission(model, api_key, request.priority) for _ in seeds]
+        try:
+            first = await _open(engine, request, model, messages, seeds[0], admissions[0])
+        except SchedulerRejection as e:
+            metrics.requests_total.inc(model, "rejected")
+            raise rejected(e)
+        streams = [first] + [
+            _stream(engine, request, model, messages, seed, admission)
+            for seed, admission in zip(seeds[1:], admissions[1:])
+        ]
+        pairs = abort_on_disconnect(_interleave(streams), http_request, model)
+        return SlotStreamingResponse(
+            _sse_chunks(new_completion_id(), model, len(streams), pairs),
+            admissions,
+            media_type="text/event-stream",
+        )
+
+    tasks = [
+        asyncio.ensure_future(_generate(engine, request, model, messages, api_key, seed))
+        for seed in seeds
+    ]
+    try:
+        responses = await unless_disconnected(_gather(tasks), http_request, model)
+    except ClientDisconnected:
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except SchedulerRejection as e:
+        metrics.requests_total.inc(model, "rejected")
+        raise rejected(e)
+    except CircuitOpenError as e:
+        raise unavailable(e.retry_after)
+
+    completion = ChatCompletion(
+        model=responses[0].model,
+        choices=[
+            ChatCompletionChoice(
+                index=i,
+                message=ChatMessage(role="assistant", content=r.output.content),
+                finish_reason=r.finish_reason,
+            )
+            for i, r in enumerate(responses)
+        ],
+        usage=_usage(responses),
+    )
+    # Ends when FastAPI has serialized the response and sends the headers
+    tracing.begin("serialize")
+    return completion
@@ -0,0 +1,205 @@
+"""
+Helpers shared by the generation endpoints (/v1/responses and /v1/chat/completions).
+
+They take a scheduler slot for each generation that misses the caches and
+give it back once the response is done, stop a generation when its client
+disconnects, and map scheduler and circuit breaker errors to HTTP errors.
+"""
+
+import asyncio
+import contextlib
+import time
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+from core import metrics, tracing
+from core.config import settings
+from services.scheduler import QueueFullError, SchedulerRejection, Ticket, scheduler
+
+# Chunks read ahead of the client by abort_on_disconnect before Ollama is paused
+_READ_AHEAD = 256
+
+
+class Admission:
+    """
+    The scheduler slot of one generation, taken only if it reaches Ollama.
+
+    LLMEngine awaits it (admit=...) once the response and semantic caches
+    missed, so cache hits neither wait in the queue nor count against the
+    model's concurrency limit. release() gives the slot back, if one was
+    taken, and returns True only the first time it is called, so the outcome
+    of a request is recorded once whoever ends it.
+    """
+
+    def __init__(self, model: str, api_key: str | None, priority: int = 0):
+        self.model = model
+        self.api_key = api_key
+        self.priority = priority
+        self.ticket: Ticket | None = None
+        self.closed = False
+
+    async def __call__(self) -> None:
+        with tracing.span("queue"):
+            self.ticket = await scheduler.acquire(self.model, self.api_key, self.priority)
+        if self.closed:
+            # The response ended while this generation was queued
+            scheduler.release(self.ticket)
+
+    def release(self) -> bool:
+        if self.closed:
+            return False
+        self.closed = True
+        if self.ticket is not None:
+            scheduler.release(self.ticket)
+        return True
+
+
+async def release_when_done(chunks, admission: Admission, start: float):
+    """
+    Forward chunks and give the scheduler slot back once the stream ends.
+
+    Also records time to first token, total latency and outcome in core.metrics,
+    unless SlotStreamingResponse already released the admission and counted
+    the request as cancelled.
+    """
+    status = "error"
+    first_token = True
+    try:
+        async for chunk in chunks:
+            if first_token and isinstance(chunk, str):
+                metrics.time_to_first_token.observe(time.perf_counter() - start, admission.model)
+                first_token = False
+            yield chunk
+        status = "ok"
+    except (asyncio.CancelledError, GeneratorExit):
+        status = "cancelled"
+        raise
+    finally:
+        if admission.release():
+            metrics.request_duration.observe(time.perf_counter() - start, admission.model)
+            metrics.requests_total.inc(admission.model, status)
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse that releases the admissions of its stream when it ends.
+
+    The body generator normally releases its admission itself (see
+    release_when_done), but it never runs when the client disconnects before
+    Starlette starts iterating it, and the slot would never come back. Any
+    admission still open once the response is over is released here and
+    counted as cancelled.
+    """
+
+    def __init__(self, content, admissions: list[Admission], **kwargs):
+        super().__init__(content, **kwargs)
+        self.admissions = admissions
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            for admission in self.admissions:
+                if admission.release():
+                    metrics.requests_total.inc(admission.model, "cancelled")
+
+
+class ClientDisconnected(Exception):
+    """The caller went away before its response was ready."""
+
+
+async def watch_disconnect(http_request: Request, on_disconnect) -> None:
+    """Poll the client connection every DISCONNECT_POLL_INTERVAL and call on_disconnect once it is gone."""
+    while not await http_request.is_disconnected():
+        await asyncio.sleep(settings.DISCONNECT_POLL_INTERVAL)
+    on_disconnect()
+
+
+async def abort_on_disconnect(chunks, http_request: Request, model: str):
+    """
+    Forward chunks, stopping the generation as soon as the client disconnects.
+
+    The chunks are read by a background task into a queue of at most
+    _READ_AHEAD chunks, so that Ollama is paused while the client is slow to
+    read. When the watcher sees that the client is gone it cancels that task,
+    which closes the Ollama response (so Ollama stops generating) and releases
+    the scheduler slot right away, even while no token is being sent and
+    whatever the ASGI server does with writes to a closed connection.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_READ_AHEAD)
+    end = object()
+
+    async def pump():
+        try:
+            async with contextlib.aclosing(chunks):
+                async for chunk in chunks:
+                    await queue.put(chunk)
+            await queue.put(end)
+        except Exception as e:
+            await queue.put(e)
+
+    def disconnect():
+        if not task.done():
+            metrics.cancelled_requests.inc(model, "stream")
+            task.cancel()
+            # The client is gone: drop what it did not read and end the stream
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(end)
+
+    task = asyncio.create_task(pump())
+    watcher = asyncio.create_task(watch_disconnect(http_request, disconnect))
+    try:
+        while True:
+            item = await queue.get()
+            if item is end:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        watcher.cancel()
+        task.cancel()
+
+
+async def unless_disconnected(coro, http_request: Request | None, model: str):
+    """Await coro, cancelling it and raising ClientDisconnected if the client goes away first."""
+    if http_request is None:
+        return await coro
+    disconnected = False
+    task = asyncio.ensure_future(coro)
+
+    def disconnect():
+        nonlocal disconnected
+        if not task.done():
+            disconnected = True
+            metrics.cancelled_requests.inc(model, "non_stream")
+            task.cancel()
+
+    watcher = asyncio.create_task(watch_disconnect(http_request, disconnect))
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if disconnected:
+            raise ClientDisconnected()
+        raise
+    finally:
+        watcher.cancel()
+
+
+def unavailable(retry_after: int) -> HTTPException:
+    """503 returned while the circuit breaker of every backend is open."""
+    return HTTPException(
+        status_code=503,
+        detail="Ollama is unavailable",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def rejected(e: SchedulerRejection) -> HTTPException:
+    """Map a scheduler rejection to 429 (queue full) or 503 (queue timeout)."""
+    status_code = 429 if isinstance(e, QueueFullError) else 503
+    return HTTPException(
+        status_code=status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+    )
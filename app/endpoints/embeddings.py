@@ -0,0 +1,47 @@
+"""
+Route handler for the /v1/embeddings endpoint.
+
+Texts are embedded through services/embedding_batcher.py, which merges
+concurrent requests into batched Ollama calls and caches repeated texts.
+"""
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException
+from core.config import settings
+from core.security import verify_api_key
+from schemas.embeddings import Embedding, EmbeddingRequest, EmbeddingResponse
+from services.circuit_breaker import CircuitOpenError
+from services.embedding_batcher import embed
+
+router = APIRouter()
+
+
+@router.post("/v1/embeddings")
+async def create_embeddings(request: EmbeddingRequest, _=Depends(verify_api_key)):
+    """
+    Embed one text or a list of texts.
+
+    Args:
+        request: Validated request body containing model and input.
+        _: API key dependency — runs verify_api_key before this handler executes.
+
+    Returns:
+        EmbeddingResponse: One embedding per input text, in input order.
+
+    Raises:
+        HTTPException: 502 if Ollama fails, 503 while every backend's breaker is open.
+    """
+    model = request.model or settings.EMBEDDING_DEFAULT_MODEL
+    texts = [request.input] if isinstance(request.input, str) else request.input
+    try:
+        vectors = await embed(model, texts)
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Ollama embedding failed: {e}")
+    return EmbeddingResponse(
+        model=model,
+        data=[Embedding(index=i, embedding=vector) for i, vector in enumerate(vectors)],
+    )
@@ -0,0 +1,34 @@
+"""
+Route handler for the /ready endpoint.
+
+Reports whether the API can currently serve generations, for load balancer
+and orchestrator readiness probes: it is ready while at least one Ollama
+backend has a closed (or half-open) circuit breaker.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from services.backend_pool import pool
+
+router = APIRouter()
+
+
+@router.get("/ready")
+def ready():
+    """
+    Report readiness and the health and circuit breaker state of each backend.
+
+    Returns:
+        JSONResponse: 200 when at least one backend can take requests, 503 otherwise.
+    """
+    retry_after = pool.unavailable_for()
+    body = {
+        "ready": retry_after is None,
+        "backends": [
+            {"url": b.url, "healthy": b.healthy, "circuit": b.breaker.snapshot()}
+            for b in pool.backends
+        ],
+    }
+    if retry_after is None:
+        return JSONResponse(body)
+    return JSONResponse(body, status_code=503, headers={"Retry-After": str(retry_after)})
@@ -0,0 +1,25 @@
+"""
+Route handler for the /metrics endpoint.
+
+Exposes request latency, time to first token, queue wait, tokens per second
+and token usage per model in the Prometheus text format.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from core import metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Render all collected metrics for a Prometheus scraper.
+
+    Returns:
+        PlainTextResponse: Metrics in the Prometheus text exposition format.
+    """
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,28 +1,39 @@
 """
 Route handler for the /v1/models endpoint.
 
-Lists the models currently available on the local Ollama server.
+Lists the models currently available on the Ollama backends, served from the
+in-process snapshot kept by services/model_catalog.py.
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import JSONResponse, Response
 from core.security import verify_api_key
-from services.ollama_client import get_ollama_models
+from services.model_catalog import catalog
 
 router = APIRouter()
 
 
 @router.get("/v1/models")
-def list_models(_=Depends(verify_api_key)):
+async def list_models(
+    _=Depends(verify_api_key),
+    if_none_match: str | None = Header(default=None),
+):
     """
-    List all locally available Ollama models.
+    List all available Ollama models.
 
-    Proxifies Ollama's /api/tags endpoint and returns a simplified list.
+    Served from the model catalog snapshot, which is refreshed in the background.
+    The response carries an ETag; if the client's If-None-Match matches it, an
+    empty 304 is returned instead of the list.
 
     Args:
         _: API key dependency — runs verify_api_key before this handler executes.
+        if_none_match: ETag of the list the client already has, if any.
 
     Returns:
         dict: A dict with a "models" list, each entry having "id" and "size".
     """
-    models = get_ollama_models()
-    return {"models": [{"id": m["name"], "size": m.get("size")} for m in models]}
+    snapshot = await catalog.get()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if if_none_match is not None and snapshot.etag in (t.strip() for t in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse({"models": snapshot.models}, headers=headers)
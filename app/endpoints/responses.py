@@ -1,32 +1,191 @@
 """
-Route handler for the /v1/responses endpoint.
+Route handlers for the /v1/responses endpoints.
 
-Accepts a single input string and an optional system instruction.
+/v1/responses accepts a single input string and an optional system instruction.
+/v1/responses/batch runs many such requests and streams results back as NDJSON.
 """
 
+import asyncio
 import json
-from fastapi import APIRouter, Depends
+import time
+from json.encoder import encode_basestring_ascii
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from schemas.responses import ResponseRequest
+from schemas.responses import BatchRequest, BatchResult, Response, ResponseRequest, new_response_id
 from services.llm_engine import LLMEngine
+from core import metrics, tracing
+from core.config import settings
 from core.security import verify_api_key
+from endpoints.common import (
+    Admission,
+    ClientDisconnected,
+    SlotStreamingResponse,
+    abort_on_disconnect,
+    rejected,
+    release_when_done,
+    unavailable,
+    unless_disconnected,
+)
+from services import tool_registry
 from services.prompt_builder import build_messages_from_response
+from services.backend_pool import pool
+from services.circuit_breaker import CircuitOpenError
+from services.model_catalog import catalog
+from services.session_store import Record, sessions, to_messages, to_records
+from services.scheduler import SchedulerRejection
 
 router = APIRouter()
 
+# Precomputed pieces of the {"content": ...} frame, byte-identical to json.dumps output
+_CONTENT_PREFIX = 'data: {"content": '
+_CONTENT_SUFFIX = "}\n\n"
+_DONE_FRAME = "data: [DONE]\n\n"
 
-def _sse_generator(model, chunks, temperature, stream):
-    """Wrap text chunks in Server-Sent Events format."""
-    yield f"data: {json.dumps({'model': model, 'temperature': temperature, 'stream': stream})}\n\n"
-    for chunk in chunks:
-        yield f"data: {json.dumps({'content': chunk})}\n\n"
-    yield "data: [DONE]\n\n"
+# Upstream chunks buffered by _coalesce before Ollama is paused
+_COALESCE_QUEUE_SIZE = 256
+
+
+def _content_frame(text: str) -> str:
+    """Encode one text chunk as an SSE frame using the C string encoder directly."""
+    return _CONTENT_PREFIX + encode_basestring_ascii(text) + _CONTENT_SUFFIX
+
+
+async def _sse_generator(model, chunks, temperature, stream, response_id=None):
+    """
+    Wrap an async iterator of chunks in Server-Sent Events format.
+
+    The first event carries the response id (when given), model and settings.
+    Text chunks become {"content": ...} events; dict chunks (tool events from
+    the streaming agent loop) are sent as they are. When SSE_COALESCE_MS is set,
+    consecutive text chunks are merged into fewer frames (see _coalesce).
+    """
+    header = {'model': model, 'temperature': temperature, 'stream': stream}
+    if response_id is not None:
+        header = {'id': response_id, **header}
+    yield f"data: {json.dumps(header)}\n\n"
+    if settings.SSE_COALESCE_MS > 0:
+        chunks = _coalesce(chunks, settings.SSE_COALESCE_MS / 1000, settings.SSE_COALESCE_BYTES)
+    async for chunk in chunks:
+        if isinstance(chunk, dict):
+            yield f"data: {json.dumps(chunk)}\n\n"
+        else:
+            yield _content_frame(chunk)
+    yield _DONE_FRAME
+
+
+async def _coalesce(chunks, window: float, max_bytes: int):
+    """
+    Merge consecutive text chunks into one.
+
+    A background task reads the upstream chunks into a bounded queue: Ollama
+    keeps generating while a frame is being sent, but is paused once
+    _COALESCE_QUEUE_SIZE chunks are waiting for a client that reads slowly.
+    Text is flushed `window` seconds after its first chunk arrived, as soon as
+    it holds `max_bytes` bytes (UTF-8), or when a dict chunk arrives. Dict
+    chunks keep their position relative to the text around them.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_COALESCE_QUEUE_SIZE)
+    end = object()
+
+    async def pump():
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+            await queue.put(end)
+        except Exception as e:
+            await queue.put(e)
+
+    loop = asyncio.get_running_loop()
+    task = asyncio.create_task(pump())
+    try:
+        pending = None  # read while merging text, handled next
+        while True:
+            item = pending if pending is not None else await queue.get()
+            pending = None
+            if item is end:
+                return
+            if isinstance(item, Exception):
+                raise item
+            if isinstance(item, dict):
+                yield item
+                continue
+
+            text = [item]
+            size = len(item.encode())
+            try:
+                # One timeout per frame; chunks already queued are taken without awaiting
+                async with asyncio.timeout_at(loop.time() + window):
+                    while size < max_bytes:
+                        item = queue.get_nowait() if queue.qsize() else await queue.get()
+                        if not isinstance(item, str):
+                            pending = item
+                            break
+                        text.append(item)
+                        size += len(item.encode())
+            except TimeoutError:
+                pass
+            yield "".join(text)
+    finally:
+        task.cancel()
+
+
+async def _remember_when_done(chunks, response_id: str, messages: list[dict], parent: tuple[Record, ...]):
+    """Forward chunks and store the conversation once the stream completes."""
+    parts = []
+    async for chunk in chunks:
+        if isinstance(chunk, str):
+            parts.append(chunk)
+        yield chunk
+    _remember(response_id, messages, "".join(parts), parent)
+
+
+def _remember(response_id: str, messages: list[dict], content: str, parent: tuple[Record, ...]) -> None:
+    """Store the messages sent for a response plus its reply, for previous_response_id."""
+    sessions.add(response_id, to_records(messages) + (("assistant", content),), parent)
+
+
+def _prepare(request: ResponseRequest) -> tuple[str, list[dict], tuple[Record, ...]]:
+    """
+    Check a request and build its messages; return (model, messages, parent conversation).
+
+    Raises:
+        HTTPException: 404 for an unknown model or previous_response_id, 400 for
+            unknown tools, 503 while every Ollama backend's circuit is open.
+    """
+    model = request.model or settings.DEFAULT_MODEL
+    if settings.MODELS_VALIDATE and not catalog.is_known(model):
+        raise HTTPException(status_code=404, detail=f"Model '{model}' not found")
+    if isinstance(request.tools, list):
+        unknown = tool_registry.unknown(request.tools)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown tools: {', '.join(unknown)}")
+
+    with tracing.span("prompt"):
+        parent: tuple[Record, ...] = ()
+        if request.previous_response_id:
+            stored = sessions.get(request.previous_response_id)
+            if stored is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Previous response '{request.previous_response_id}' not found",
+                )
+            parent = stored
+        messages = build_messages_from_response(
+            request.instructions, request.input, to_messages(parent), settings.HISTORY_MAX_TOKENS
+        )
+
+    retry_after = pool.unavailable_for()
+    if retry_after is not None:
+        metrics.requests_total.inc(model, "rejected")
+        raise unavailable(retry_after)
+    return model, messages, parent
 
 
 @router.post("/v1/responses")
-def create_response(
+async def create_response(
     request: ResponseRequest,
-    _=Depends(verify_api_key),
+    http_request: Request,
+    api_key: str | None = Depends(verify_api_key),
     engine: LLMEngine = Depends(LLMEngine),
 ):
     """
@@ -34,26 +193,182 @@ def create_response(
 
     Builds a messages list from instructions and input via prompt_builder,
     then delegates to LLMEngine. Supports streaming via the `stream` field.
+    Each generation that misses the response caches first waits for a slot
+    from the scheduler; a full queue returns 429 and a queue timeout returns
+    503, both with Retry-After.
+    Models missing from the model catalog snapshot are rejected with 404, and
+    tools lists naming unregistered tools with 400.
+    While the circuit breaker of every Ollama backend is open, requests fail
+    fast with 503 and Retry-After.
+
+    With previous_response_id, the stored conversation of that response is
+    prepended (trimmed to HISTORY_MAX_TOKENS); an unknown or expired id returns 404.
+    Every response's conversation is stored under its id for the next turn.
+
+    If the client disconnects during the generation, the Ollama request is
+    aborted so that the model stops generating (see abort_on_disconnect).
+
+    Auth, prompt building, queueing, Ollama and serialization are timed as
+    spans of the request's trace (see core/tracing.py).
 
     Args:
         request: Validated request body containing model, instructions, input, temperature, and stream.
-        _: API key dependency — runs verify_api_key before this handler executes.
+        http_request: The raw request, watched for client disconnects.
+        api_key: Caller's key from verify_api_key, used for fair-share scheduling.
         engine: LLMEngine instance injected by FastAPI.
 
     Returns:
         Response | StreamingResponse: Full response object, or SSE stream if stream=True.
     """
-    messages = build_messages_from_response(request.instructions, request.input)
+    if not request.stream:
+        return await _respond(request, api_key, engine, http_request)
+
+    start = time.perf_counter()
+    model, messages, parent = _prepare(request)
+    admission = Admission(model, api_key, request.priority)
+    try:
+        model, chunks = await engine.stream_response(
+            model=model,
+            messages=messages,
+            temperature=request.temperature,
+            use_tools=request.tools,
+            use_cache=request.cache,
+            max_output_tokens=request.max_output_tokens,
+            stop=request.stop,
+            admit=admission,
+        )
+    except SchedulerRejection as e:
+        admission.release()
+        metrics.requests_total.inc(model, "rejected")
+        raise rejected(e)
+    except BaseException:
+        admission.release()
+        metrics.requests_total.inc(model, "error")
+        raise
+    response_id = new_response_id()
+    chunks = release_when_done(_remember_when_done(chunks, response_id, messages, parent), admission, start)
+    chunks = abort_on_disconnect(chunks, http_request, model)
+    return SlotStreamingResponse(
+        _sse_generator(model, chunks, request.temperature, request.stream, response_id),
+        [admission],
+        media_type="text/event-stream",
+    )
+
+
+async def _respond(
+    request: ResponseRequest, api_key: str | None, engine: LLMEngine, http_request: Request | None
+) -> Response:
+    """
+    Generate the full response of a non-streaming request.
 
-    if request.stream and not request.tools:
-        model, chunks = engine.stream_response(
-            model=request.model, messages=messages, temperature=request.temperature
+    Used by POST /v1/responses and by batch items, which have no http_request
+    to watch for disconnects.
+    """
+    start = time.perf_counter()
+    model, messages, parent = _prepare(request)
+    admission = Admission(model, api_key, request.priority)
+
+    status = "error"
+    try:
+        response = await unless_disconnected(
+            engine.generate_response(
+                model=model,
+                messages=messages,
+                temperature=request.temperature,
+                use_tools=request.tools,
+                use_cache=request.cache,
+                max_output_tokens=request.max_output_tokens,
+                stop=request.stop,
+                admit=admission,
+            ),
+            http_request,
+            model,
         )
-        return StreamingResponse(_sse_generator(model, chunks, request.temperature, request.stream), media_type="text/event-stream")
+        status = "ok"
+    except SchedulerRejection as e:
+        status = "rejected"
+        raise rejected(e)
+    except ClientDisconnected:
+        status = "cancelled"
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except CircuitOpenError as e:
+        raise unavailable(e.retry_after)
+    finally:
+        admission.release()
+        if status != "rejected":
+            metrics.request_duration.observe(time.perf_counter() - start, model)
+        metrics.requests_total.inc(model, status)
+    _remember(response.id, messages, response.output.content, parent)
+    if http_request is not None:
+        # Ends when FastAPI has serialized the response and sends the headers
+        tracing.begin("serialize")
+    return response
+
+
+@router.post("/v1/responses/batch")
+async def create_response_batch(
+    batch: BatchRequest,
+    api_key: str | None = Depends(verify_api_key),
+    engine: LLMEngine = Depends(LLMEngine),
+):
+    """
+    Generate responses for a list of requests with bounded concurrency.
 
-    return engine.generate_response(
-        model=request.model,
-        messages=messages,
-        temperature=request.temperature,
-        use_tools=request.tools,
+    Each item goes through the same path as a non-streaming POST /v1/responses
+    call (its `stream` field is ignored). Results are streamed back as NDJSON,
+    one line per item in completion order, tagged with the item's index.
+    A failing item produces an `error` line instead of failing the batch.
+
+    Args:
+        batch: Validated body with the list of requests and optional concurrency.
+        api_key: Caller's key from verify_api_key, used for fair-share scheduling.
+        engine: LLMEngine instance injected by FastAPI.
+
+    Returns:
+        StreamingResponse: application/x-ndjson stream of BatchResult lines.
+    """
+    concurrency = min(
+        batch.max_concurrency or settings.BATCH_MAX_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY
+    )
+    return StreamingResponse(
+        _run_batch(batch.requests, concurrency, api_key, engine),
+        media_type="application/x-ndjson",
     )
+
+
+async def _run_batch(
+    requests: list[ResponseRequest],
+    concurrency: int,
+    api_key: str | None,
+    engine: LLMEngine,
+):
+    """Run requests with `concurrency` workers and yield NDJSON lines as they complete."""
+    pending = iter(enumerate(requests))
+    results: asyncio.Queue[BatchResult] = asyncio.Queue()
+
+    async def worker():
+        for index, request in pending:
+            await results.put(await _run_batch_item(index, request, api_key, engine))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(requests)))]
+    try:
+        for _ in range(len(requests)):
+            result = await results.get()
+            yield result.model_dump_json(exclude_none=True) + "\n"
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+async def _run_batch_item(
+    index: int, request: ResponseRequest, api_key: str | None, engine: LLMEngine
+) -> BatchResult:
+    """Run one batch item through the non-streaming path, capturing its error if any."""
+    item = request.model_copy(update={"stream": False})
+    try:
+        response = await _respond(item, api_key, engine, None)
+    except HTTPException as e:
+        return BatchResult(index=index, error={"status": e.status_code, "detail": e.detail})
+    except Exception as e:
+        return BatchResult(index=index, error={"status": 500, "detail": str(e)})
+    return BatchResult(index=index, response=response)
@@ -1,61 +1,119 @@
 """
 Main entry point of the FastAPI application.
 
-This module creates the FastAPI instance and registers all routers (route groups).
-It also sets up logging before the app starts.
+create_app() builds the FastAPI instance: it sets up logging, imports and
+registers all routers (route groups) and installs the middleware. Nothing is
+built at import time, so importing this module is cheap; connections to
+Ollama are opened and background tasks started by the lifespan.
 
 Run with:
-     PYTHONPATH=app uvicorn app.main:app --reload
+     PYTHONPATH=app uvicorn --factory app.main:create_app --reload
+
+`main.app` is still available (built on first access) for
+`uvicorn app.main:app` and for tests.
 """
 
+import importlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from endpoints import responses, models
-from core.logging import setup_logging
-from services import tool_registry
 
-# Initialize the logging system before anything else (format, level, etc.)
-setup_logging()
+from core.config import settings
+from core.logging import setup_logging
+from core.tracing import TracingMiddleware
 
-# Main FastAPI application instance
-app = FastAPI(
-    title="Local Responses API",
-    description="OpenAI-compatible API running locally via Ollama",
-    version="2.0.0",
+# Router modules, imported when the app is built; each exposes `router`
+ROUTERS = (
+    "endpoints.responses",  # /v1/responses, /v1/responses/batch
+    "endpoints.chat",  # /v1/chat/completions
+    "endpoints.models",  # /v1/models
+    "endpoints.embeddings",  # /v1/embeddings
+    "endpoints.metrics",  # /metrics
+    "endpoints.health",  # /ready
 )
 
-# Register routers
-# Each router groups the routes of a functional domain
-app.include_router(responses.router) # /v1/responses
-app.include_router(models.router)    # /v1/models
-
-
-@app.get("/")
-def root():
-    """Health check and API info."""
-    return {
-        "name": app.title,
-        "descritpion": app.description,
-        "version": app.version,
-        "status": "running",
-        "docs": "/docs",
-        "endpoints": ["/v1/responses", "/v1/models"],
-    }
-
-# Tool calling
-tool_registry.register(
-    schema={
-        "type": "function",
-        "function": {
-            "name": "get_weather",
-            "description": "Returns the current weather for a given city.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "city": {"type": "string", "description": "The city name."}
-                },
-                "required": ["city"],
-            },
-        },
-    },
-    handler=lambda city: f"Weather in {city}: 22°C, sunny.",
-)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared Ollama connection pool, warm up hot models and start the background tasks."""
+    from services import ollama_client, response_cache, tool_registry
+    from services.backend_pool import pool
+    from services.model_catalog import catalog
+    from services.residency import residency
+
+    client = ollama_client.init_client()
+    await residency.warm_up()
+    pool.start(client)
+    catalog.start()
+    residency.start()
+    yield
+    await residency.stop()
+    await catalog.stop()
+    await pool.stop()
+    await ollama_client.close_client()
+    tool_registry.shutdown()
+    if response_cache.cache.store is not None:
+        await response_cache.cache.drain()
+        response_cache.cache.store.close()
+
+
+def create_app() -> FastAPI:
+    """Build the application. Tools are loaded from TOOL_PLUGINS on first use (see tool_registry)."""
+    # Initialize the logging system before anything else (format, level, etc.)
+    setup_logging()
+
+    app = FastAPI(
+        title="Local Responses API",
+        description="OpenAI-compatible API running locally via Ollama",
+        version="2.0.0",
+        lifespan=lifespan,
+    )
+
+    # Times each request's stages and adds the Server-Timing header
+    app.add_middleware(TracingMiddleware)
+
+    # Each router groups the routes of a functional domain
+    for name in ROUTERS:
+        app.include_router(importlib.import_module(name).router)
+
+    @app.get("/")
+    def root():
+        """Health check and API info."""
+        from services import response_cache, tool_registry
+        from services.embedding_batcher import batcher
+        from services.residency import residency
+        from services.scheduler import scheduler
+        from services.session_store import sessions
+
+        semantic_cache_stats = None
+        if settings.SEMANTIC_CACHE_ENABLED:
+            from services import semantic_cache  # imports NumPy, so only when enabled
+
+            semantic_cache_stats = semantic_cache.index.stats()
+
+        return {
+            "name": app.title,
+            "descritpion": app.description,
+            "version": app.version,
+            "status": "running",
+            "docs": "/docs",
+            "endpoints": ["/v1/responses", "/v1/responses/batch", "/v1/chat/completions", "/v1/models", "/v1/embeddings", "/metrics", "/ready"],
+            "cache": response_cache.cache.stats(),
+            "semantic_cache": semantic_cache_stats,
+            "embeddings": batcher.stats(),
+            "sessions": sessions.stats(),
+            "scheduler": scheduler.stats(),
+            "tools": tool_registry.stats(),
+            "residency": residency.stats(),
+        }
+
+    return app
+
+
+def __getattr__(name: str):
+    """Build `app` on first access, for `uvicorn app.main:app` and `from main import app`."""
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,118 @@
+"""
+Pydantic schemas for the /v1/chat/completions endpoint.
+
+They follow OpenAI's chat completions format:
+  ChatCompletionRequest → validates the incoming request body
+  ChatMessage           → one message of the conversation, or a generated reply
+  ChatCompletionChoice  → one of the n generated candidates
+  ChatCompletion        → the full object returned to the caller (with its ChatUsage)
+"""
+
+import time
+import uuid
+
+from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, Literal, Optional
+
+
+def new_completion_id() -> str:
+    """Return a fresh completion id, e.g. "chatcmpl-3f2c..."."""
+    return f"chatcmpl-{uuid.uuid4().hex}"
+
+
+class ChatMessage(BaseModel):
+    """
+    One message of a chat conversation.
+
+    Attributes:
+        role: "system", "user", "assistant" or "tool".
+        content: The message text.
+    """
+
+    role: Literal["system", "user", "assistant", "tool"]
+    content: str
+
+
+class ChatCompletionRequest(BaseModel):
+    """
+    Request body for POST /v1/chat/completions.
+
+    Attributes:
+        model: The LLM to use. Falls back to DEFAULT_MODEL from settings if not provided.
+        messages: The conversation so far, oldest first.
+        temperature: Sampling temperature between 0.0 and 1.0.
+        n: Number of candidate completions, generated concurrently (at most CHAT_MAX_N).
+        seed: Seed of the first candidate; candidate i uses seed + i. Random if not provided.
+        stream: Stream the candidates token by token over Server-Sent Events.
+        max_tokens: Maximum number of tokens to generate per candidate.
+        stop: Up to 4 sequences at which generation stops; a single string is accepted.
+        cache: Set to False to bypass the response cache for this request.
+        priority: Scheduling priority when the model is busy; higher runs first.
+    """
+
+    model: Optional[str] = None
+    messages: list[ChatMessage] = Field(min_length=1)
+    temperature: float = 0.7
+    n: int = Field(default=1, ge=1)
+    seed: Optional[int] = None
+    stream: bool = False
+    max_tokens: Optional[int] = Field(default=None, ge=1)
+    stop: Optional[list[Annotated[str, Field(min_length=1)]]] = Field(default=None, max_length=4)
+    cache: bool = True
+    priority: int = 0
+
+    @field_validator("stop", mode="before")
+    @classmethod
+    def _stop_as_list(cls, value):
+        return [value] if isinstance(value, str) else value
+
+
+class ChatCompletionChoice(BaseModel):
+    """
+    One generated candidate.
+
+    Attributes:
+        index: Position of the candidate, from 0 to n - 1.
+        message: The assistant's reply.
+        finish_reason: "stop" or "length" (see schemas.responses.Response).
+    """
+
+    index: int
+    message: ChatMessage
+    finish_reason: Optional[str] = None
+
+
+class ChatUsage(BaseModel):
+    """
+    Token accounting, summed over the n candidates.
+
+    Attributes:
+        prompt_tokens: Prompt tokens evaluated.
+        completion_tokens: Tokens generated.
+        total_tokens: prompt_tokens + completion_tokens.
+    """
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+
+class ChatCompletion(BaseModel):
+    """
+    Full response object of POST /v1/chat/completions.
+
+    Attributes:
+        id: Identifier of the completion.
+        object: Always "chat.completion".
+        created: Unix time at which the completion was created.
+        model: Name of the model that generated the candidates.
+        choices: The n candidates, ordered by index.
+        usage: Token usage, or None when every candidate was served from cache.
+    """
+
+    id: str = Field(default_factory=new_completion_id)
+    object: str = "chat.completion"
+    created: int = Field(default_factory=lambda: int(time.time()))
+    model: str
+    choices: list[ChatCompletionChoice]
+    usage: Optional[ChatUsage] = None
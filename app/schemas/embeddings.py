@@ -0,0 +1,54 @@
+"""
+Pydantic schemas for the /v1/embeddings endpoint (OpenAI-compatible).
+
+  EmbeddingRequest   → validates the incoming request body
+  Embedding          → one vector of the response, with its input index
+  EmbeddingResponse  → the full object returned to the caller
+"""
+
+from typing import Optional, Union
+
+from pydantic import BaseModel, Field
+
+
+class EmbeddingRequest(BaseModel):
+    """
+    Request body for POST /v1/embeddings.
+
+    Attributes:
+        model: Ollama embedding model. Falls back to EMBEDDING_DEFAULT_MODEL if not provided.
+        input: A text or a list of texts to embed.
+    """
+
+    model: Optional[str] = None
+    input: Union[str, list[str]] = Field(min_length=1)
+
+
+class Embedding(BaseModel):
+    """
+    The embedding of one input text.
+
+    Attributes:
+        object: Always "embedding".
+        index: Position of the text in the request's input.
+        embedding: The vector.
+    """
+
+    object: str = "embedding"
+    index: int
+    embedding: list[float]
+
+
+class EmbeddingResponse(BaseModel):
+    """
+    Full response object returned by POST /v1/embeddings.
+
+    Attributes:
+        object: Always "list".
+        data: One Embedding per input text, in input order.
+        model: Name of the model that produced the embeddings.
+    """
+
+    object: str = "list"
+    data: list[Embedding]
+    model: str
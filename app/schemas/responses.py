@@ -4,11 +4,22 @@ Pydantic schemas for the /v1/responses endpoint.
 Three schemas work together to represent the full request/response cycle:
   ResponseRequest  → validates the incoming request body
   ResponseOutput   → wraps the LLM's text reply
-  Response         → the full object returned to the caller
+  Response         → the full object returned to the caller (with its Usage)
+
+The batch endpoint adds:
+  BatchRequest     → a list of ResponseRequest items
+  BatchResult      → one NDJSON line of the batch output
 """
 
-from pydantic import BaseModel
-from typing import Optional
+import uuid
+
+from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, Optional, Union
+
+
+def new_response_id() -> str:
+    """Return a fresh response id, e.g. "resp_3f2c..."."""
+    return f"resp_{uuid.uuid4().hex}"
 
 
 class ResponseRequest(BaseModel):
@@ -20,6 +31,13 @@ class ResponseRequest(BaseModel):
         instructions: the role to set to the model
         input: The prompt to send to the model.
         temperature: Sampling temperature between 0.0 and 1.0.
+        stream: Stream the reply token by token over Server-Sent Events.
+        tools: True to expose every registered tool to the model, or the names of the tools to expose.
+        cache: Set to False to bypass the response cache for this request.
+        priority: Scheduling priority when the model is busy; higher runs first.
+        previous_response_id: Continue the conversation of an earlier response.
+        max_output_tokens: Maximum number of tokens to generate.
+        stop: Up to 4 sequences at which generation stops; a single string is accepted.
     """
 
     model: Optional[str] = None
@@ -27,7 +45,17 @@ class ResponseRequest(BaseModel):
     input: str
     temperature: float = 0.7
     stream: bool = False
-    tools: bool = False
+    tools: Union[bool, list[str]] = False
+    cache: bool = True
+    priority: int = 0
+    previous_response_id: Optional[str] = None
+    max_output_tokens: Optional[int] = Field(default=None, ge=1)
+    stop: Optional[list[Annotated[str, Field(min_length=1)]]] = Field(default=None, max_length=4)
+
+    @field_validator("stop", mode="before")
+    @classmethod
+    def _stop_as_list(cls, value):
+        return [value] if isinstance(value, str) else value
 
 
 class ResponseOutput(BaseModel):
@@ -43,6 +71,21 @@ class ResponseOutput(BaseModel):
     content: str
 
 
+class Usage(BaseModel):
+    """
+    Token accounting for one response, summed over every Ollama call it took.
+
+    Attributes:
+        input_tokens: Prompt tokens evaluated (Ollama's prompt_eval_count).
+        output_tokens: Tokens generated (Ollama's eval_count).
+        total_tokens: input_tokens + output_tokens.
+    """
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+
+
 class Response(BaseModel):
     """
     Full response object returned by the API.
@@ -50,9 +93,44 @@ class Response(BaseModel):
     Built by LLMEngine and returned directly by the route handler.
 
     Attributes:
+        id: Identifier to pass as previous_response_id to continue the conversation.
         model: Name of the model that generated the response.
         output: The assistant's reply wrapped in a ResponseOutput.
+        usage: Token usage, or None when the reply was served from cache.
+        finish_reason: "stop" when the reply ended naturally or at a stop sequence,
+            "length" when it was cut at max_output_tokens.
     """
 
+    id: str = Field(default_factory=new_response_id)
     model: str
     output: ResponseOutput
+    usage: Optional[Usage] = None
+    finish_reason: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    """
+    Request body for POST /v1/responses/batch.
+
+    Attributes:
+        requests: The requests to run. Each is handled like a non-streaming /v1/responses call.
+        max_concurrency: Items run at the same time, capped by BATCH_MAX_CONCURRENCY.
+    """
+
+    requests: list[ResponseRequest] = Field(min_length=1)
+    max_concurrency: Optional[int] = Field(default=None, ge=1)
+
+
+class BatchResult(BaseModel):
+    """
+    One line of the NDJSON batch output.
+
+    Attributes:
+        index: Position of the item in BatchRequest.requests.
+        response: The generated response, if the item succeeded.
+        error: {"status": int, "detail": ...}, if the item failed.
+    """
+
+    index: int
+    response: Optional[Response] = None
+    error: Optional[dict] = None
@@ -0,0 +1,206 @@
+"""
+Pool of Ollama backends with health checking and least-loaded routing.
+
+Each backend is polled in the background (every OLLAMA_HEALTH_INTERVAL seconds)
+on /api/tags (models available on disk) and /api/ps (models loaded in memory).
+A request for a model is routed to the healthy backend with the fewest
+outstanding requests, preferring backends that already have the model loaded,
+then those that have it available, then any healthy backend.
+
+A backend that fails a health check or a request with a connection error is
+ejected until a later health check succeeds. If every backend is ejected the
+pool fails open and keeps routing to the least-loaded one, so a single-node
+setup is never locked out by one transient error.
+
+With no OLLAMA_BACKENDS configured, the pool contains the single server that
+OLLAMA_URL points at, so existing setups keep working unchanged.
+
+Each backend also has a circuit breaker (see circuit_breaker.py) fed by the
+outcome of every request. Backends with an open breaker are skipped; when all
+of them are open, pick() fails fast with CircuitOpenError.
+"""
+
+import asyncio
+import logging
+import math
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Sequence
+
+import httpx
+
+from core.config import settings
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class Backend:
+    """
+    Routing state for one Ollama server.
+
+    Attributes:
+        url: Server root, e.g. "http://localhost:11434".
+        healthy: False while the backend is ejected.
+        models: Names of models available on the server (/api/tags).
+        loaded: Names of models currently loaded in memory (/api/ps).
+        outstanding: Requests currently in flight on this backend.
+        tags: Raw /api/tags entries, used to build the union model list.
+        breaker: Circuit breaker fed by request outcomes.
+    """
+
+    url: str
+    healthy: bool = True
+    models: set[str] = field(default_factory=set)
+    loaded: set[str] = field(default_factory=set)
+    outstanding: int = 0
+    tags: list[dict] = field(default_factory=list)
+    breaker: CircuitBreaker = field(
+        default_factory=lambda: CircuitBreaker(
+            settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_TIMEOUT
+        )
+    )
+
+    def __post_init__(self):
+        self.breaker.name = self.url
+
+
+class BackendPool:
+    """Routes requests across several Ollama servers."""
+
+    def __init__(self, urls: list[str]):
+        self.backends = [Backend(url=url.rstrip("/")) for url in urls]
+        self._task: asyncio.Task | None = None
+
+    def pick(self, model: str, exclude: Sequence[Backend] = ()) -> Backend:
+        """
+        Return the least-loaded healthy backend, preferring model affinity.
+
+        Backends in exclude (already tried for this request) are only used if
+        no other backend is available.
+
+        Raises:
+            CircuitOpenError: If the breaker of every backend is open.
+        """
+        closed = [b for b in self.backends if not b.breaker.is_open()]
+        if not closed:
+            raise CircuitOpenError(
+                "Every Ollama backend is failing", retry_after=self._retry_after()
+            )
+        fresh = [b for b in closed if b not in exclude] or closed
+        healthy = [b for b in fresh if b.healthy] or fresh
+        candidates = (
+            [b for b in healthy if model in b.loaded]
+            or [b for b in healthy if model in b.models]
+            or healthy
+        )
+        return min(candidates, key=lambda b: b.outstanding)
+
+    def unavailable_for(self) -> int | None:
+        """Return whole seconds until a backend can be tried again, or None if one can now."""
+        if any(not b.breaker.is_open() for b in self.backends):
+            return None
+        return self._retry_after()
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(min(b.breaker.retry_after() for b in self.backends)))
+
+    @asynccontextmanager
+    async def acquire(self, model: str, exclude: Sequence[Backend] = ()):
+        """
+        Reserve a backend for the duration of one request.
+
+        Connection-level failures eject the backend so that the next request
+        is routed elsewhere; HTTP errors from a reachable server do not.
+        Both, and 5xx responses, count as failures for the backend's breaker.
+        """
+        backend = self.pick(model, exclude)
+        backend.outstanding += 1
+        try:
+            yield backend
+        except httpx.TransportError:
+            self._eject(backend, "request failed")
+            backend.breaker.record_failure()
+            raise
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                backend.breaker.record_failure()
+            else:
+                backend.breaker.record_success()
+            raise
+        else:
+            backend.breaker.record_success()
+        finally:
+            backend.outstanding -= 1
+
+    async def check(self, client: httpx.AsyncClient, backend: Backend) -> None:
+        """
+        Poll one backend's /api/tags and /api/ps and update its state.
+
+        /api/tags decides health; /api/ps only feeds model affinity, so older
+        servers without it are still routed to.
+        """
+        try:
+            tags = await client.get(f"{backend.url}/api/tags")
+            tags.raise_for_status()
+        except httpx.HTTPError as e:
+            self._eject(backend, str(e) or type(e).__name__)
+            return
+
+        backend.tags = tags.json().get("models", [])
+        backend.models = {m["name"] for m in backend.tags}
+        try:
+            ps = await client.get(f"{backend.url}/api/ps")
+            ps.raise_for_status()
+            backend.loaded = {m["name"] for m in ps.json().get("models", [])}
+        except httpx.HTTPError:
+            backend.loaded = set()
+        if not backend.healthy:
+            logger.info("Backend %s is healthy again", backend.url)
+        backend.healthy = True
+
+    async def refresh(self, client: httpx.AsyncClient) -> None:
+        """Health-check every backend concurrently."""
+        await asyncio.gather(*(self.check(client, b) for b in self.backends))
+
+    def union_models(self) -> list[dict]:
+        """Return the /api/tags entries of all healthy backends, deduplicated by name."""
+        merged: dict[str, dict] = {}
+        for backend in self.backends:
+            if backend.healthy:
+                for entry in backend.tags:
+                    merged.setdefault(entry["name"], entry)
+        return list(merged.values())
+
+    def start(self, client: httpx.AsyncClient) -> None:
+        """Start the background health-check loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(client))
+
+    async def stop(self) -> None:
+        """Stop the background health-check loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, client: httpx.AsyncClient) -> None:
+        while True:
+            await self.refresh(client)
+            await asyncio.sleep(settings.OLLAMA_HEALTH_INTERVAL)
+
+    def _eject(self, backend: Backend, reason: str) -> None:
+        if backend.healthy:
+            logger.warning("Ejecting backend %s: %s", backend.url, reason)
+        backend.healthy = False
+
+
+def _configured_urls() -> list[str]:
+    return settings.OLLAMA_BACKENDS or [settings.OLLAMA_URL.rsplit("/api/", 1)[0]]
+
+
+pool = BackendPool(_configured_urls())
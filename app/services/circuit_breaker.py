@@ -0,0 +1,86 @@
+"""
+Circuit breaker for one Ollama backend.
+
+After BREAKER_FAILURE_THRESHOLD consecutive failures (connection errors,
+timeouts or 5xx responses) the breaker opens and the backend pool stops
+routing to that backend. Once BREAKER_RESET_TIMEOUT seconds have passed the
+breaker is half-open: requests are let through again, the first success closes
+it and a failure opens it for another BREAKER_RESET_TIMEOUT.
+
+When the breakers of every backend are open, requests fail fast with
+CircuitOpenError instead of waiting on a server that is down.
+"""
+
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when no backend can take a request because every breaker is open.
+
+    Attributes:
+        retry_after: Whole seconds until a breaker becomes half-open.
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker.
+
+    Attributes:
+        failure_threshold: Consecutive failures that open the breaker.
+        reset_timeout: Seconds the breaker stays open before letting requests through.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, name: str = ""):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        """"closed", "open" or "half_open"."""
+        if self.opened_at is None:
+            return "closed"
+        return "open" if self.retry_after() > 0 else "half_open"
+
+    def is_open(self) -> bool:
+        """Return True while requests must not be sent."""
+        return self.state == "open"
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker becomes half-open (0 if it is not open)."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Circuit %s closed", self.name)
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("Circuit %s opened after %d failures", self.name, self.failures)
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """Return the state, consecutive failures and seconds until half-open."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after": math.ceil(self.retry_after()),
+        }
@@ -0,0 +1,215 @@
+"""
+Persistent response store shared by every worker on a host.
+
+Each uvicorn worker has its own in-memory ResponseCache, which starts empty
+after every deploy. With RESPONSE_CACHE_DISK_PATH set, generated replies are
+also written to a SQLite database at that path. Every worker reads it, so a
+reply generated by one worker is served by all the others, including after a
+restart.
+
+Layout: one row per reply in `entries`. The UNIQUE index on the 32-byte
+request hash is the lookup index: it holds only (key, rowid) pairs, so it
+stays small and in the page cache while the reply texts stay on disk until
+needed. A second index on the expiry time drives TTL purges and eviction.
+The total size of stored replies is kept in the `meta` row, so bounding it to
+RESPONSE_CACHE_DISK_MAX_BYTES never needs a table scan. When the store is
+over its bound, the entries closest to expiry (the oldest, since all share
+one TTL) are deleted first.
+
+The database uses write-ahead logging: readers never block each other or the
+writer. Calls are synchronous and take tens of microseconds on a local disk,
+or up to DISK_BUSY_TIMEOUT while another worker holds the write lock, so
+ResponseCache runs them in a worker thread rather than on the event loop.
+They are serialized by a lock, since the connection is shared by those
+threads. A worker that finds the database locked for longer than
+DISK_BUSY_TIMEOUT skips that lookup or write. Expired entries are purged by
+the first write after each _PURGE_INTERVAL rather than by every write. Any
+SQLite error is logged and treated as a miss.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds a call waits for another worker's write lock before giving up
+DISK_BUSY_TIMEOUT = 0.05
+
+# Entries deleted per round while evicting
+_EVICT_BATCH = 64
+
+# Seconds between purges of expired entries
+_PURGE_INTERVAL = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    key BLOB NOT NULL UNIQUE,
+    expires REAL NOT NULL,
+    size INTEGER NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires);
+CREATE TABLE IF NOT EXISTS meta (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta VALUES (0, 0, 0);
+"""
+
+
+class DiskCache:
+    """
+    SQLite-backed response store with a byte bound and a TTL.
+
+    Keys are the hex SHA-256 digests produced by response_cache.make_key().
+
+    Attributes:
+        path: Database file (created with its directory on first use).
+        max_bytes: Maximum total size of stored texts (UTF-8 encoded).
+        ttl: Seconds after which an entry is considered stale.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str) -> str | None:
+        """Return the stored text for key, or None on a miss, an expired entry or an error."""
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT content, expires FROM entries WHERE key = ?", (bytes.fromhex(key),)
+                ).fetchone()
+        except sqlite3.Error as e:
+            self._failed("read", e)
+            return None
+        if row is None or row[1] < time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def set(self, key: str, content: str) -> None:
+        """Store content under key, evicting the oldest entries if needed (and purging every _PURGE_INTERVAL)."""
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if now >= self._next_purge:
+                        self._delete(conn, "expires < ?", (now,))
+                    self._delete(conn, "key = ?", (bytes.fromhex(key),))
+                    conn.execute(
+                        "INSERT INTO entries (key, expires, size, content) VALUES (?, ?, ?, ?)",
+                        (bytes.fromhex(key), now + self.ttl, size, content),
+                    )
+                    conn.execute("UPDATE meta SET entries = entries + 1, bytes = bytes + ?", (size,))
+                    self._evict(conn)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                if now >= self._next_purge:
+                    self._next_purge = now + _PURGE_INTERVAL
+        except sqlite3.Error as e:
+            self._failed("write", e)
+
+    def clear(self) -> None:
+        """Delete every entry and reset the counters."""
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("DELETE FROM entries")
+                conn.execute("UPDATE meta SET entries = 0, bytes = 0")
+                conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            self._failed("clear", e)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def stats(self) -> dict:
+        """Return this worker's hit/miss counters and the store's occupancy."""
+        try:
+            with self._lock:
+                entries, size = self._connection().execute("SELECT entries, bytes FROM meta").fetchone()
+        except sqlite3.Error:
+            entries, size = None, None
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily so that each worker process gets its own connection
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=DISK_BUSY_TIMEOUT, isolation_level=None, check_same_thread=False
+            )
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(_SCHEMA)
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    def _delete(self, conn: sqlite3.Connection, where: str, params: tuple) -> None:
+        count, size = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE {where}", params
+        ).fetchone()
+        if count:
+            conn.execute(f"DELETE FROM entries WHERE {where}", params)
+            conn.execute("UPDATE meta SET entries = entries - ?, bytes = bytes - ?", (count, size))
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        while conn.execute("SELECT bytes FROM meta").fetchone()[0] > self.max_bytes:
+            rows = conn.execute(
+                "SELECT id, size FROM entries ORDER BY expires LIMIT ?", (_EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                return
+            total = conn.execute("SELECT bytes FROM meta").fetchone()[0]
+            evict = []
+            for row_id, size in rows:
+                evict.append(row_id)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+            conn.executemany("DELETE FROM entries WHERE id = ?", [(i,) for i in evict])
+            conn.execute(
+                "UPDATE meta SET entries = entries - ?, bytes = ?", (len(evict), total)
+            )
+
+    def _failed(self, operation: str, error: sqlite3.Error) -> None:
+        self.errors += 1
+        logger.warning("Disk cache %s failed (%s): %s", operation, self.path, error)
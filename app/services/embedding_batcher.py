@@ -0,0 +1,147 @@
+"""
+Dynamic micro-batching and caching of embedding requests.
+
+Embedding one text per Ollama call wastes most of each call on overhead. Texts
+requested for the same model within EMBEDDING_BATCH_MAX_WAIT_MS of each other
+are merged into a single /api/embed call (at most EMBEDDING_BATCH_MAX_SIZE
+texts), and each caller gets its own embeddings back. Identical texts waiting
+in the same batch are embedded once.
+
+Embeddings are deterministic, so they are also kept in an LRU cache of
+EMBEDDING_CACHE_MAX_ENTRIES (model, text) pairs and repeated texts never reach
+Ollama.
+
+Usage:
+    from services.embedding_batcher import embed
+
+    vectors = await embed("nomic-embed-text", ["first text", "second text"])
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+
+from core.config import settings
+from services import ollama_client
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Collects embedding requests per model and sends them in batches.
+
+    Attributes:
+        max_batch: Maximum texts per Ollama call.
+        max_wait: Seconds the first text of a batch waits for others.
+        cache_entries: Maximum cached (model, text) embeddings.
+    """
+
+    def __init__(self, max_batch: int, max_wait: float, cache_entries: int):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cache_entries = cache_entries
+        # model -> {text: future of its embedding}
+        self._pending: dict[str, dict[str, asyncio.Future]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._running: set[asyncio.Task] = set()
+        self._cache: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+        self.batches = 0
+        self.texts = 0
+        self.cache_hits = 0
+
+    async def embed(self, model: str, texts: list[str]) -> list[list[float]]:
+        """Return one embedding per text, from the cache or a shared batch."""
+        results: list = [None] * len(texts)
+        waiting = []
+        for i, text in enumerate(texts):
+            cached = self._cache.get((model, text))
+            if cached is not None:
+                self._cache.move_to_end((model, text))
+                self.cache_hits += 1
+                results[i] = cached
+            else:
+                waiting.append((i, self._enqueue(model, text)))
+        if waiting:
+            # Shielded: identical texts of other callers share the same future
+            embeddings = await asyncio.gather(*(asyncio.shield(f) for _, f in waiting))
+            for (i, _), embedding in zip(waiting, embeddings):
+                results[i] = embedding
+        return results
+
+    def stats(self) -> dict:
+        """Return batch and cache counters."""
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "cache_hits": self.cache_hits,
+            "cache_entries": len(self._cache),
+        }
+
+    def clear(self) -> None:
+        """Drop the cache and reset the counters."""
+        self._cache.clear()
+        self.batches = 0
+        self.texts = 0
+        self.cache_hits = 0
+
+    def _enqueue(self, model: str, text: str) -> asyncio.Future:
+        pending = self._pending.setdefault(model, {})
+        future = pending.get(text)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            pending[text] = future
+        if len(pending) >= self.max_batch:
+            self._flush(model)
+        elif model not in self._timers:
+            self._timers[model] = asyncio.get_running_loop().call_later(
+                self.max_wait, self._flush, model
+            )
+        return future
+
+    def _flush(self, model: str) -> None:
+        timer = self._timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(model, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(model, batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, model: str, batch: dict[str, asyncio.Future]) -> None:
+        texts = list(batch)
+        self.batches += 1
+        self.texts += len(texts)
+        try:
+            embeddings = await ollama_client.embed(model, texts)
+        except Exception as e:
+            logger.warning("Embedding batch of %d texts failed: %s", len(texts), e)
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for text, embedding in zip(texts, embeddings):
+            self._store(model, text, embedding)
+            future = batch[text]
+            if not future.done():
+                future.set_result(embedding)
+
+    def _store(self, model: str, text: str, embedding: list[float]) -> None:
+        self._cache[(model, text)] = embedding
+        self._cache.move_to_end((model, text))
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+
+
+batcher = EmbeddingBatcher(
+    max_batch=settings.EMBEDDING_BATCH_MAX_SIZE,
+    max_wait=settings.EMBEDDING_BATCH_MAX_WAIT_MS / 1000,
+    cache_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+)
+
+
+async def embed(model: str, texts: list[str]) -> list[list[float]]:
+    """Embed texts through the shared batcher (see EmbeddingBatcher.embed)."""
+    return await batcher.embed(model, texts)
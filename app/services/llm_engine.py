@@ -6,13 +6,17 @@ It handles model resolution, response wrapping, and the agentic tool-calling
 loop so that routes stay thin and the Ollama client stays focused on HTTP.
 """
 
+import asyncio
+import contextlib
 import logging
 import time
+from typing import Awaitable, Callable
 
+from core import tracing
 from core.config import settings
-from services import tool_registry
-from services.ollama_client import chat_with_ollama, stream_from_ollama
-from schemas.responses import Response, ResponseOutput
+from services import output_limits, response_cache, single_flight, tool_registry
+from services.ollama_client import chat_with_ollama, stream_from_ollama, usage_from_stats
+from schemas.responses import Response, ResponseOutput, Usage
 
 logger = logging.getLogger(__name__)
 
@@ -28,12 +32,17 @@ class LLMEngine:
     def __init__(self):
         self.default_model = settings.DEFAULT_MODEL
 
-    def generate_response(
+    async def generate_response(
         self,
         model: str | None,
         messages: list[dict],
         temperature: float,
-        use_tools: bool = False,
+        use_tools: bool | list[str] = False,
+        use_cache: bool = True,
+        max_output_tokens: int | None = None,
+        stop: list[str] | None = None,
+        seed: int | None = None,
+        admit: Callable[[], Awaitable[None]] | None = None,
     ) -> Response:
         """
         Generate a response from the LLM, with an optional agentic tool-calling loop.
@@ -42,11 +51,21 @@ class LLMEngine:
         decides to call one, the tool is executed locally and its result is fed
         back to the model. This repeats until the model returns a plain text reply.
 
+        Deterministic requests are served from the response cache when possible,
+        or from the semantic cache when their input paraphrases a cached one, and
+        coalescable requests attach to an identical generation already in flight.
+
         Args:
             model: The model name to use. Falls back to default_model if None.
             messages: Pre-built list of message dicts (built by prompt_builder).
             temperature: Sampling temperature between 0.0 and 1.0.
-            use_tools: Whether to expose registered tools to the model.
+            use_tools: True to expose all registered tools to the model, or the names of the tools to expose.
+            use_cache: Set to False to bypass the response cache for this call.
+            max_output_tokens: Maximum number of tokens to generate.
+            stop: Sequences at which generation stops (not included in the reply).
+            seed: Sampling seed, for reproducible or deliberately distinct samples.
+            admit: Awaited once the caches missed, before anything is sent to
+                Ollama; the routes wait for their scheduler slot here.
 
         Returns:
             Response: A typed Pydantic object containing the model name and assistant reply.
@@ -58,50 +77,342 @@ class LLMEngine:
         )
         start = time.time()
 
-        tools = tool_registry.get_schemas() if use_tools else None
+        toolset = _select_tools(use_tools)
+        options = _options(max_output_tokens, stop, seed)
+
+        cache_key = None
+        query = None
+        with tracing.span("cache"):
+            if use_cache and response_cache.is_cacheable(temperature):
+                cache_key = response_cache.make_key(model, messages, temperature, _fingerprint(toolset), options)
+                cached = await response_cache.cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Response served from cache")
+                    return Response(model=model, output=ResponseOutput(content=cached), finish_reason="stop")
+
+            # The semantic index does not tell replies apart by output limits or seed
+            if use_cache and settings.SEMANTIC_CACHE_ENABLED and not options:
+                from services import semantic_cache  # imports NumPy, so only when enabled
+
+                if semantic_cache.is_applicable(messages, temperature):
+                    query = await semantic_cache.prepare(model, messages, _fingerprint(toolset))
+                    match = query and semantic_cache.index.search(query, settings.SEMANTIC_CACHE_THRESHOLD)
+                    if match:
+                        logger.info("Response served from semantic cache (similarity %.3f)", match.score)
+                        return Response(
+                            model=model, output=ResponseOutput(content=match.content), finish_reason="stop"
+                        )
+
+        if admit is not None:
+            await admit()
+
+        if single_flight.is_coalescable(temperature):
+            key = cache_key or response_cache.make_key(model, messages, temperature, _fingerprint(toolset), options)
+            content, usage, finish_reason = await single_flight.run(
+                key, lambda: self._run_tool_loop(model, messages, temperature, toolset, stop, options)
+            )
+        else:
+            content, usage, finish_reason = await self._run_tool_loop(
+                model, messages, temperature, toolset, stop, options
+            )
+
+        logger.info("Response generated in %.2fs", time.time() - start)
+        # Truncated replies are not cached: cache hits always report finish_reason "stop"
+        if finish_reason != "length":
+            if cache_key is not None:
+                response_cache.cache.set(cache_key, content)
+            if query is not None:
+                from services import semantic_cache
+
+                semantic_cache.index.add(query, content)
+        return Response(
+            model=model, output=ResponseOutput(content=content), usage=usage, finish_reason=finish_reason
+        )
+
+    async def _run_tool_loop(
+        self,
+        model: str,
+        messages: list[dict],
+        temperature: float,
+        toolset: tool_registry.ToolSet | None,
+        stop: list[str] | None = None,
+        options: dict | None = None,
+    ) -> tuple[str, Usage, str]:
+        """
+        Call Ollama, executing requested tools, until the model returns plain text.
+
+        The tool calls of one turn run concurrently and their results are appended
+        in call order. After TOOL_MAX_ITERATIONS rounds of tool calls, tools are
+        withheld so that the model has to answer with what it already has; tool
+        calls it still makes in that last round are not executed.
+        options carry the output limits to Ollama; the final text is also cut at
+        its first stop sequence in case the backend did not apply them.
+
+        Returns:
+            tuple[str, Usage, str]: The final text, token usage summed over all
+            rounds and the finish reason ("stop" or "length").
+        """
         messages = list(messages)  # avoid mutating the caller's list
+        usage = Usage()
+        tools = toolset.schemas if toolset else None
 
+        iteration = 0
         while True:
-            message = chat_with_ollama(
-                model=model, messages=messages, temperature=temperature, tools=tools
+            if tools and iteration >= settings.TOOL_MAX_ITERATIONS:
+                logger.warning("Tool loop reached %d iterations, requesting final answer", iteration)
+                tools = None
+
+            body = await chat_with_ollama(
+                model=model, messages=messages, temperature=temperature, tools=tools, options=options
             )
+            _add_usage(usage, usage_from_stats(body))
+            message = body["message"]
 
-            if not message.get("tool_calls"):
-                logger.info("Response generated in %.2fs", time.time() - start)
-                return Response(
-                    model=model,
-                    output=ResponseOutput(content=message.get("content", "")),
-                )
+            if message.get("tool_calls") and not tools:
+                logger.warning("Ignoring tool calls of a round without tools")
+            if not message.get("tool_calls") or not tools:
+                content, stopped = output_limits.truncate(message.get("content", ""), stop)
+                return content, usage, "stop" if stopped else body.get("done_reason") or "stop"
 
-            # Append assistant message with tool_calls, then execute each tool
+            # Append assistant message with tool_calls, then execute the tools concurrently
             messages.append({
                 "role": "assistant",
                 "content": message.get("content", ""),
                 "tool_calls": message["tool_calls"],
             })
-            for tool_call in message["tool_calls"]:
-                name = tool_call["function"]["name"]
-                arguments = tool_call["function"]["arguments"]
-                result = tool_registry.execute(name, arguments)
-                messages.append({"role": "tool", "content": result})
+            with tracing.span("tools"):
+                results = await tool_registry.execute_many(message["tool_calls"], toolset and toolset.names)
+            messages.extend({"role": "tool", "content": result} for result in results)
+            iteration += 1
 
             logger.info("Tool calls executed, continuing generation loop")
 
-    def stream_response(self, model: str | None, messages: list[dict], temperature: float):
+    async def stream_response(
+        self,
+        model: str | None,
+        messages: list[dict],
+        temperature: float,
+        use_tools: bool | list[str] = False,
+        use_cache: bool = True,
+        max_output_tokens: int | None = None,
+        stop: list[str] | None = None,
+        seed: int | None = None,
+        admit: Callable[[], Awaitable[None]] | None = None,
+    ):
         """
         Stream a response from the LLM token by token.
 
-        Note: streaming is not supported when use_tools=True. The endpoint
-        falls back to generate_response in that case.
+        When use_tools=True, the agentic tool loop runs against Ollama's streaming
+        API and the generator also yields tool events (see _stream_tool_loop).
+        Tool-enabled streams are neither cached nor coalesced.
+
+        Cacheable requests are replayed from the response cache on a hit, and the
+        streamed text is stored once the stream completes on a miss. Coalescable
+        requests subscribe to an identical stream already in flight, if any.
+
+        The output limits are sent to Ollama and also enforced on the chunks as
+        they go by (see services/output_limits.py); the stream ends with its
+        finish_reason.
 
         Args:
             model: The model name to use. Falls back to default_model if None.
             messages: Pre-built list of message dicts (built by prompt_builder).
             temperature: Sampling temperature between 0.0 and 1.0.
+            use_tools: True to expose all registered tools to the model, or the names of the tools to expose.
+            use_cache: Set to False to bypass the response cache for this call.
+            max_output_tokens: Maximum number of tokens to generate.
+            stop: Sequences at which generation stops (not included in the reply).
+            seed: Sampling seed, for reproducible or deliberately distinct samples.
+            admit: Awaited before the stream is opened, unless it is replayed
+                from the cache; the routes wait for their scheduler slot here.
 
         Returns:
-            tuple[str, Generator]: The resolved model name and a chunk generator.
+            tuple[str, AsyncGenerator]: The resolved model name and an async chunk generator.
         """
         model = model or self.default_model
-        logger.info("Streaming response with model=%s temperature=%s", model, temperature)
-        return model, stream_from_ollama(model=model, messages=messages, temperature=temperature)
+        logger.info(
+            "Streaming response with model=%s temperature=%s use_tools=%s",
+            model, temperature, use_tools,
+        )
+
+        options = _options(max_output_tokens, stop, seed)
+        chunks = await self._open_stream(model, messages, temperature, use_tools, use_cache, options, admit)
+        return model, output_limits.limit_stream(chunks, max_output_tokens, stop)
+
+    async def _open_stream(
+        self,
+        model: str,
+        messages: list[dict],
+        temperature: float,
+        use_tools: bool | list[str],
+        use_cache: bool,
+        options: dict,
+        admit: Callable[[], Awaitable[None]] | None = None,
+    ):
+        """Pick the source of a stream: the cache, the tool loop, a shared stream or Ollama."""
+        toolset = _select_tools(use_tools)
+        cacheable = toolset is None and use_cache and response_cache.is_cacheable(temperature)
+        key = None
+        if cacheable:
+            key = response_cache.make_key(model, messages, temperature, options=options)
+            cached = await response_cache.cache.get(key)
+            if cached is not None:
+                logger.info("Stream replayed from cache")
+                return _replay(cached)
+
+        if admit is not None:
+            await admit()
+        if toolset is not None:
+            return self._stream_tool_loop(model, messages, temperature, toolset, options)
+
+        coalescable = single_flight.is_coalescable(temperature)
+        if not (cacheable or coalescable):
+            return stream_from_ollama(model=model, messages=messages, temperature=temperature, options=options)
+
+        key = key or response_cache.make_key(model, messages, temperature, options=options)
+
+        def upstream():
+            if cacheable:
+                return _stream_and_store(key, model, messages, temperature, options)
+            return stream_from_ollama(model=model, messages=messages, temperature=temperature, options=options)
+
+        if coalescable:
+            return single_flight.stream(key, upstream)
+        return upstream()
+
+    async def _stream_tool_loop(
+        self,
+        model: str,
+        messages: list[dict],
+        temperature: float,
+        toolset: tool_registry.ToolSet,
+        options: dict | None = None,
+    ):
+        """
+        Streaming counterpart of _run_tool_loop.
+
+        Yields text chunks as they arrive, and for every tool call a
+        {"type": "tool_call.start", ...} event followed by a
+        {"type": "tool_call.end", ..., "result": ...} event once it finishes.
+        Tool calls of one turn still run concurrently; end events are yielded in
+        completion order, while results are fed back to the model in call order.
+        A single {"usage": ..., "finish_reason": ...} dict is yielded last, with
+        the usage summed over all rounds and the last round's finish reason.
+        """
+        tools = toolset.schemas
+        messages = list(messages)  # avoid mutating the caller's list
+        usage = Usage()
+
+        iteration = 0
+        while True:
+            if tools and iteration >= settings.TOOL_MAX_ITERATIONS:
+                logger.warning("Tool loop reached %d iterations, requesting final answer", iteration)
+                tools = None
+
+            content, tool_calls, finish_reason = [], [], "stop"
+            # aclosing: closing this generator early also closes the Ollama stream right away
+            async with contextlib.aclosing(stream_from_ollama(
+                model=model, messages=messages, temperature=temperature, tools=tools, options=options
+            )) as chunks:
+                async for chunk in chunks:
+                    if isinstance(chunk, dict) and "usage" in chunk:
+                        _add_usage(usage, chunk["usage"])
+                        finish_reason = chunk.get("finish_reason", finish_reason)
+                    elif isinstance(chunk, dict):
+                        tool_calls.extend(chunk["tool_calls"])
+                    else:
+                        content.append(chunk)
+                        yield chunk
+
+            if tool_calls and not tools:
+                logger.warning("Ignoring tool calls of a round without tools")
+            if not tool_calls or not tools:
+                yield {"usage": usage.model_dump(), "finish_reason": finish_reason}
+                return
+
+            messages.append({
+                "role": "assistant",
+                "content": "".join(content),
+                "tool_calls": tool_calls,
+            })
+
+            async def run(index: int, call: dict):
+                function = call["function"]
+                started = time.perf_counter()
+                result = await tool_registry.execute(function["name"], function["arguments"], toolset.names)
+                return index, result, time.perf_counter() - started
+
+            for index, call in enumerate(tool_calls):
+                yield {
+                    "type": "tool_call.start",
+                    "index": index,
+                    "name": call["function"]["name"],
+                    "arguments": call["function"]["arguments"],
+                }
+
+            results = [""] * len(tool_calls)
+            with tracing.span("tools"):
+                for next_done in asyncio.as_completed([run(i, c) for i, c in enumerate(tool_calls)]):
+                    index, result, duration = await next_done
+                    results[index] = result
+                    yield {
+                        "type": "tool_call.end",
+                        "index": index,
+                        "name": tool_calls[index]["function"]["name"],
+                        "result": result,
+                        "duration_ms": round(duration * 1000, 1),
+                    }
+
+            messages.extend({"role": "tool", "content": result} for result in results)
+            iteration += 1
+            logger.info("Tool calls executed, continuing streaming generation loop")
+
+
+def _select_tools(use_tools: bool | list[str]) -> tool_registry.ToolSet | None:
+    """Resolve use_tools to the tools offered to the model (None for no tools)."""
+    if not use_tools:
+        return None
+    return tool_registry.select(None if use_tools is True else use_tools)
+
+
+def _options(max_output_tokens: int | None, stop: list[str] | None, seed: int | None) -> dict:
+    """Extra Ollama options of a generation; they are also part of its cache key."""
+    options = output_limits.options(max_output_tokens, stop)
+    if seed is not None:
+        options["seed"] = seed
+    return options
+
+
+def _fingerprint(toolset: tool_registry.ToolSet | None) -> str | None:
+    return toolset.fingerprint if toolset else None
+
+
+async def _replay(content: str):
+    """Yield a cached response as a single chunk."""
+    yield content
+
+
+async def _stream_and_store(
+    cache_key: str, model: str, messages: list[dict], temperature: float, options: dict | None = None
+):
+    """Forward chunks from Ollama and cache the full text once the stream completes, unless truncated."""
+    parts = []
+    finish_reason = "stop"
+    async with contextlib.aclosing(
+        stream_from_ollama(model=model, messages=messages, temperature=temperature, options=options)
+    ) as chunks:
+        async for chunk in chunks:
+            if isinstance(chunk, str):
+                parts.append(chunk)
+            else:
+                finish_reason = chunk.get("finish_reason", finish_reason)
+            yield chunk
+    if finish_reason != "length":
+        response_cache.cache.set(cache_key, "".join(parts))
+
+
+def _add_usage(total: Usage, usage: dict) -> None:
+    """Add one Ollama call's usage dict to a running total."""
+    total.input_tokens += usage["input_tokens"]
+    total.output_tokens += usage["output_tokens"]
+    total.total_tokens += usage["total_tokens"]
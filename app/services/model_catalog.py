@@ -0,0 +1,125 @@
+"""
+In-process snapshot of the models available across the Ollama backends.
+
+/v1/models is polled constantly by dashboards and clients, so instead of asking
+Ollama on every call the snapshot is refreshed in the background every
+MODELS_REFRESH_INTERVAL seconds. Readers always get the current snapshot, even
+while a refresh is running (stale-while-revalidate); only the very first read
+waits for data.
+
+Each snapshot carries an ETag so unchanged lists can be answered with 304, and
+is also used to reject requests for unknown models before they reach Ollama.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+
+from core.config import settings
+from services.ollama_client import get_ollama_models
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    One version of the model list.
+
+    Attributes:
+        models: Simplified entries as returned by /v1/models ({"id", "size"}).
+        etag: Quoted hash of models, for If-None-Match.
+        refreshed_at: time.monotonic() of the refresh that produced it.
+    """
+
+    models: list[dict]
+    etag: str
+    refreshed_at: float
+
+    @property
+    def names(self) -> set[str]:
+        return {m["id"] for m in self.models}
+
+
+class ModelCatalog:
+    """Holds the latest Snapshot and refreshes it in the background."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.snapshot: Snapshot | None = None
+        self._refreshing: asyncio.Task | None = None
+        self._loop_task: asyncio.Task | None = None
+
+    async def get(self) -> Snapshot:
+        """Return the current snapshot, starting a background refresh if it is stale."""
+        if self.snapshot is None:
+            return await self.refresh()
+        if time.monotonic() - self.snapshot.refreshed_at > self.interval:
+            self._refresh_in_background()
+        return self.snapshot
+
+    async def refresh(self) -> Snapshot:
+        """Fetch the model list now (shared with any refresh already running)."""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._fetch())
+        return await asyncio.shield(self._refreshing)
+
+    def is_known(self, model: str) -> bool:
+        """
+        Return False only if a snapshot exists and does not contain model.
+
+        A bare name like "llama3" matches "llama3:latest", as Ollama does.
+        """
+        if self.snapshot is None or not self.snapshot.models:
+            return True
+        names = self.snapshot.names
+        return model in names or f"{model}:latest" in names
+
+    def start(self) -> None:
+        """Start the periodic background refresh."""
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic background refresh."""
+        for task in (self._loop_task, self._refreshing):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._loop_task = None
+        self._refreshing = None
+
+    async def _fetch(self) -> Snapshot:
+        raw = await get_ollama_models()
+        models = [{"id": m["name"], "size": m.get("size")} for m in raw]
+        body = json.dumps(models, sort_keys=True, separators=(",", ":"))
+        etag = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+        self.snapshot = Snapshot(models=models, etag=etag, refreshed_at=time.monotonic())
+        return self.snapshot
+
+    def _refresh_in_background(self) -> None:
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._fetch())
+            self._refreshing.add_done_callback(_log_failure)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("Model list refresh failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Model list refresh failed: %s", task.exception())
+
+
+catalog = ModelCatalog(interval=settings.MODELS_REFRESH_INTERVAL)
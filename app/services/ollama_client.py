@@ -3,102 +3,295 @@ HTTP client for the local Ollama inference server.
 
 This module is the only place in the app that communicates directly with Ollama.
 All other modules go through these functions to generate text.
+
+A single httpx.AsyncClient is shared by every call so that TCP connections are
+pooled and kept alive between requests. It is created and closed by the FastAPI
+lifespan in main.py via init_client() / close_client().
+
+Every call is routed to one server of the backend pool (see backend_pool.py),
+with retries, hedging and timeouts applied by resilience.connect().
 """
 
+import asyncio
+import functools
 import json
-import requests
+from contextlib import AsyncExitStack
+from typing import Sequence
+
+import httpx
+
+from core import metrics
 from core.config import settings
+from services import resilience
+from services.backend_pool import Backend, pool
+
+_client: httpx.AsyncClient | None = None
+
+
+def init_client() -> httpx.AsyncClient:
+    """Create the shared connection pool (idempotent)."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.OLLAMA_TIMEOUT, connect=settings.OLLAMA_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared connection pool and release its sockets."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily outside of the lifespan (e.g. scripts)."""
+    return _client or init_client()
+
+
+def keep_alive_for(model: str) -> str | int | None:
+    """
+    Return the keep_alive value to send for model, or None for Ollama's default.
+
+    MODEL_KEEP_ALIVE overrides take precedence; pinned models otherwise stay
+    loaded indefinitely (-1); everything else uses DEFAULT_KEEP_ALIVE.
+    """
+    if model in settings.MODEL_KEEP_ALIVE:
+        return settings.MODEL_KEEP_ALIVE[model]
+    if model in settings.PINNED_MODELS:
+        return -1
+    return settings.DEFAULT_KEEP_ALIVE
 
 
-def chat_with_ollama(
+def _with_keep_alive(payload: dict) -> None:
+    keep_alive = keep_alive_for(payload["model"])
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+
+
+async def chat_with_ollama(
     model: str,
     messages: list[dict],
     temperature: float,
-    tools: list[dict] | None = None,
+    tools: Sequence[dict] | None = None,
+    options: dict | None = None,
 ) -> dict:
     """
-    Send messages to Ollama and return the full assistant message dict.
+    Send messages to Ollama and return the full response body.
 
-    Unlike a simple text-only call, this returns the complete message object
-    so that the caller can inspect tool_calls if the model wants to use a tool.
+    The body contains the complete assistant "message" (so that the caller can
+    inspect tool_calls if the model wants to use a tool) along with Ollama's
+    timing and token counts, which are also recorded in core.metrics.
 
     Args:
         model: The name of the Ollama model to use (e.g. "llama3", "mistral").
         messages: List of message dicts with "role" and "content" keys.
         temperature: Sampling temperature between 0.0 and 1.0.
         tools: Optional list of OpenAI-compatible tool schemas to expose.
+        options: Extra Ollama options sent with temperature, e.g. num_predict and stop
+                 (see services/output_limits.py).
 
     Returns:
-        dict: The full assistant message from Ollama
-              (may contain "content" and/or "tool_calls").
+        dict: The Ollama response body: "message" (may contain "content" and/or
+              "tool_calls"), "done_reason" ("stop" or "length"), "prompt_eval_count",
+              "eval_count", durations, etc.
 
     Raises:
-        requests.HTTPError: If Ollama returns a 4xx or 5xx response.
-        requests.ConnectionError: If the Ollama server is not running.
+        httpx.HTTPStatusError: If Ollama returns a 4xx or 5xx response.
+        httpx.ConnectError: If the Ollama server is not running.
+        CircuitOpenError: If every backend's circuit breaker is open.
     """
     payload: dict = {
         "model": model,
         "messages": messages,
-        "options": {"temperature": temperature},
+        "options": {"temperature": temperature, **(options or {})},
         "stream": False,
     }
     if tools:
         payload["tools"] = tools
+    _with_keep_alive(payload)
+
+    async with resilience.connect(model, functools.partial(_post_chat, payload)) as body:
+        pass
+    metrics.record_ollama_stats(model, body)
+    return body
+
 
-    response = requests.post(settings.OLLAMA_URL, json=payload)
+async def _post_chat(payload: dict, backend: Backend, stack: AsyncExitStack) -> dict:
+    response = await get_client().post(f"{backend.url}/api/chat", json=payload)
     response.raise_for_status()
-    return response.json()["message"]
+    return response.json()
 
 
-def stream_from_ollama(model: str, messages: list[dict], temperature: float):
+async def stream_from_ollama(
+    model: str,
+    messages: list[dict],
+    temperature: float,
+    tools: Sequence[dict] | None = None,
+    options: dict | None = None,
+):
     """
     Stream text chunks from the Ollama /api/chat endpoint.
 
     Yields one string per token as the model generates it, without waiting
-    for the full response.
+    for the full response. When tools are passed and the model decides to call
+    some, they are yielded as a {"tool_calls": [...]} dict. The final chunk's
+    token counts are recorded in core.metrics and yielded last as a
+    {"usage": {...}, "finish_reason": ...} dict, where finish_reason is
+    Ollama's done_reason ("stop", or "length" when num_predict was reached).
 
     Args:
         model: The name of the Ollama model to use.
         messages: List of message dicts with "role" and "content" keys.
         temperature: Sampling temperature between 0.0 and 1.0.
+        tools: Optional list of OpenAI-compatible tool schemas to expose.
+        options: Extra Ollama options sent with temperature, e.g. num_predict and stop
+                 (see services/output_limits.py).
 
     Yields:
-        str: Individual text chunks from the model output.
+        str | dict: Individual text chunks, a tool_calls dict (only with tools),
+                    or the final usage dict.
 
     Raises:
-        requests.HTTPError: If Ollama returns a 4xx or 5xx response.
-        requests.ConnectionError: If the Ollama server is not running.
+        httpx.HTTPStatusError: If Ollama returns a 4xx or 5xx response.
+        httpx.ConnectError: If the Ollama server is not running.
+        CircuitOpenError: If every backend's circuit breaker is open.
     """
-    response = requests.post(
-        settings.OLLAMA_URL,
-        json={
-            "model": model,
-            "messages": messages,
-            "options": {"temperature": temperature},
-            "stream": True,
-        },
-        stream=True,
+    payload: dict = {
+        "model": model,
+        "messages": messages,
+        "options": {"temperature": temperature, **(options or {})},
+        "stream": True,
+    }
+    if tools:
+        payload["tools"] = tools
+    _with_keep_alive(payload)
+
+    async with resilience.connect(model, functools.partial(_open_stream, payload)) as (first, lines):
+        line = first
+        while line is not None:
+            if line:
+                chunk = json.loads(line)
+                message = chunk.get("message", {})
+                if message.get("tool_calls"):
+                    yield {"tool_calls": message["tool_calls"]}
+                if not chunk.get("done") and message.get("content"):
+                    yield message["content"]
+                if chunk.get("done"):
+                    metrics.record_ollama_stats(model, chunk)
+                    yield {"usage": usage_from_stats(chunk), "finish_reason": chunk.get("done_reason") or "stop"}
+            line = await anext(lines, None)
+
+
+async def _open_stream(payload: dict, backend: Backend, stack: AsyncExitStack):
+    """Start a streaming chat and wait for its first line (within OLLAMA_FIRST_TOKEN_TIMEOUT)."""
+    response = await stack.enter_async_context(
+        get_client().stream("POST", f"{backend.url}/api/chat", json=payload)
     )
     response.raise_for_status()
-    for line in response.iter_lines():
-        if line:
-            chunk = json.loads(line)
-            if not chunk.get("done"):
-                yield chunk["message"]["content"]
+    lines = response.aiter_lines()
+    try:
+        first = await asyncio.wait_for(anext(lines, None), settings.OLLAMA_FIRST_TOKEN_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise resilience.FirstTokenTimeout(
+            f"No token from {backend.url} within {settings.OLLAMA_FIRST_TOKEN_TIMEOUT}s"
+        )
+    return first, lines
 
 
-def get_ollama_models() -> list[dict]:
+async def load_model(backend_url: str, model: str, prompt: str | None = None) -> dict:
     """
-    Fetch the list of locally available models from Ollama.
+    Load model into memory on one backend, optionally running a warm-up prompt.
+
+    With no prompt, Ollama only loads the model (empty messages list). With a
+    prompt, a single token is generated so the prompt path is exercised too.
+    The load is recorded in model_load but not counted as a cold start.
+
+    Args:
+        backend_url: Root URL of the Ollama server to load the model on.
+        model: The name of the Ollama model to load.
+        prompt: Optional warm-up prompt.
 
     Returns:
-        list[dict]: Raw model entries from Ollama's /api/tags response.
+        dict: The Ollama response body (includes "load_duration").
 
     Raises:
-        requests.HTTPError: If Ollama returns a 4xx or 5xx response.
-        requests.ConnectionError: If the Ollama server is not running.
+        httpx.HTTPStatusError: If Ollama returns a 4xx or 5xx response.
+        httpx.ConnectError: If the Ollama server is not running.
     """
-    base_url = settings.OLLAMA_URL.rsplit("/api/", 1)[0]
-    response = requests.get(f"{base_url}/api/tags")
+    payload: dict = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}] if prompt else [],
+        "options": {"num_predict": 1},
+        "stream": False,
+    }
+    _with_keep_alive(payload)
+    response = await get_client().post(f"{backend_url}/api/chat", json=payload)
     response.raise_for_status()
-    return response.json().get("models", [])
+    body = response.json()
+    metrics.record_ollama_stats(model, body, warmup=True)
+    return body
+
+
+async def embed(model: str, inputs: list[str]) -> list[list[float]]:
+    """
+    Return one embedding per input from Ollama's /api/embed endpoint.
+
+    Args:
+        model: An Ollama embedding model (e.g. "nomic-embed-text").
+        inputs: Texts to embed in one call.
+
+    Returns:
+        list[list[float]]: The embeddings, in the order of inputs.
+
+    Raises:
+        httpx.HTTPStatusError: If Ollama returns a 4xx or 5xx response.
+        httpx.ConnectError: If the Ollama server is not running.
+        CircuitOpenError: If every backend's circuit breaker is open.
+    """
+    payload: dict = {"model": model, "input": inputs}
+    _with_keep_alive(payload)
+    async with resilience.connect(model, functools.partial(_post_embed, payload)) as body:
+        pass
+    metrics.prompt_tokens.inc(model, amount=body.get("prompt_eval_count") or 0)
+    return body["embeddings"]
+
+
+async def _post_embed(payload: dict, backend: Backend, stack: AsyncExitStack) -> dict:
+    response = await get_client().post(f"{backend.url}/api/embed", json=payload)
+    response.raise_for_status()
+    return response.json()
+
+
+def usage_from_stats(body: dict) -> dict:
+    """Convert Ollama's token counts into a usage dict (see schemas.responses.Usage)."""
+    input_tokens = body.get("prompt_eval_count") or 0
+    output_tokens = body.get("eval_count") or 0
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+    }
+
+
+async def get_ollama_models() -> list[dict]:
+    """
+    Fetch the models available across the backend pool.
+
+    Health-checks every backend, then merges their /api/tags entries.
+    Unreachable backends are skipped.
+
+    Returns:
+        list[dict]: Raw model entries from Ollama's /api/tags responses, one per name.
+    """
+    await pool.refresh(get_client())
+    return pool.union_models()
@@ -0,0 +1,138 @@
+"""
+Output limits of a generation: max_output_tokens and stop sequences.
+
+Both limits are sent to Ollama as the num_predict and stop options, and a
+stream is also checked here as its tokens go by, so a limit holds even when a
+backend ignores an option. As soon as one is hit, the upstream generator is
+closed, which closes the Ollama connection so that the model stops
+generating, and a {"finish_reason": ...} event ends the stream:
+  "stop"    the reply ended naturally or at a stop sequence
+  "length"  the reply was cut at max_output_tokens
+
+A stop sequence may arrive split across tokens ("</" then "answer>"), so
+StopMatcher holds back the end of the text that could be the start of a stop
+sequence until the next token tells whether it is one. The stop sequence
+itself is never sent.
+
+Usage:
+    chunks = limit_stream(stream_from_ollama(...), max_tokens=256, stop=["\\n\\n"])
+"""
+
+import logging
+from typing import AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+
+class StopMatcher:
+    """
+    Finds the first stop sequence in text that arrives in pieces.
+
+    Attributes:
+        stops: The stop sequences (empty strings are ignored).
+    """
+
+    def __init__(self, stops: list[str] | None):
+        self.stops = [s for s in stops or [] if s]
+        self._longest = max(map(len, self.stops), default=0)
+        self._held = ""
+
+    def feed(self, text: str) -> tuple[str, bool]:
+        """
+        Add text and return (safe text, matched).
+
+        The safe text can be sent: it cannot be part of a stop sequence. When a
+        stop sequence is found, the text before it is returned with matched=True
+        and everything after it is dropped.
+        """
+        if not self.stops:
+            return text, False
+        buffer = self._held + text
+        found = [i for i in (buffer.find(s) for s in self.stops) if i >= 0]
+        if found:
+            self._held = ""
+            return buffer[:min(found)], True
+        held = self._partial(buffer)
+        self._held = buffer[len(buffer) - held:] if held else ""
+        return buffer[:len(buffer) - held], False
+
+    def flush(self) -> str:
+        """Return the held-back text once no more text will arrive."""
+        held, self._held = self._held, ""
+        return held
+
+    def _partial(self, buffer: str) -> int:
+        # Length of the longest end of buffer that starts some stop sequence
+        for n in range(min(self._longest - 1, len(buffer)), 0, -1):
+            tail = buffer[-n:]
+            if any(s.startswith(tail) for s in self.stops):
+                return n
+        return 0
+
+
+def options(max_tokens: int | None, stop: list[str] | None) -> dict:
+    """Ollama options for the limits; empty when there are none."""
+    result: dict = {}
+    if max_tokens:
+        result["num_predict"] = max_tokens
+    if stop:
+        result["stop"] = list(stop)
+    return result
+
+
+def truncate(text: str, stop: list[str] | None) -> tuple[str, bool]:
+    """Cut a complete reply at its first stop sequence; return (text, whether one was found)."""
+    matcher = StopMatcher(stop)
+    head, matched = matcher.feed(text)
+    return (head, True) if matched else (head + matcher.flush(), False)
+
+
+async def limit_stream(chunks: AsyncIterator, max_tokens: int | None, stop: list[str] | None):
+    """
+    Forward chunks, ending the stream at max_tokens text chunks or at a stop sequence.
+
+    Each text chunk from Ollama is one token; upstream is closed right after
+    the max_tokens-th, without waiting for Ollama's final event (so the usage
+    of a stream cut this way is not reported). Dict chunks (tool events,
+    usage) are forwarded after any held-back text. The stream always ends
+    with a finish_reason: the one on Ollama's final {"usage": ...} event, or
+    a {"finish_reason": ...} event when the stream had none or was cut here.
+    """
+    matcher = StopMatcher(stop)
+    count = 0
+    finish_reason = None
+    try:
+        async for chunk in chunks:
+            if isinstance(chunk, dict):
+                held = matcher.flush()
+                if held:
+                    yield held
+                finish_reason = chunk.get("finish_reason", finish_reason)
+                yield chunk
+                continue
+            count += 1
+            text, matched = matcher.feed(chunk)
+            if text:
+                yield text
+            if matched:
+                finish_reason = "stop"
+                break
+            if max_tokens and count >= max_tokens:
+                held = matcher.flush()
+                if held:
+                    yield held
+                finish_reason = "length"
+                break
+        else:
+            held = matcher.flush()
+            if held:
+                yield held
+            if finish_reason is None:
+                yield {"finish_reason": "stop"}
+            return
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    logger.info("Stream stopped by output limits (finish_reason=%s)", finish_reason)
+    yield {"finish_reason": finish_reason}
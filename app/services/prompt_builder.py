@@ -5,13 +5,82 @@ Handles the conversion from API-level data structures into message dicts
 for the Ollama /api/chat endpoint.
 """
 
+# Rough characters-per-token ratio used to estimate prompt sizes without a tokenizer
+CHARS_PER_TOKEN = 4
+# Estimated per-message overhead of the chat template (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
 
 def build_messages_from_response(
-    instructions: str | None, input_text: str
+    instructions: str | None,
+    input_text: str,
+    history: list[dict] | None = None,
+    max_tokens: int = 0,
 ) -> list[dict]:
-    """Build a messages list from an optional system instruction and user input."""
+    """
+    Build a messages list from an optional system instruction, prior history and user input.
+
+    New instructions replace any system message carried in the history. When
+    max_tokens is set, the oldest history turns are dropped until the estimated
+    size of the whole list fits (see trim_history).
+    """
     messages = []
     if instructions:
         messages.append({"role": "system", "content": instructions})
-    messages.append({"role": "user", "content": input_text})
+        history = [m for m in history or [] if m["role"] != "system"]
+    else:
+        history = list(history or [])
+        while history and history[0]["role"] == "system":
+            messages.append(history.pop(0))
+    user = {"role": "user", "content": input_text}
+    if max_tokens:
+        history = trim_history(history, max_tokens - estimate_tokens([*messages, user]))
+    messages.extend(history)
+    messages.append(user)
     return messages
+
+
+def build_messages_from_chat(messages: list[dict], max_tokens: int = 0) -> list[dict]:
+    """
+    Build a messages list from a full chat conversation (e.g. /v1/chat/completions).
+
+    Leading system messages and the last message are always kept. When
+    max_tokens is set, the oldest turns in between are dropped until the
+    estimated size of the whole list fits (see trim_history).
+    """
+    messages = list(messages)
+    system = []
+    while len(messages) > 1 and messages[0]["role"] == "system":
+        system.append(messages.pop(0))
+    if max_tokens and len(messages) > 1:
+        last = messages[-1]
+        history = trim_history(messages[:-1], max_tokens - estimate_tokens([*system, last]))
+        messages = [*history, last]
+    return system + messages
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    """Estimate the prompt tokens of a messages list."""
+    return sum(
+        MESSAGE_OVERHEAD_TOKENS + len(m.get("content") or "") // CHARS_PER_TOKEN
+        for m in messages
+    )
+
+
+def trim_history(history: list[dict], budget: int) -> list[dict]:
+    """
+    Return the most recent messages of history that fit in budget estimated tokens.
+
+    The kept part always starts at a user message so that a reply is never
+    sent without the question it answers.
+    """
+    kept = 0
+    start = len(history)
+    for i in range(len(history) - 1, -1, -1):
+        kept += estimate_tokens([history[i]])
+        if kept > budget:
+            break
+        start = i
+    while start < len(history) and history[start]["role"] != "user":
+        start += 1
+    return history[start:]
@@ -0,0 +1,159 @@
+"""
+Model residency: warm-up at startup and keeping pinned models loaded.
+
+Loading a model into memory can take seconds, which the first request for it
+would otherwise pay. At startup every HOT_MODELS and PINNED_MODELS entry is
+loaded on each healthy backend that has it, with an optional warm-up prompt
+from MODEL_WARMUP_PROMPTS.
+
+A background task then polls the backends every RESIDENCY_INTERVAL seconds
+(/api/ps, through the backend pool), records which models were loaded or
+unloaded since the last poll, and reloads pinned models that Ollama evicted.
+Requests themselves send per-model keep_alive values (see
+ollama_client.keep_alive_for), so pinned models are normally never evicted.
+
+Cold starts are counted in core.metrics (llm_cold_starts_total) from the
+load_duration Ollama reports on every request; the loads done here are not
+cold starts.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+import httpx
+
+from core.config import settings
+from services.backend_pool import Backend, BackendPool, pool
+from services.ollama_client import get_client, load_model
+
+logger = logging.getLogger(__name__)
+
+MAX_EVENTS = 100
+
+
+def _has(names: set[str], model: str) -> bool:
+    """Return True if model is in names, matching a bare name to its :latest tag."""
+    return model in names or f"{model}:latest" in names
+
+
+class ResidencyManager:
+    """Warms up hot models and keeps pinned models resident on every backend."""
+
+    def __init__(
+        self,
+        backend_pool: BackendPool,
+        hot_models: list[str],
+        pinned_models: list[str],
+        interval: float,
+    ):
+        self.pool = backend_pool
+        self.hot_models = hot_models
+        self.pinned_models = pinned_models
+        self.interval = interval
+        # Recent {"time", "backend", "model", "event"} entries, oldest first
+        self.events: deque[dict] = deque(maxlen=MAX_EVENTS)
+        self.reloads = 0
+        self._loaded: dict[str, set[str]] = {}
+        self._task: asyncio.Task | None = None
+
+    async def warm_up(self) -> None:
+        """Load every hot and pinned model on each healthy backend that has it."""
+        models = list(dict.fromkeys([*self.hot_models, *self.pinned_models]))
+        if not models:
+            return
+        await self.pool.refresh(get_client())
+        loads = [
+            self._load(backend, model)
+            for backend in self.pool.backends
+            if backend.healthy
+            for model in models
+            if _has(backend.models, model) and not _has(backend.loaded, model)
+        ]
+        if loads:
+            await asyncio.gather(*loads)
+            await self.pool.refresh(get_client())
+        self._track()
+
+    async def check(self) -> None:
+        """Poll the backends, record load/unload events and reload evicted pinned models."""
+        await self.pool.refresh(get_client())
+        self._track()
+        reloads = [
+            self._load(backend, model)
+            for backend in self.pool.backends
+            if backend.healthy
+            for model in self.pinned_models
+            if _has(backend.models, model) and not _has(backend.loaded, model)
+        ]
+        if reloads:
+            self.reloads += len(reloads)
+            await asyncio.gather(*reloads)
+
+    def stats(self) -> dict:
+        """Return the models loaded per backend and the most recent load events."""
+        return {
+            "pinned": self.pinned_models,
+            "loaded": {b.url: sorted(b.loaded) for b in self.pool.backends},
+            "reloads": self.reloads,
+            "events": list(self.events)[-10:],
+        }
+
+    def start(self) -> None:
+        """Start the periodic residency check."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic residency check."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _load(self, backend: Backend, model: str) -> None:
+        start = time.perf_counter()
+        try:
+            await load_model(backend.url, model, settings.MODEL_WARMUP_PROMPTS.get(model))
+        except httpx.HTTPError as e:
+            logger.warning("Could not load %s on %s: %s", model, backend.url, e)
+            return
+        logger.info(
+            "Loaded %s on %s in %.2fs", model, backend.url, time.perf_counter() - start
+        )
+
+    def _track(self) -> None:
+        """Diff each backend's loaded models against the previous poll."""
+        now = time.time()
+        for backend in self.pool.backends:
+            previous = self._loaded.get(backend.url, set())
+            current = set(backend.loaded)
+            for model in sorted(current - previous):
+                self.events.append(
+                    {"time": now, "backend": backend.url, "model": model, "event": "loaded"}
+                )
+            for model in sorted(previous - current):
+                self.events.append(
+                    {"time": now, "backend": backend.url, "model": model, "event": "unloaded"}
+                )
+            self._loaded[backend.url] = current
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.warning("Residency check failed: %s", e)
+
+
+residency = ResidencyManager(
+    pool,
+    hot_models=settings.HOT_MODELS,
+    pinned_models=settings.PINNED_MODELS,
+    interval=settings.RESIDENCY_INTERVAL,
+)
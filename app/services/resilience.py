@@ -0,0 +1,166 @@
+"""
+Retries and hedging for Ollama calls.
+
+connect() opens a call on a backend from the pool and keeps that backend
+reserved until the caller is done with the result:
+
+  - failures that happen before the first token (connection refused or reset,
+    no first token within OLLAMA_FIRST_TOKEN_TIMEOUT, 502/503/504) are retried
+    up to OLLAMA_RETRIES times on another backend when there is one, after a
+    random exponential backoff ("full jitter"). Generating is stateless on
+    Ollama's side, so these calls are safe to repeat. Nothing is retried once
+    tokens have been read.
+  - with OLLAMA_HEDGE_DELAY set and more than one backend, a call that has not
+    answered after that delay is started again on another backend; the first
+    to answer is used and the other is cancelled.
+  - backends whose circuit breaker is open are skipped, and the call fails
+    fast with CircuitOpenError when all of them are (see circuit_breaker.py).
+
+Opening the call, retries and backoff included, is timed as the request's
+"ollama" span (see core/tracing.py): the whole generation for non-streaming
+calls, the time to first token for streams.
+"""
+
+import asyncio
+import logging
+import random
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Awaitable, Callable, TypeVar
+
+import httpx
+
+from core import metrics, tracing
+from core.config import settings
+from services.backend_pool import Backend, pool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# open_fn(backend, stack) -> result; contexts entered on stack stay open until connect() exits
+OpenFn = Callable[[Backend, AsyncExitStack], Awaitable[T]]
+
+RETRYABLE_STATUS = {502, 503, 504}
+
+retries = metrics.Counter("ollama_retries_total", "Ollama calls retried after a pre-token failure.")
+hedges = metrics.Counter("ollama_hedged_requests_total", "Ollama calls duplicated on a second backend.")
+metrics.register_metric(retries)
+metrics.register_metric(hedges)
+metrics.register_gauge(
+    "ollama_circuit_open",
+    "1 while the circuit breaker of a backend is open.",
+    lambda: {(b.url,): int(b.breaker.is_open()) for b in pool.backends},
+    labels=("backend",),
+)
+
+
+class FirstTokenTimeout(httpx.TimeoutException):
+    """Ollama accepted the request but sent nothing within OLLAMA_FIRST_TOKEN_TIMEOUT."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Return True for failures that happen before any token was generated."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(
+        error,
+        (
+            httpx.ConnectError,
+            httpx.ConnectTimeout,
+            httpx.RemoteProtocolError,
+            httpx.ReadError,
+            httpx.WriteError,
+            FirstTokenTimeout,
+        ),
+    )
+
+
+def backoff(attempt: int) -> float:
+    """Seconds to wait before retry number attempt (0-based), with full jitter."""
+    ceiling = min(settings.OLLAMA_RETRY_BACKOFF_MAX, settings.OLLAMA_RETRY_BACKOFF * 2**attempt)
+    return random.uniform(0, ceiling)
+
+
+@asynccontextmanager
+async def connect(model: str, open_fn: OpenFn, hedge: bool = True):
+    """
+    Yield open_fn's result from a backend, with retries and optional hedging.
+
+    Args:
+        model: Model of the call, for routing and metrics.
+        open_fn: Coroutine function (backend, stack) that sends the request and
+                 returns once the first token (or the whole body) has arrived.
+                 Anything it enters on stack is closed when connect() exits.
+        hedge: Allow a hedged second request (OLLAMA_HEDGE_DELAY must also be set).
+
+    Raises:
+        CircuitOpenError: If the breaker of every backend is open.
+        httpx.HTTPError: The last failure, once retries are exhausted.
+    """
+    tried: list[Backend] = []
+    attempt = 0
+    with tracing.span("ollama"):
+        while True:
+            try:
+                stack, result = await _first(model, open_fn, tried, hedge)
+                break
+            except Exception as e:
+                if attempt >= settings.OLLAMA_RETRIES or not is_retryable(e):
+                    raise
+                delay = backoff(attempt)
+                attempt += 1
+                retries.inc(model)
+                logger.warning(
+                    "Ollama call for %s failed (%s), retry %d in %.2fs",
+                    model, type(e).__name__, attempt, delay,
+                )
+                await asyncio.sleep(delay)
+    async with stack:
+        yield result
+
+
+async def _open(model: str, open_fn: OpenFn[T], tried: list[Backend]) -> tuple[AsyncExitStack, T]:
+    """Run open_fn on a backend not tried yet, closing everything it opened if it fails."""
+    stack = AsyncExitStack()
+    try:
+        backend = await stack.enter_async_context(pool.acquire(model, exclude=tried))
+        tried.append(backend)
+        return stack, await open_fn(backend, stack)
+    except BaseException as e:
+        await stack.__aexit__(type(e), e, e.__traceback__)
+        raise
+
+
+async def _first(model: str, open_fn: OpenFn, tried: list[Backend], hedge: bool):
+    """Open the call, starting a hedged duplicate if the first is slow."""
+    delay = settings.OLLAMA_HEDGE_DELAY
+    if not hedge or delay <= 0 or len(pool.backends) < 2:
+        return await _open(model, open_fn, tried)
+
+    pending = {asyncio.ensure_future(_open(model, open_fn, tried))}
+    done, pending = await asyncio.wait(pending, timeout=delay)
+    if done:
+        return done.pop().result()
+
+    hedges.inc(model)
+    logger.info("Hedging slow Ollama call for %s", model)
+    pending.add(asyncio.ensure_future(_open(model, open_fn, tried)))
+    winner = None
+    errors: list[BaseException] = []
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is not None:
+                    errors.append(error)
+                elif winner is None:
+                    winner = task.result()
+                else:
+                    await task.result()[0].aclose()
+    finally:
+        for task in pending:
+            task.cancel()
+    if winner is None:
+        raise errors[-1]
+    return winner
@@ -0,0 +1,161 @@
+"""
+In-process exact-match cache for LLM responses.
+
+Deterministic requests (temperature at or below RESPONSE_CACHE_MAX_TEMPERATURE)
+with the same model, messages, temperature and tool schemas always produce the
+same reply, so LLMEngine stores the generated text here and serves repeats
+without calling Ollama again.
+
+Entries are evicted least-recently-used first when either the entry count or the
+total byte size goes over its bound, and expire after RESPONSE_CACHE_TTL seconds.
+
+With RESPONSE_CACHE_DISK_PATH set, the cache is backed by a store on disk
+shared by every worker of the host (see disk_cache.py): replies are written
+to both, and a memory miss is looked up on disk and kept in memory when found.
+The disk is only touched from worker threads: lookups await their thread,
+and writes run in the background.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from core.config import settings
+from services.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(
+    model: str,
+    messages: list[dict],
+    temperature: float,
+    tools: list[dict] | str | None = None,
+    options: dict | None = None,
+) -> str:
+    """
+    Return a canonical SHA-256 hash of everything that determines a generation.
+
+    tools is the list of tool schemas, or the fingerprint of a tool_registry.ToolSet.
+    options are the extra Ollama options (output limits), left out when empty.
+    """
+    fields = {"model": model, "messages": messages, "temperature": temperature, "tools": tools or []}
+    if options:
+        fields["options"] = options
+    canonical = json.dumps(
+        fields,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(temperature: float) -> bool:
+    """Only deterministic generations are cached by default."""
+    return settings.RESPONSE_CACHE_ENABLED and temperature <= settings.RESPONSE_CACHE_MAX_TEMPERATURE
+
+
+class ResponseCache:
+    """
+    LRU cache of generated texts bounded by entry count, total bytes and TTL.
+
+    Attributes:
+        max_entries: Maximum number of stored responses.
+        max_bytes: Maximum total size of stored texts (UTF-8 encoded).
+        ttl: Seconds after which an entry is considered stale.
+        store: Optional shared store behind the memory cache.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float, store: DiskCache | None = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.store = store
+        # key -> (expires_at, size, content)
+        self._entries: OrderedDict[str, tuple[float, int, str]] = OrderedDict()
+        self._bytes = 0
+        self._writes: set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> str | None:
+        """Return the cached text for key, or None on a miss or expired entry."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            content = await asyncio.to_thread(self.store.get, key) if self.store is not None else None
+            if content is None:
+                self.misses += 1
+                return None
+            self._put(key, content)
+            self.hits += 1
+            return content
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def set(self, key: str, content: str) -> None:
+        """Store content under key, evicting the oldest entries if needed; the disk write runs in the background."""
+        self._put(key, content)
+        if self.store is not None:
+            task = asyncio.get_running_loop().create_task(asyncio.to_thread(self.store.set, key, content))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    async def drain(self) -> None:
+        """Wait for the disk writes still running (before closing the store, and in tests)."""
+        await asyncio.gather(*self._writes)
+
+    def _put(self, key: str, content: str) -> None:
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, content)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def clear(self) -> None:
+        """Drop every entry (on disk too) and reset the counters."""
+        self._entries.clear()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current occupancy (and the disk store's, if any)."""
+        stats: dict = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+        if self.store is not None:
+            stats["disk"] = self.store.stats()
+        return stats
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    store=DiskCache(
+        path=settings.RESPONSE_CACHE_DISK_PATH,
+        max_bytes=settings.RESPONSE_CACHE_DISK_MAX_BYTES,
+        ttl=settings.RESPONSE_CACHE_DISK_TTL,
+    ) if settings.RESPONSE_CACHE_DISK_PATH else None,
+)
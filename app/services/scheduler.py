@@ -0,0 +1,236 @@
+"""
+Admission control in front of LLMEngine.
+
+Every generation needs a slot for its model before it reaches Ollama. Each model
+has at most SCHEDULER_MAX_CONCURRENCY generations running (overridable per model
+with SCHEDULER_MODEL_CONCURRENCY); further requests wait in a bounded queue.
+
+When a slot frees up, the next waiter is chosen by:
+  1. highest request priority
+  2. fewest generations already running for the same API key (fair share)
+  3. arrival order
+
+Requests are rejected immediately with QueueFullError when the queue is full,
+and with QueueTimeoutError when they waited longer than SCHEDULER_QUEUE_TIMEOUT.
+Both carry a retry_after hint (seconds) derived from recent generation times.
+"""
+
+import asyncio
+import itertools
+import logging
+import math
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from core import metrics
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerRejection(Exception):
+    """Base class for requests refused by the scheduler."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(SchedulerRejection):
+    """The model's wait queue is full (maps to HTTP 429)."""
+
+
+class QueueTimeoutError(SchedulerRejection):
+    """The request waited longer than the queue timeout (maps to HTTP 503)."""
+
+
+@dataclass
+class Ticket:
+    """A granted generation slot. Pass it back to Scheduler.release()."""
+
+    model: str
+    api_key: str | None
+    started: float = field(default_factory=time.monotonic)
+    released: bool = False
+
+
+@dataclass
+class _Waiter:
+    priority: int
+    api_key: str | None
+    seq: int
+    future: asyncio.Future
+
+
+@dataclass
+class _ModelQueue:
+    limit: int
+    running: int = 0
+    running_by_key: Counter = field(default_factory=Counter)
+    waiters: list[_Waiter] = field(default_factory=list)
+    avg_service_time: float = 1.0
+    waited: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    rejected: int = 0
+    timed_out: int = 0
+
+
+class Scheduler:
+    """Per-model concurrency limits with a fair, priority-aware wait queue."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        model_concurrency: dict[str, int] | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.model_concurrency = model_concurrency or {}
+        self._queues: dict[str, _ModelQueue] = {}
+        self._seq = itertools.count()
+
+    async def acquire(self, model: str, api_key: str | None = None, priority: int = 0) -> Ticket:
+        """
+        Wait for a generation slot on model.
+
+        Raises:
+            QueueFullError: If the wait queue for model is already full.
+            QueueTimeoutError: If no slot freed up within queue_timeout.
+        """
+        queue = self._queue(model)
+        if queue.running < queue.limit and not queue.waiters:
+            self._grant(queue, api_key)
+            self._record_wait(model, queue, 0.0)
+            return Ticket(model=model, api_key=api_key)
+
+        if len(queue.waiters) >= self.max_queue:
+            queue.rejected += 1
+            logger.warning("Rejecting request for model=%s: queue full", model)
+            raise QueueFullError(f"Queue for model '{model}' is full", self._retry_after(queue))
+
+        waiter = _Waiter(
+            priority=priority,
+            api_key=api_key,
+            seq=next(self._seq),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        queue.waiters.append(waiter)
+        enqueued = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except BaseException as e:
+            if waiter in queue.waiters:
+                queue.waiters.remove(waiter)
+                waiter.future.cancel()
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # A slot was granted just as we gave up: hand it on.
+                self._release_slot(queue, api_key)
+            if isinstance(e, asyncio.TimeoutError):
+                queue.timed_out += 1
+                logger.warning("Request for model=%s timed out in queue", model)
+                raise QueueTimeoutError(
+                    f"Timed out waiting for a slot on model '{model}'", self._retry_after(queue)
+                ) from None
+            raise
+        self._record_wait(model, queue, time.monotonic() - enqueued)
+        return Ticket(model=model, api_key=api_key)
+
+    def release(self, ticket: Ticket) -> None:
+        """Give back a slot and wake the next waiter, if any. Releasing a ticket twice is a no-op."""
+        if ticket.released:
+            return
+        ticket.released = True
+        queue = self._queue(ticket.model)
+        elapsed = time.monotonic() - ticket.started
+        queue.avg_service_time = 0.8 * queue.avg_service_time + 0.2 * elapsed
+        self._release_slot(queue, ticket.api_key)
+
+    @asynccontextmanager
+    async def slot(self, model: str, api_key: str | None = None, priority: int = 0):
+        """Hold a generation slot for the duration of the block."""
+        ticket = await self.acquire(model, api_key, priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        """Return queue depth, running count and wait times per model."""
+        return {
+            model: {
+                "running": q.running,
+                "limit": q.limit,
+                "queued": len(q.waiters),
+                "waited": q.waited,
+                "avg_wait_seconds": round(q.total_wait / q.waited, 4) if q.waited else 0.0,
+                "max_wait_seconds": round(q.max_wait, 4),
+                "rejected": q.rejected,
+                "timed_out": q.timed_out,
+            }
+            for model, q in self._queues.items()
+        }
+
+    def _queue(self, model: str) -> _ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            limit = self.model_concurrency.get(model, self.max_concurrency)
+            queue = self._queues[model] = _ModelQueue(limit=limit)
+        return queue
+
+    def _grant(self, queue: _ModelQueue, api_key: str | None) -> None:
+        queue.running += 1
+        queue.running_by_key[api_key] += 1
+
+    def _release_slot(self, queue: _ModelQueue, api_key: str | None) -> None:
+        queue.running -= 1
+        queue.running_by_key[api_key] -= 1
+        if queue.running_by_key[api_key] <= 0:
+            del queue.running_by_key[api_key]
+        self._wake_next(queue)
+
+    def _wake_next(self, queue: _ModelQueue) -> None:
+        while queue.waiters and queue.running < queue.limit:
+            waiter = min(
+                queue.waiters,
+                key=lambda w: (-w.priority, queue.running_by_key[w.api_key], w.seq),
+            )
+            queue.waiters.remove(waiter)
+            if waiter.future.done():
+                continue
+            self._grant(queue, waiter.api_key)
+            waiter.future.set_result(None)
+
+    def _record_wait(self, model: str, queue: _ModelQueue, wait: float) -> None:
+        metrics.queue_wait.observe(wait, model)
+        queue.waited += 1
+        queue.total_wait += wait
+        queue.max_wait = max(queue.max_wait, wait)
+
+    def _retry_after(self, queue: _ModelQueue) -> int:
+        backlog = (len(queue.waiters) + 1) / max(queue.limit, 1)
+        return max(1, math.ceil(backlog * queue.avg_service_time))
+
+
+scheduler = Scheduler(
+    max_concurrency=settings.SCHEDULER_MAX_CONCURRENCY,
+    max_queue=settings.SCHEDULER_MAX_QUEUE,
+    queue_timeout=settings.SCHEDULER_QUEUE_TIMEOUT,
+    model_concurrency=settings.SCHEDULER_MODEL_CONCURRENCY,
+)
+
+metrics.register_gauge(
+    "llm_queue_depth",
+    "Requests waiting for a generation slot.",
+    lambda: {(model,): stats["queued"] for model, stats in scheduler.stats().items()},
+)
+metrics.register_gauge(
+    "llm_running_generations",
+    "Generations currently holding a slot.",
+    lambda: {(model,): stats["running"] for model, stats in scheduler.stats().items()},
+)
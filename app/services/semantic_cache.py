@@ -0,0 +1,181 @@
+"""
+Semantic response cache: serves replies to paraphrases of earlier inputs.
+
+The exact-match cache (response_cache.py) misses "How do I reset my password?"
+after "how can I reset my password". When SEMANTIC_CACHE_ENABLED is set,
+LLMEngine also embeds the normalized input with SEMANTIC_CACHE_EMBED_MODEL
+(through the shared embedding batcher, see embedding_batcher.py) and looks for
+the most similar stored input. A match whose cosine similarity is at least
+SEMANTIC_CACHE_THRESHOLD returns the stored reply.
+
+Matches are scoped: only inputs sent to the same model, with the same system
+instructions and tool setting, can match. Only single-turn requests (optional
+system message + one user message) that the exact cache would accept are
+considered.
+
+Embeddings are kept L2-normalized in one NumPy matrix, so a lookup is a single
+matrix-vector product. The index holds SEMANTIC_CACHE_MAX_ENTRIES rows; when it
+is full the least recently used row is overwritten. Rows expire after
+SEMANTIC_CACHE_TTL seconds. Similarity scores are logged at DEBUG level.
+"""
+
+import hashlib
+import logging
+import re
+import time
+from dataclasses import dataclass
+
+import httpx
+import numpy as np
+
+from core.config import settings
+from services import response_cache
+from services.circuit_breaker import CircuitOpenError
+from services.embedding_batcher import embed
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, collapse whitespace and strip surrounding punctuation."""
+    return _WHITESPACE.sub(" ", text.lower()).strip(" .!?;:,")
+
+
+@dataclass
+class Query:
+    """
+    One lookup: the scope it may match in, the normalized text and its unit embedding.
+
+    The scope is a 63-bit hash of model, tool setting and system instructions.
+    """
+
+    scope: int
+    text: str
+    vector: np.ndarray
+
+
+@dataclass
+class Match:
+    """A stored reply whose input was similar enough to a query."""
+
+    content: str
+    score: float
+    text: str
+
+
+class SemanticIndex:
+    """
+    Fixed-capacity matrix of unit embeddings with LRU replacement.
+
+    Attributes:
+        capacity: Maximum number of stored inputs.
+        ttl: Seconds after which a row no longer matches.
+    """
+
+    def __init__(self, capacity: int, ttl: float):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._vectors: np.ndarray | None = None  # capacity x dim, allocated on first add
+        self._scopes = np.full(capacity, -1, dtype=np.int64)  # scope per row, -1 marks a free row
+        self._expires = np.zeros(capacity)
+        self._last_used = np.zeros(capacity)
+        self._contents: list[str] = [""] * capacity
+        self._texts: list[str] = [""] * capacity
+        self.hits = 0
+        self.misses = 0
+
+    def search(self, query: Query, threshold: float) -> Match | None:
+        """Return the most similar live row in query's scope if it reaches threshold."""
+        if self._vectors is None or query.vector.shape[0] != self._vectors.shape[1]:
+            self.misses += 1
+            return None
+        now = time.monotonic()
+        scores = self._vectors @ query.vector
+        scores[(self._scopes != query.scope) | (self._expires < now)] = -np.inf
+        row = int(np.argmax(scores))
+        score = float(scores[row])
+        if score == -np.inf:
+            self.misses += 1
+            return None
+        logger.debug(
+            "Semantic cache best match %.4f for %r: %r (threshold %.2f)",
+            score, query.text, self._texts[row], threshold,
+        )
+        if score < threshold:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._last_used[row] = now
+        return Match(content=self._contents[row], score=score, text=self._texts[row])
+
+    def add(self, query: Query, content: str) -> None:
+        """Store content for query, replacing a free, expired or least recently used row."""
+        dim = query.vector.shape[0]
+        if self._vectors is None or self._vectors.shape[1] != dim:
+            # First row, or the embedding model changed: start over
+            self._vectors = np.zeros((self.capacity, dim), dtype=np.float32)
+            self._scopes[:] = -1
+        now = time.monotonic()
+        free = np.flatnonzero((self._scopes == -1) | (self._expires < now))
+        row = int(free[0]) if free.size else int(np.argmin(self._last_used))
+        self._vectors[row] = query.vector
+        self._scopes[row] = query.scope
+        self._expires[row] = now + self.ttl
+        self._last_used[row] = now
+        self._contents[row] = content
+        self._texts[row] = query.text
+
+    def clear(self) -> None:
+        """Drop every row and reset the counters."""
+        self._vectors = None
+        self._scopes[:] = -1
+        self._expires[:] = 0
+        self._last_used[:] = 0
+        self._contents = [""] * self.capacity
+        self._texts = [""] * self.capacity
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of stored rows."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": int(np.count_nonzero(self._scopes != -1)),
+        }
+
+
+def is_applicable(messages: list[dict], temperature: float) -> bool:
+    """Only single-turn requests the exact-match cache would accept are looked up."""
+    if not settings.SEMANTIC_CACHE_ENABLED or not response_cache.is_cacheable(temperature):
+        return False
+    roles = [m["role"] for m in messages]
+    return roles in (["user"], ["system", "user"])
+
+
+async def prepare(model: str, messages: list[dict], tools: str | None) -> Query | None:
+    """
+    Embed the request's input. Returns None if embedding fails, so that the
+    request simply goes to the model.
+
+    tools is the fingerprint of the tool_registry.ToolSet offered, or None.
+    """
+    system = messages[0]["content"] if messages[0]["role"] == "system" else ""
+    digest = hashlib.sha256(f"{model}\0{tools or ''}\0{system}".encode("utf-8")).digest()
+    scope = int.from_bytes(digest[:8]) >> 1
+    text = normalize(messages[-1]["content"])
+    try:
+        [embedding] = await embed(settings.SEMANTIC_CACHE_EMBED_MODEL, [text])
+    except (httpx.HTTPError, CircuitOpenError, KeyError, ValueError) as e:
+        logger.warning("Semantic cache embedding failed: %s", e)
+        return None
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    if norm == 0:
+        return None
+    return Query(scope=scope, text=text, vector=vector / norm)
+
+
+index = SemanticIndex(capacity=settings.SEMANTIC_CACHE_MAX_ENTRIES, ttl=settings.SEMANTIC_CACHE_TTL)
@@ -0,0 +1,121 @@
+"""
+In-process store of conversation histories, keyed by response id.
+
+Every generated Response has an id. Its conversation (the messages sent to
+Ollama plus the assistant's reply) is stored here, so that the next turn only
+has to send `previous_response_id` and the new input instead of the whole
+history.
+
+Histories are kept as tuples of compact (role, content) records. A new turn
+reuses its parent's content strings, so the text of a conversation is shared
+between all of its responses rather than copied. Only the text a turn adds is
+charged against SESSION_MAX_BYTES, plus a small per-message overhead.
+
+Entries are evicted least-recently-used first when either the entry count or the
+byte bound is exceeded, and expire SESSION_TTL seconds after their last use.
+"""
+
+import time
+from collections import OrderedDict
+
+from core.config import settings
+
+# One stored message: (role, content)
+Record = tuple[str, str]
+
+# Approximate size of one record besides its content
+_RECORD_OVERHEAD = 16
+
+
+def to_records(messages: list[dict]) -> tuple[Record, ...]:
+    """Convert Ollama message dicts into compact records."""
+    return tuple((m["role"], m.get("content") or "") for m in messages)
+
+
+def to_messages(records: tuple[Record, ...]) -> list[dict]:
+    """Convert records back into message dicts for Ollama."""
+    return [{"role": role, "content": content} for role, content in records]
+
+
+class SessionStore:
+    """
+    LRU store of conversation histories bounded by entry count, total bytes and TTL.
+
+    Attributes:
+        max_entries: Maximum number of stored responses.
+        max_bytes: Maximum total size charged for the stored histories.
+        ttl: Seconds after its last use at which an entry expires.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # response id -> (expires_at, size, history)
+        self._entries: OrderedDict[str, tuple[float, int, tuple[Record, ...]]] = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    def get(self, response_id: str) -> tuple[Record, ...] | None:
+        """Return the history ending with response_id, or None if unknown or expired."""
+        entry = self._entries.get(response_id)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if entry[0] < now:
+            self._remove(response_id)
+            return None
+        self._entries[response_id] = (now + self.ttl, entry[1], entry[2])
+        self._entries.move_to_end(response_id)
+        return entry[2]
+
+    def add(
+        self,
+        response_id: str,
+        history: tuple[Record, ...],
+        parent: tuple[Record, ...] = (),
+    ) -> None:
+        """
+        Store history under response_id.
+
+        Args:
+            response_id: Id of the response that produced the last record.
+            history: The full conversation, including the assistant's reply.
+            parent: The previous turn's history. Content strings that history
+                    shares with it are not charged again.
+        """
+        shared = {id(content) for _, content in parent}
+        size = sum(
+            _RECORD_OVERHEAD + (0 if id(content) in shared else len(content.encode("utf-8")))
+            for _, content in history
+        )
+        if size > self.max_bytes:
+            return
+        if response_id in self._entries:
+            self._remove(response_id)
+        self._entries[response_id] = (time.monotonic() + self.ttl, size, history)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        self._entries.clear()
+        self._bytes = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        """Return current occupancy and the number of evictions."""
+        return {"entries": len(self._entries), "bytes": self._bytes, "evictions": self.evictions}
+
+    def _remove(self, response_id: str) -> None:
+        _, size, _ = self._entries.pop(response_id)
+        self._bytes -= size
+
+
+sessions = SessionStore(
+    max_entries=settings.SESSION_MAX_ENTRIES,
+    max_bytes=settings.SESSION_MAX_BYTES,
+    ttl=settings.SESSION_TTL,
+)
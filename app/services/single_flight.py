@@ -0,0 +1,130 @@
+"""
+Single-flight coalescing of identical in-flight generations.
+
+When several identical requests arrive before the first one has finished,
+only one Ollama generation is started and every caller attaches to it:
+
+  run()     → non-streaming callers await the same shared result
+  stream()  → streaming callers subscribe to the same token stream and get
+              the tokens produced so far replayed before the live ones
+
+A shared generation is cancelled once every caller attached to it has gone
+away (e.g. all clients disconnected), so Ollama stops generating for nobody.
+
+Requests are identified by the same canonical key as the response cache
+(see response_cache.make_key). Coalescing is opt-in and limited to requests at
+or below COALESCE_MAX_TEMPERATURE, because sampled requests are expected to
+return different answers.
+"""
+
+import asyncio
+import logging
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# key -> shared task for non-streaming generations
+_calls: dict[str, asyncio.Task] = {}
+# key -> number of callers awaiting the shared task
+_waiters: dict[str, int] = {}
+# key -> shared token stream for streaming generations
+_streams: dict[str, "_SharedStream"] = {}
+
+
+def is_coalescable(temperature: float) -> bool:
+    """Return True if identical requests at this temperature may share one generation."""
+    return settings.COALESCE_ENABLED and temperature <= settings.COALESCE_MAX_TEMPERATURE
+
+
+async def run(key: str, factory: Callable[[], Awaitable]):
+    """
+    Await the result of factory(), sharing it with identical concurrent calls.
+
+    The shared task is shielded so that one caller going away does not cancel
+    the generation for the others; it is cancelled when the last one goes away.
+    """
+    task = _calls.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _calls[key] = task
+        task.add_done_callback(lambda _: _calls.pop(key, None))
+    else:
+        logger.info("Attached to in-flight generation")
+    _waiters[key] = _waiters.get(key, 0) + 1
+    try:
+        return await asyncio.shield(task)
+    finally:
+        _waiters[key] -= 1
+        if not _waiters[key]:
+            del _waiters[key]
+            if not task.done():
+                logger.info("Every caller left, cancelling shared generation")
+                task.cancel()
+
+
+def stream(
+    key: str, factory: Callable[[], AsyncIterator[str | dict]]
+) -> AsyncGenerator[str | dict, None]:
+    """Return a subscription to the shared token stream for key, starting it if needed."""
+    shared = _streams.get(key)
+    if shared is None:
+        shared = _SharedStream(factory())
+        _streams[key] = shared
+        shared.task.add_done_callback(lambda _: _streams.pop(key, None))
+    else:
+        logger.info("Attached to in-flight stream")
+    return shared.subscribe()
+
+
+class _SharedStream:
+    """Reads an upstream chunk iterator once and fans it out to any number of subscribers."""
+
+    def __init__(self, source: AsyncIterator[str | dict]):
+        self.chunks: list[str | dict] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self._changed = asyncio.Condition()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[str | dict]) -> None:
+        try:
+            async for chunk in source:
+                async with self._changed:
+                    self.chunks.append(chunk)
+                    self._changed.notify_all()
+        except BaseException as e:
+            self.error = e
+        finally:
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncGenerator[str | dict, None]:
+        """
+        Yield every chunk from the beginning, then follow the live stream.
+
+        The upstream is cancelled when the last subscriber leaves before the end.
+        """
+        index = 0
+        self.subscribers += 1
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: index < len(self.chunks) or self.done)
+                    pending = self.chunks[index:]
+                    finished = self.done
+                for chunk in pending:
+                    yield chunk
+                index += len(pending)
+                if finished and index >= len(self.chunks):
+                    if self.error is not None:
+                        raise self.error
+                    return
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and not self.task.done():
+                logger.info("Every subscriber left, cancelling shared stream")
+                self.task.cancel()
@@ -2,8 +2,19 @@
 Tool registry for function calling.
 
 Tools are registered with an OpenAI-compatible JSON schema and a Python handler.
-The LLMEngine passes all registered schemas to Ollama and routes tool_call
-responses back to the appropriate handler.
+The LLMEngine passes the registered schemas (all of them, or the subset a
+request names) to Ollama and routes tool_call responses back to the
+appropriate handler.
+
+Schemas are copied and serialized once, at registration: select() returns a
+frozen ToolSet whose schemas and fingerprint are reused by every request that
+asks for the same tools. Arguments are checked against the tool's
+"parameters" schema by a validator compiled at registration (see
+tool_validation.py); invalid calls never reach the handler and get back a
+structured error the model can correct:
+
+    {"error": "invalid_arguments", "tool": "get_weather",
+     "details": [{"path": "city", "message": "is required"}]}
 
 Usage:
     from services import tool_registry
@@ -25,51 +36,329 @@ Usage:
         },
         handler=lambda city: f"Weather in {city}: 22°C, sunny.",
     )
+
+Handlers can be plain functions (run in a worker thread so they never block
+the event loop), async functions (awaited directly), or CPU-bound functions
+registered with cpu_bound=True (run in a process pool; they must be picklable,
+i.e. defined at module level). Every call is bounded by a timeout.
+
+Tools registered with cacheable=True have their results memoized per
+(name, canonical arguments) in a bounded LRU cache with a TTL, and identical
+calls running at the same time share a single execution. Per-tool hit/miss
+counts and execution times are available from stats().
+
+Tool plugins are modules that register their tools when imported. They are
+listed in TOOL_PLUGINS or published by installed packages as entry points of
+the "local_responses_api.tools" group (a module, or a function called without
+arguments), and are only imported the first time tools are needed, so that
+startup does not pay for their dependencies.
 """
 
+import asyncio
+import functools
+import hashlib
+import importlib
+import inspect
 import json
 import logging
-from typing import Callable
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from typing import Callable, Collection, Iterable
+
+from core.config import settings
+from services.response_cache import ResponseCache
+from services.tool_validation import compile_validator
 
 logger = logging.getLogger(__name__)
 
-# name -> {"schema": dict, "handler": Callable}
+# name -> {"schema": dict, "json": str, "validate": Callable, "handler": Callable,
+#          "timeout": float | None, "cpu_bound": bool, "cache": ResponseCache | None,
+#          "inflight": dict, "stats": dict}
 _registry: dict[str, dict] = {}
 
 
-def register(schema: dict, handler: Callable) -> None:
-    """Register a tool with its schema and Python handler."""
+@dataclass(frozen=True)
+class ToolSet:
+    """
+    The tools offered to the model for one request.
+
+    Attributes:
+        names: Names of the tools in the set.
+        schemas: Their schemas, in registration order (shared: never modify them).
+        fingerprint: SHA-256 of the schemas, for cache keys.
+    """
+
+    names: frozenset[str]
+    schemas: tuple[dict, ...]
+    fingerprint: str
+
+
+# Tool sets already built, keyed by the sorted names requested (None for all tools)
+_selections: dict[tuple[str, ...] | None, ToolSet] = {}
+_MAX_SELECTIONS = 256
+
+_process_pool: ProcessPoolExecutor | None = None
+
+PLUGIN_GROUP = "local_responses_api.tools"
+_plugins_loaded = False
+
+
+def register(
+    schema: dict,
+    handler: Callable,
+    timeout: float | None = None,
+    cpu_bound: bool = False,
+    cacheable: bool = False,
+    cache_ttl: float | None = None,
+    cache_max_entries: int | None = None,
+) -> None:
+    """
+    Register a tool with its schema and Python handler.
+
+    Args:
+        schema: OpenAI-compatible tool schema.
+        handler: Function called with the model's arguments as keyword arguments.
+        timeout: Seconds before the call is abandoned. Defaults to TOOL_TIMEOUT.
+        cpu_bound: Run the handler in the process pool instead of a thread.
+        cacheable: Memoize results per arguments (for pure or slowly changing tools).
+        cache_ttl: Seconds a memoized result stays valid. Defaults to TOOL_CACHE_TTL.
+        cache_max_entries: Results kept for this tool. Defaults to TOOL_CACHE_MAX_ENTRIES.
+    """
+    # A private copy, so that later changes to the caller's dict are not seen
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    schema = json.loads(canonical)
     name = schema["function"]["name"]
-    _registry[name] = {"schema": schema, "handler": handler}
+    cache = None
+    if cacheable:
+        cache = ResponseCache(
+            max_entries=cache_max_entries or settings.TOOL_CACHE_MAX_ENTRIES,
+            max_bytes=settings.TOOL_CACHE_MAX_BYTES,
+            ttl=cache_ttl or settings.TOOL_CACHE_TTL,
+        )
+    _registry[name] = {
+        "schema": schema,
+        "json": canonical,
+        "validate": compile_validator(schema["function"].get("parameters") or {}),
+        "handler": handler,
+        "timeout": timeout,
+        "cpu_bound": cpu_bound,
+        "cache": cache,
+        "inflight": {},
+        "stats": {"calls": 0, "errors": 0, "invalid": 0, "coalesced": 0, "total_seconds": 0.0},
+    }
+    _selections.clear()
     logger.info("Registered tool: %s", name)
 
 
-def get_schemas() -> list[dict]:
-    """Return all registered tool schemas (passed to Ollama as the tools param)."""
-    return [v["schema"] for v in _registry.values()]
+def select(names: Iterable[str] | None = None) -> ToolSet:
+    """
+    Return the ToolSet of the named tools, or of every registered tool.
+
+    Raises:
+        ValueError: If a name is not a registered tool (see unknown()).
+    """
+    load_plugins()
+    key = None if names is None else tuple(sorted(set(names)))
+    toolset = _selections.get(key)
+    if toolset is None:
+        if key is not None and unknown(key):
+            raise ValueError(f"Unknown tools: {', '.join(unknown(key))}")
+        tools = [(n, t) for n, t in _registry.items() if key is None or n in key]
+        digest = hashlib.sha256("\n".join(t["json"] for _, t in tools).encode("utf-8")).hexdigest()
+        toolset = ToolSet(
+            names=frozenset(n for n, _ in tools),
+            schemas=tuple(t["schema"] for _, t in tools),
+            fingerprint=digest,
+        )
+        if len(_selections) >= _MAX_SELECTIONS:
+            _selections.clear()
+        _selections[key] = toolset
+    return toolset
 
 
-def execute(name: str, arguments: dict | str) -> str:
+def unknown(names: Iterable[str]) -> list[str]:
+    """Return the names that are not registered tools."""
+    load_plugins()
+    return [n for n in names if n not in _registry]
+
+
+def get_schemas(names: Iterable[str] | None = None) -> tuple[dict, ...]:
+    """Return the schemas of the named tools, or all of them (passed to Ollama as the tools param)."""
+    return select(names).schemas
+
+
+def load_plugins() -> None:
+    """
+    Import the TOOL_PLUGINS modules and the entry points of PLUGIN_GROUP, once.
+
+    A plugin that fails to load is logged and skipped so that the other tools
+    stay available.
+    """
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for name in settings.TOOL_PLUGINS:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.error("Could not load tool plugin '%s': %s", name, e)
+    for entry_point in entry_points(group=PLUGIN_GROUP):
+        try:
+            plugin = entry_point.load()
+            if callable(plugin):
+                plugin()
+        except Exception as e:
+            logger.error("Could not load tool plugin '%s': %s", entry_point.name, e)
+
+
+async def execute(name: str, arguments: dict | str, allowed: Collection[str] | None = None) -> str:
     """
     Execute a registered tool by name and return its result as a string.
 
+    Arguments are validated against the tool's schema first. Results of
+    cacheable tools are served from their cache when possible.
+
     Args:
         name: The tool name from the model's tool_call.
         arguments: The arguments dict (or JSON string) from the model.
+        allowed: Names of the tools offered to the model, if not all of them.
 
     Returns:
-        str: The tool result, or an error message if execution fails.
+        str: The tool result, a structured invalid_arguments error (JSON), or an
+             error message if the tool is unknown, fails or times out.
     """
-    if name not in _registry:
+    load_plugins()
+    if name not in _registry or (allowed is not None and name not in allowed):
         return f"Error: unknown tool '{name}'"
 
-    if isinstance(arguments, str):
-        arguments = json.loads(arguments)
+    tool = _registry[name]
+    try:
+        if isinstance(arguments, str):
+            arguments = json.loads(arguments)
+    except json.JSONDecodeError as e:
+        return _invalid(name, tool, [{"path": "(arguments)", "message": f"invalid JSON: {e}"}])
+    if not isinstance(arguments, dict):
+        return _invalid(name, tool, [{"path": "(arguments)", "message": "expected object"}])
+    errors = tool["validate"](arguments)
+    if errors:
+        return _invalid(name, tool, errors)
+
+    cache = tool["cache"]
+    if cache is None:
+        result, _ = await _run(name, tool, arguments)
+        return result
+
+    key = json.dumps(arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    cached = await cache.get(key)
+    if cached is not None:
+        logger.info("Tool '%s' served from cache", name)
+        return cached
+
+    task = tool["inflight"].get(key)
+    if task is None:
+        task = asyncio.ensure_future(_run_and_store(name, tool, arguments, key))
+        tool["inflight"][key] = task
+        task.add_done_callback(lambda _: tool["inflight"].pop(key, None))
+    else:
+        tool["stats"]["coalesced"] += 1
+    return await asyncio.shield(task)
+
 
+async def execute_many(tool_calls: list[dict], allowed: Collection[str] | None = None) -> list[str]:
+    """
+    Execute the tool calls of one model turn concurrently.
+
+    Args:
+        tool_calls: The "tool_calls" list from an assistant message.
+        allowed: Names of the tools offered to the model, if not all of them.
+
+    Returns:
+        list[str]: One result per call, in the same order as tool_calls.
+    """
+    return await asyncio.gather(
+        *(execute(c["function"]["name"], c["function"]["arguments"], allowed) for c in tool_calls)
+    )
+
+
+def stats() -> dict:
+    """Return per-tool call counts, cache hits/misses and execution times."""
+    result = {}
+    for name, tool in _registry.items():
+        calls = tool["stats"]["calls"]
+        entry = {
+            **tool["stats"],
+            "avg_seconds": round(tool["stats"]["total_seconds"] / calls, 4) if calls else 0.0,
+        }
+        if tool["cache"] is not None:
+            cache_stats = tool["cache"].stats()
+            entry["cache_hits"] = cache_stats["hits"]
+            entry["cache_misses"] = cache_stats["misses"]
+        result[name] = entry
+    return result
+
+
+def shutdown() -> None:
+    """Stop the process pool used by CPU-bound tools, if it was started."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def _invalid(name: str, tool: dict, details: list[dict]) -> str:
+    """Count and describe a call rejected before its handler ran."""
+    tool["stats"]["invalid"] += 1
+    logger.warning("Tool '%s' called with invalid arguments: %s", name, details)
+    return json.dumps({"error": "invalid_arguments", "tool": name, "details": details}, ensure_ascii=False)
+
+
+async def _run(name: str, tool: dict, arguments: dict) -> tuple[str, bool]:
+    """Run the handler with its timeout, recording call statistics. Returns (result, ok)."""
+    timeout = tool["timeout"] or settings.TOOL_TIMEOUT
     logger.info("Executing tool '%s' with args %s", name, arguments)
+    stats = tool["stats"]
+    stats["calls"] += 1
+    start = time.perf_counter()
     try:
-        result = _registry[name]["handler"](**arguments)
-        return str(result)
+        result = await asyncio.wait_for(_call(tool, arguments), timeout)
+        return str(result), True
+    except asyncio.TimeoutError:
+        stats["errors"] += 1
+        logger.error("Tool '%s' timed out after %ss", name, timeout)
+        return f"Error: tool '{name}' timed out after {timeout}s", False
     except Exception as e:
+        stats["errors"] += 1
         logger.error("Tool '%s' raised: %s", name, e)
-        return f"Error: {e}"
+        return f"Error: {e}", False
+    finally:
+        stats["total_seconds"] += time.perf_counter() - start
+
+
+async def _run_and_store(name: str, tool: dict, arguments: dict, key: str) -> str:
+    """Run a cacheable tool and memoize successful results."""
+    result, ok = await _run(name, tool, arguments)
+    if ok:
+        tool["cache"].set(key, result)
+    return result
+
+
+async def _call(tool: dict, arguments: dict):
+    handler = tool["handler"]
+    if inspect.iscoroutinefunction(handler):
+        return await handler(**arguments)
+    if tool["cpu_bound"]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_process_pool(), functools.partial(handler, **arguments)
+        )
+    return await asyncio.to_thread(handler, **arguments)
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.TOOL_PROCESS_WORKERS)
+    return _process_pool
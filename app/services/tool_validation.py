@@ -0,0 +1,174 @@
+"""
+Argument validators compiled from tool JSON schemas.
+
+Models regularly call tools with a missing argument, a number passed as a
+string or an argument the tool does not have. compile_validator() turns a
+tool's "parameters" schema into a function that checks a call's arguments in
+one pass, without interpreting the schema again on every call, and returns
+one {"path": ..., "message": ...} dict per problem found.
+
+The subset of JSON Schema that tool definitions use is supported: type
+(including lists of types), enum, const, properties, required,
+additionalProperties, items, minimum/maximum, minLength/maxLength and
+minItems/maxItems. Other keywords are ignored.
+
+Usage:
+    validate = compile_validator(schema["function"]["parameters"])
+    errors = validate({"city": 42})
+    # [{"path": "city", "message": "expected string, got integer"}]
+"""
+
+from typing import Any, Callable
+
+Error = dict[str, str]
+Check = Callable[[Any, str, list[Error]], None]
+
+_TYPES: dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: (isinstance(v, int) and not isinstance(v, bool))
+    or (isinstance(v, float) and v.is_integer()),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "null": lambda v: v is None,
+}
+
+
+def compile_validator(schema: dict) -> Callable[[Any], list[Error]]:
+    """Return a function that validates a value against schema and lists the errors."""
+    check = _compile(schema)
+
+    def validate(value: Any) -> list[Error]:
+        errors: list[Error] = []
+        check(value, "", errors)
+        return errors
+
+    return validate
+
+
+def type_name(value: Any) -> str:
+    """JSON type name of a decoded JSON value."""
+    if isinstance(value, bool):
+        return "boolean"
+    for name in ("integer", "number", "string", "object", "array", "null"):
+        if _TYPES[name](value):
+            return name
+    return type(value).__name__
+
+
+def _compile(schema: dict) -> Check:
+    checks: list[Check] = []
+
+    if "type" in schema:
+        names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        tests = [_TYPES[n] for n in names if n in _TYPES]
+        expected = " or ".join(names)
+
+        def check_type(value, path, errors):
+            if not any(test(value) for test in tests):
+                errors.append(_error(path, f"expected {expected}, got {type_name(value)}"))
+
+        if tests:
+            checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(_error(path, f"must be one of {allowed}"))
+
+        checks.append(check_enum)
+
+    if "const" in schema:
+        const = schema["const"]
+
+        def check_const(value, path, errors):
+            if value != const:
+                errors.append(_error(path, f"must be {const!r}"))
+
+        checks.append(check_const)
+
+    checks.extend(_compile_object(schema))
+    checks.extend(_compile_array(schema))
+    checks.extend(_compile_bounds(schema))
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path, errors):
+        for check in checks:
+            check(value, path, errors)
+
+    return check_all
+
+
+def _compile_object(schema: dict) -> list[Check]:
+    properties = {name: _compile(sub) for name, sub in schema.get("properties", {}).items()}
+    required = schema.get("required", [])
+    additional = schema.get("additionalProperties", True)
+    extra = _compile(additional) if isinstance(additional, dict) else None
+    if not (properties or required or additional is not True):
+        return []
+
+    def check_object(value, path, errors):
+        if not isinstance(value, dict):
+            return
+        for name in required:
+            if name not in value:
+                errors.append(_error(_join(path, name), "is required"))
+        for name, item in value.items():
+            check = properties.get(name)
+            if check is not None:
+                check(item, _join(path, name), errors)
+            elif additional is False:
+                errors.append(_error(_join(path, name), "is not an allowed argument"))
+            elif extra is not None:
+                extra(item, _join(path, name), errors)
+
+    return [check_object]
+
+
+def _compile_array(schema: dict) -> list[Check]:
+    checks: list[Check] = []
+    if isinstance(schema.get("items"), dict):
+        check_item = _compile(schema["items"])
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    check_item(item, f"{path}[{i}]", errors)
+
+        checks.append(check_items)
+    return checks
+
+
+def _compile_bounds(schema: dict) -> list[Check]:
+    checks: list[Check] = []
+    bounds = [
+        ("minimum", _TYPES["number"], lambda v: v, lambda v, b: v >= b, "must be >= {}"),
+        ("maximum", _TYPES["number"], lambda v: v, lambda v, b: v <= b, "must be <= {}"),
+        ("minLength", _TYPES["string"], len, lambda n, b: n >= b, "must be at least {} characters"),
+        ("maxLength", _TYPES["string"], len, lambda n, b: n <= b, "must be at most {} characters"),
+        ("minItems", _TYPES["array"], len, lambda n, b: n >= b, "must have at least {} items"),
+        ("maxItems", _TYPES["array"], len, lambda n, b: n <= b, "must have at most {} items"),
+    ]
+    for keyword, applies, measure, ok, message in bounds:
+        if keyword not in schema:
+            continue
+
+        def check_bound(value, path, errors, bound=schema[keyword], applies=applies, measure=measure, ok=ok, message=message):
+            if applies(value) and not ok(measure(value), bound):
+                errors.append(_error(path, message.format(bound)))
+
+        checks.append(check_bound)
+    return checks
+
+
+def _join(path: str, name: str) -> str:
+    return f"{path}.{name}" if path else name
+
+
+def _error(path: str, message: str) -> Error:
+    return {"path": path or "(arguments)", "message": message}
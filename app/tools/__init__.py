@@ -0,0 +1,6 @@
+"""
+Built-in tool plugins.
+
+Each module registers its tools with services.tool_registry when imported.
+The modules listed in TOOL_PLUGINS are imported the first time tools are needed.
+"""
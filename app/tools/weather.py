@@ -0,0 +1,22 @@
+"""Example tool: a fixed weather report for any city."""
+
+from services import tool_registry
+
+tool_registry.register(
+    schema={
+        "type": "function",
+        "function": {
+            "name": "get_weather",
+            "description": "Returns the current weather for a given city.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "city": {"type": "string", "description": "The city name."}
+                },
+                "required": ["city"],
+            },
+        },
+    },
+    handler=lambda city: f"Weather in {city}: 22°C, sunny.",
+    cacheable=True,
+)
@@ -0,0 +1,113 @@
+"""
+Lookup latency of the disk response store versus its number of entries.
+
+Fills a fresh SQLite store (services/disk_cache.py) up to each size and
+measures hit and miss lookups and writes. The in-memory ResponseCache is
+measured alongside for reference.
+
+Run with:
+    PYTHONPATH=app python benchmarks/bench_disk_cache.py [--sizes 1000 10000 100000]
+                                                        [--lookups 5000] [--reply-bytes 800] [--json]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from services.disk_cache import DiskCache
+from services.response_cache import ResponseCache
+
+
+def key(i: int) -> str:
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+
+def timed(fn, args: list) -> list[float]:
+    """Microseconds per call of fn over args."""
+    samples = []
+    for a in args:
+        start = time.perf_counter()
+        fn(*a)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+async def timed_async(fn, args: list) -> list[float]:
+    """Microseconds per awaited call of fn over args."""
+    samples = []
+    for a in args:
+        start = time.perf_counter()
+        await fn(*a)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "p50_us": round(statistics.median(ordered), 1),
+        "p99_us": round(ordered[int(len(ordered) * 0.99) - 1], 1),
+    }
+
+
+def measure(size: int, lookups: int, reply: str, directory: str) -> dict:
+    store = DiskCache(os.path.join(directory, f"bench-{size}.db"), max_bytes=2**40, ttl=3600)
+    memory = ResponseCache(max_entries=size, max_bytes=2**40, ttl=3600)
+    start = time.perf_counter()
+    for i in range(size):
+        store.set(key(i), reply)
+        memory.set(key(i), reply)
+    fill_seconds = time.perf_counter() - start
+
+    hits = [(key(random.randrange(size)),) for _ in range(lookups)]
+    misses = [(key(size + i),) for i in range(lookups)]
+    writes = [(key(size + lookups + i), reply) for i in range(lookups)]
+    result = {
+        "entries": size,
+        "db_mb": round(os.path.getsize(store.path) / 2**20, 1),
+        "fill_s": round(fill_seconds, 2),
+        "disk_hit": summary(timed(store.get, hits)),
+        "disk_miss": summary(timed(store.get, misses)),
+        "disk_write": summary(timed(store.set, writes)),
+        "memory_hit": summary(asyncio.run(timed_async(memory.get, hits))),
+    }
+    store.close()
+    return result
+
+
+def main(sizes: list[int], lookups: int, reply_bytes: int) -> list[dict]:
+    reply = ("The quick brown fox jumps over the lazy dog. " * (reply_bytes // 45 + 1))[:reply_bytes]
+    with tempfile.TemporaryDirectory() as directory:
+        return [measure(size, lookups, reply, directory) for size in sizes]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--lookups", type=int, default=5_000)
+    parser.add_argument("--reply-bytes", type=int, default=800)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = main(args.sizes, args.lookups, args.reply_bytes)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(
+            f"{'entries':>9}{'db MB':>8}{'hit p50/p99 µs':>18}{'miss p50/p99 µs':>18}"
+            f"{'write p50/p99 µs':>19}{'memory hit p50 µs':>20}"
+        )
+        for r in results:
+            print(
+                f"{r['entries']:>9}{r['db_mb']:>8}"
+                f"{r['disk_hit']['p50_us']:>10}/{r['disk_hit']['p99_us']:<7}"
+                f"{r['disk_miss']['p50_us']:>10}/{r['disk_miss']['p99_us']:<7}"
+                f"{r['disk_write']['p50_us']:>11}/{r['disk_write']['p99_us']:<7}"
+                f"{r['memory_hit']['p50_us']:>20}"
+            )
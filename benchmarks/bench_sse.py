@@ -0,0 +1,83 @@
+"""
+Micro-benchmark of SSE encoding in the /v1/responses streaming path.
+
+Compares the original per-token generator (json.dumps for every frame) with
+the current _sse_generator, in per-token mode and with token coalescing, and
+reports frames per second and CPU time per token.
+
+Run with:
+    PYTHONPATH=app python benchmarks/bench_sse.py [--tokens 200000] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from core.config import settings
+from endpoints.responses import _sse_generator
+
+
+async def baseline_sse_generator(model, chunks, temperature, stream):
+    """The generator as it was before coalescing and the fast frame encoder."""
+    yield f"data: {json.dumps({'model': model, 'temperature': temperature, 'stream': stream})}\n\n"
+    async for chunk in chunks:
+        yield f"data: {json.dumps({'content': chunk})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+async def token_source(count: int):
+    """Yield short tokens, giving the event loop a turn every 64 tokens like a real stream."""
+    tokens = [" the", " quick", " brown", " fox", " jumps", " über", " 🚀", ' "lazy"']
+    for i in range(count):
+        if i % 64 == 0:
+            await asyncio.sleep(0)
+        yield tokens[i % len(tokens)]
+
+
+async def measure(name: str, generator, tokens: int) -> dict:
+    frames = 0
+    payload_bytes = 0
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    async for frame in generator("bench", token_source(tokens), 0.7, True):
+        frames += 1
+        payload_bytes += len(frame)
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    return {
+        "name": name,
+        "tokens": tokens,
+        "frames": frames,
+        "bytes": payload_bytes,
+        "frames_per_sec": round(frames / wall),
+        "tokens_per_sec": round(tokens / wall),
+        "cpu_us_per_token": round(cpu / tokens * 1e6, 3),
+    }
+
+
+async def main(tokens: int) -> list[dict]:
+    results = [await measure("baseline", baseline_sse_generator, tokens)]
+
+    settings.SSE_COALESCE_MS = 0.0
+    results.append(await measure("fast_encoding", _sse_generator, tokens))
+
+    settings.SSE_COALESCE_MS = 20.0
+    results.append(await measure("coalesced_20ms", _sse_generator, tokens))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=200_000)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args.tokens))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'mode':<16}{'frames':>10}{'frames/s':>12}{'tokens/s':>12}{'CPU µs/token':>14}")
+        for r in results:
+            print(
+                f"{r['name']:<16}{r['frames']:>10}{r['frames_per_sec']:>12}"
+                f"{r['tokens_per_sec']:>12}{r['cpu_us_per_token']:>14}"
+            )
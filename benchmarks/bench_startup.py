@@ -0,0 +1,104 @@
+"""
+Startup-time benchmark of the API.
+
+Measures, in fresh interpreters, how long importing main and building the app
+with create_app() take, then how long a uvicorn worker takes from process
+start to its first served request (GET /). Ollama does not need to be
+running: nothing on that path calls it.
+
+Run with:
+    python benchmarks/bench_startup.py [--runs 5] [--port 8765] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.create_app()
+built = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (built - imported) * 1000,
+    "modules": len(sys.modules),
+    "numpy_loaded": "numpy" in sys.modules,
+}))
+"""
+
+
+def environment() -> dict:
+    return {**os.environ, "PYTHONPATH": APP_DIR}
+
+
+def measure_import() -> dict:
+    """Import main and build the app in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        env=environment(), capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_first_request(port: int, timeout: float = 30.0) -> float:
+    """Seconds from starting a uvicorn worker to its first 200 response on GET /."""
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--factory", "main:create_app",
+         "--port", str(port), "--log-level", "warning"],
+        env=environment(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    if client.get("/").status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+                time.sleep(0.005)
+        raise TimeoutError(f"no response from uvicorn within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(runs: int, port: int) -> dict:
+    imports = [measure_import() for _ in range(runs)]
+    first_requests = [measure_first_request(port) for _ in range(runs)]
+    return {
+        "runs": runs,
+        "import_ms": round(statistics.median(r["import_ms"] for r in imports), 1),
+        "create_app_ms": round(statistics.median(r["create_app_ms"] for r in imports), 1),
+        "modules_loaded": imports[-1]["modules"],
+        "numpy_loaded": imports[-1]["numpy_loaded"],
+        "first_request_ms": round(statistics.median(first_requests) * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    result = main(args.runs, args.port)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for key, value in result.items():
+            print(f"{key:<18}{value}")
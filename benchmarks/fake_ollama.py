@@ -0,0 +1,165 @@
+"""
+Stub Ollama server for load tests.
+
+Speaks enough of Ollama's API for this project (/api/chat streaming and
+non-streaming, /api/tags, /api/ps) and generates a fixed reply at a
+configurable token rate, after a configurable time to first token, failing a
+configurable fraction of requests. Timings and token counts are reported in
+the same fields as Ollama, so usage and metrics work as with a real server.
+
+Run with:
+    python benchmarks/fake_ollama.py [--port 11435] [--tokens-per-sec 50] [--latency-ms 100]
+                                     [--output-tokens 64] [--error-rate 0.0]
+
+Then point the API at it:
+    OLLAMA_URL=http://localhost:11435/api/chat make run
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = ["The", " quick", " brown", " fox", " jumps", " over", " the", " lazy", " dog", "."]
+
+
+@dataclass
+class FakeConfig:
+    """
+    Behaviour of the stub server.
+
+    Attributes:
+        tokens_per_sec: Generation speed; 0 sends every token at once.
+        latency_ms: Delay before the first token (prompt evaluation + load).
+        output_tokens: Tokens in every reply, unless options.num_predict is lower.
+        error_rate: Fraction of /api/chat requests answered with error_status.
+        error_status: HTTP status of injected failures.
+        models: Model names reported by /api/tags and /api/ps.
+    """
+
+    tokens_per_sec: float = 50.0
+    latency_ms: float = 100.0
+    output_tokens: int = 64
+    error_rate: float = 0.0
+    error_status: int = 500
+    models: tuple[str, ...] = ("tinyllama:latest", "llama3:latest")
+
+
+def create_app(config: FakeConfig) -> FastAPI:
+    """Build the stub server's ASGI app."""
+    app = FastAPI(title="Fake Ollama")
+    entries = [
+        {"name": name, "model": name, "size": 1_000_000_000, "digest": f"fake-{i}"}
+        for i, name in enumerate(config.models)
+    ]
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": entries}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": entries}
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        if config.error_rate and random.random() < config.error_rate:
+            return JSONResponse({"error": "injected failure"}, status_code=config.error_status)
+
+        model = body.get("model", "")
+        count = config.output_tokens
+        num_predict = (body.get("options") or {}).get("num_predict")
+        if num_predict is not None and num_predict >= 0:
+            count = min(count, num_predict)
+        # Like Ollama, "length" when num_predict cut the reply short
+        done_reason = "length" if count < config.output_tokens else "stop"
+        prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+
+        if body.get("stream", True):
+            return StreamingResponse(
+                _stream(config, model, count, prompt_tokens, done_reason), media_type="application/x-ndjson"
+            )
+
+        start = time.perf_counter()
+        await asyncio.sleep(config.latency_ms / 1000)
+        if config.tokens_per_sec:
+            await asyncio.sleep(count / config.tokens_per_sec)
+        content = "".join(WORDS[i % len(WORDS)] for i in range(count))
+        return {
+            **_final(model, count, prompt_tokens, start, config, done_reason),
+            "message": {"role": "assistant", "content": content},
+        }
+
+    return app
+
+
+async def _stream(config: FakeConfig, model: str, count: int, prompt_tokens: int, done_reason: str):
+    start = time.perf_counter()
+    await asyncio.sleep(config.latency_ms / 1000)
+    interval = 1 / config.tokens_per_sec if config.tokens_per_sec else 0
+    for i in range(count):
+        chunk = {
+            "model": model,
+            "created_at": _now(),
+            "message": {"role": "assistant", "content": WORDS[i % len(WORDS)]},
+            "done": False,
+        }
+        yield json.dumps(chunk) + "\n"
+        if interval:
+            await asyncio.sleep(interval)
+    final = _final(model, count, prompt_tokens, start, config, done_reason)
+    yield json.dumps({**final, "message": {"role": "assistant", "content": ""}}) + "\n"
+
+
+def _final(
+    model: str, count: int, prompt_tokens: int, start: float, config: FakeConfig, done_reason: str
+) -> dict:
+    """Closing fields of an Ollama reply, with durations in nanoseconds."""
+    total = time.perf_counter() - start
+    eval_seconds = count / config.tokens_per_sec if config.tokens_per_sec else 0
+    return {
+        "model": model,
+        "created_at": _now(),
+        "done": True,
+        "done_reason": done_reason,
+        "total_duration": int(total * 1e9),
+        "load_duration": 0,
+        "prompt_eval_count": prompt_tokens,
+        "prompt_eval_duration": int(config.latency_ms * 1e6),
+        "eval_count": count,
+        "eval_duration": int(eval_seconds * 1e9) or 1,
+    }
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--output-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    args = parser.parse_args()
+
+    config = FakeConfig(
+        tokens_per_sec=args.tokens_per_sec,
+        latency_ms=args.latency_ms,
+        output_tokens=args.output_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
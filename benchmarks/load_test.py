@@ -0,0 +1,172 @@
+"""
+Load generator for /v1/responses.
+
+Drives a running API with a fixed number of concurrent clients (closed loop) or
+at a fixed request rate (open loop), streaming or not, and reports throughput,
+latency percentiles and, for streams, time to first token. Pair it with
+benchmarks/fake_ollama.py to measure the API's own overhead without a GPU.
+
+Run with:
+    python benchmarks/load_test.py [--url http://localhost:8000] [--concurrency 16 | --rate 50]
+                                   [--duration 30] [--stream] [--json] [--output results.json]
+
+Use --compare previous.json to print the change of each figure against an earlier run.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+
+import httpx
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of values (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class Recorder:
+    """Collects per-request outcomes."""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.ttfts: list[float] = []
+        self.errors: dict[str, int] = {}
+        self.output_chars = 0
+
+    def error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+async def one_request(client: httpx.AsyncClient, args, recorder: Recorder) -> None:
+    body = {"input": args.input, "stream": args.stream, "temperature": args.temperature, "cache": False}
+    if args.model:
+        body["model"] = args.model
+    start = time.perf_counter()
+    try:
+        if args.stream:
+            first = None
+            async with client.stream("POST", "/v1/responses", json=body) as response:
+                if response.status_code != 200:
+                    recorder.error(str(response.status_code))
+                    return
+                async for line in response.aiter_lines():
+                    if line.startswith('data: {"content"'):
+                        if first is None:
+                            first = time.perf_counter() - start
+                        recorder.output_chars += len(json.loads(line[6:])["content"])
+            if first is not None:
+                recorder.ttfts.append(first)
+        else:
+            response = await client.post("/v1/responses", json=body)
+            if response.status_code != 200:
+                recorder.error(str(response.status_code))
+                return
+            recorder.output_chars += len(response.json()["output"]["content"])
+    except httpx.HTTPError as e:
+        recorder.error(type(e).__name__)
+        return
+    recorder.latencies.append(time.perf_counter() - start)
+
+
+async def closed_loop(client, args, recorder: Recorder, deadline: float) -> None:
+    """`concurrency` clients each sending their next request as soon as the last one ends."""
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await one_request(client, args, recorder)
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+
+async def open_loop(client, args, recorder: Recorder, deadline: float) -> None:
+    """Start requests at a fixed rate, regardless of how long earlier ones take."""
+    tasks = set()
+    interval = 1 / args.rate
+    next_start = time.perf_counter()
+    while next_start < deadline:
+        task = asyncio.create_task(one_request(client, args, recorder))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        next_start += interval
+        await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+    await asyncio.gather(*tasks)
+
+
+async def run(args) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(args.timeout)
+    headers = {"X-API-Key": args.api_key} if args.api_key else {}
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout, headers=headers) as client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        if args.rate:
+            await open_loop(client, args, recorder, deadline)
+        else:
+            await closed_loop(client, args, recorder, deadline)
+        elapsed = time.perf_counter() - start
+
+    completed = len(recorder.latencies)
+    result = {
+        "mode": f"rate={args.rate}/s" if args.rate else f"concurrency={args.concurrency}",
+        "stream": args.stream,
+        "duration_s": round(elapsed, 2),
+        "requests": completed + sum(recorder.errors.values()),
+        "completed": completed,
+        "errors": recorder.errors,
+        "throughput_rps": round(completed / elapsed, 2),
+        "output_chars_per_sec": round(recorder.output_chars / elapsed),
+    }
+    for name, values in (("latency", recorder.latencies), ("ttft", recorder.ttfts)):
+        if values:
+            for p in (50, 95, 99):
+                result[f"{name}_p{p}_ms"] = round(percentile(values, p) * 1000, 1)
+    return result
+
+
+def compare(result: dict, previous: dict) -> dict:
+    """Relative change (%) of every numeric figure shared with a previous run."""
+    changes = {}
+    for key, value in result.items():
+        before = previous.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and before:
+            changes[key] = round((value - before) / before * 100, 1)
+    return changes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--api-key")
+    parser.add_argument("--model")
+    parser.add_argument("--input", default="Write a haiku about the sea.")
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=16, help="closed-loop clients")
+    parser.add_argument("--rate", type=float, help="open-loop requests per second (overrides --concurrency)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.compare:
+        with open(args.compare) as f:
+            result["change_pct"] = compare(result, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for key, value in result.items():
+            print(f"{key:<22}{value}")
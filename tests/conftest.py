@@ -19,16 +19,28 @@ MOCK_CONTENT = "This is a mocked LLM response."
 
 
 def make_fake_engine():
-    """Build a fake LLMEngine that never calls Ollama."""
+    """Build a fake LLMEngine that never calls Ollama; like the real one, it awaits admit."""
     fake = MagicMock(spec=LLMEngine)
 
-    def fake_generate(model, **_):
+    async def fake_generate(model, admit=None, **_):
+        if admit is not None:
+            await admit()
         return Response(
             model=model or settings.DEFAULT_MODEL,
             output=ResponseOutput(content=MOCK_CONTENT),
         )
 
+    async def fake_chunks():
+        for chunk in MOCK_CONTENT.split(" "):
+            yield chunk
+
+    async def fake_stream(model, admit=None, **_):
+        if admit is not None:
+            await admit()
+        return model or settings.DEFAULT_MODEL, fake_chunks()
+
     fake.generate_response.side_effect = fake_generate
+    fake.stream_response.side_effect = fake_stream
     return fake
 
 
@@ -0,0 +1,52 @@
+"""
+Tests for the Prometheus metrics registry and the /metrics endpoint.
+
+No running Ollama instance required.
+"""
+
+from core import metrics
+from core.metrics import Counter, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test latency.", buckets=(0.1, 1.0))
+    histogram.observe(0.05, "m")
+    histogram.observe(0.5, "m")
+    histogram.observe(5, "m")
+    lines = histogram.render()
+    assert 'test_latency_seconds_bucket{model="m",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{model="m",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{model="m",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{model="m"} 3' in lines
+    assert 'test_latency_seconds_sum{model="m"} 5.55' in lines
+
+
+def test_counter_labels_are_escaped():
+    counter = Counter("test_total", "Test.", labels=("model", "status"))
+    counter.inc('we"ird', "ok", amount=2)
+    assert 'test_total{model="we\\"ird",status="ok"} 2' in counter.render()
+
+
+def test_record_ollama_stats():
+    before = metrics.completion_tokens.value("stats-model")
+    metrics.record_ollama_stats(
+        "stats-model",
+        {"prompt_eval_count": 10, "eval_count": 50, "eval_duration": 1_000_000_000, "load_duration": 2_000_000_000},
+    )
+    assert metrics.completion_tokens.value("stats-model") == before + 50
+    assert metrics.tokens_per_second.count("stats-model") == 1
+    assert metrics.model_load.count("stats-model") == 1
+
+
+def test_metrics_endpoint_reports_requests(client):
+    client.post("/v1/responses", json={"model": "metrics-model", "input": "Hello"})
+    client.post("/v1/responses", json={"model": "metrics-model", "input": "Hello", "stream": True})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'llm_requests_total{model="metrics-model",status="ok"} 2' in body
+    assert 'llm_request_duration_seconds_count{model="metrics-model"} 2' in body
+    assert 'llm_time_to_first_token_seconds_count{model="metrics-model"} 1' in body
+    assert 'llm_queue_wait_seconds_count{model="metrics-model"} 2' in body
+    assert 'llm_queue_depth{model="metrics-model"} 0' in body
@@ -35,3 +35,12 @@ def test_missing_api_key_rejected(client_with_auth):
     client, _ = client_with_auth
     response = client.post("/v1/responses", json={"input": "Hello"})
     assert response.status_code == 401
+
+
+def test_dependency_runs_on_the_event_loop():
+    """A sync dependency would be run in the threadpool on every request."""
+    import inspect
+
+    from core.security import verify_api_key
+
+    assert inspect.iscoroutinefunction(verify_api_key)
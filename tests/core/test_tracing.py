@@ -0,0 +1,83 @@
+"""
+Tests for request tracing, the Server-Timing header and the request profiler.
+
+No running Ollama instance required.
+"""
+
+import json
+import logging
+import time
+
+from core import profiler, tracing
+from core.config import settings
+from core.tracing import Trace
+
+
+def test_server_timing_sums_spans_per_name():
+    trace = Trace("POST /x")
+    now = time.perf_counter()
+    trace.add("ollama", now, now + 0.5)
+    trace.add("tools", now, now + 0.1)
+    trace.add("ollama", now, now + 0.25)
+    header = trace.server_timing()
+    assert header.startswith("ollama;dur=750.0, tools;dur=100.0, total;dur=")
+
+
+def test_span_outside_a_request_is_a_no_op():
+    assert tracing.current() is None
+    with tracing.span("anything"):
+        pass
+    tracing.begin("anything")
+
+
+def test_responses_carry_server_timing(client):
+    response = client.post("/v1/responses", json={"input": "Hello"})
+    names = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert names == ["auth", "prompt", "queue", "serialize", "total"]
+
+
+def test_streams_carry_server_timing(client):
+    response = client.post("/v1/responses", json={"input": "Hello", "stream": True})
+    assert "queue;dur=" in response.headers["server-timing"]
+
+
+def test_slow_requests_are_logged(client, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "TRACE_SLOW_MS", 0.001)
+    with caplog.at_level(logging.WARNING, logger="core.tracing"):
+        client.post("/v1/responses", json={"input": "Hello"})
+    [record] = [r for r in caplog.records if r.name == "core.tracing"]
+    logged = json.loads(record.getMessage().split(" ", 2)[2])
+    assert logged["request"] == "POST /v1/responses"
+    assert logged["status"] == 200
+    assert "queue" in [span["name"] for span in logged["spans"]]
+
+
+def test_profile_header_writes_collapsed_stacks(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILE_HEADER_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILE_INTERVAL_MS", 0.1)
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    sessions = []
+    start = profiler.start_if_selected
+
+    def recording_start(trace_id, headers):
+        session = start(trace_id, headers)
+        sessions.append(session)
+        return session
+
+    monkeypatch.setattr(profiler, "start_if_selected", recording_start)
+    client.post("/v1/responses", json={"input": "Hello"}, headers={"X-Profile": "1"})
+    [session] = sessions
+    session.join(5)
+    [path] = tmp_path.iterdir()
+    assert path.suffix == ".folded"
+    for line in path.read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+
+
+def test_profiling_needs_header_opt_in(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_HEADER_ENABLED", False)
+    assert not profiler.is_selected({b"x-profile": b"1"})
+    monkeypatch.setattr(settings, "PROFILE_HEADER_ENABLED", True)
+    assert profiler.is_selected({b"x-profile": b"1"})
+    assert not profiler.is_selected({})
@@ -0,0 +1,146 @@
+"""
+API tests for the POST /v1/chat/completions endpoint.
+
+LLMEngine is mocked — no running Ollama instance required.
+"""
+
+import asyncio
+import json
+
+from core.config import settings
+from schemas.responses import Response, ResponseOutput, Usage
+
+MESSAGES = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "Hi"}]
+
+
+def _engine(client):
+    from main import app
+    from services.llm_engine import LLMEngine
+
+    engine = app.dependency_overrides[LLMEngine]()
+    app.dependency_overrides[LLMEngine] = lambda: engine
+    return engine
+
+
+def test_basic_chat_completion(client):
+    engine = _engine(client)
+    response = client.post("/v1/chat/completions", json={"messages": MESSAGES})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["object"] == "chat.completion"
+    assert data["id"].startswith("chatcmpl-")
+    assert data["choices"] == [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "This is a mocked LLM response."},
+            "finish_reason": None,
+        }
+    ]
+    kwargs = engine.generate_response.call_args.kwargs
+    assert kwargs["messages"] == MESSAGES
+    assert kwargs["seed"] is None
+
+
+def test_n_candidates_get_distinct_seeds(client):
+    engine = _engine(client)
+    response = client.post("/v1/chat/completions", json={"messages": MESSAGES, "n": 3, "seed": 42})
+    assert [c["index"] for c in response.json()["choices"]] == [0, 1, 2]
+    seeds = sorted(call.kwargs["seed"] for call in engine.generate_response.call_args_list)
+    assert seeds == [42, 43, 44]
+
+
+def test_candidates_are_generated_concurrently(client):
+    engine = _engine(client)
+    running, peak = 0, 0
+
+    async def slow_generate(model, seed, **_):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        usage = Usage(input_tokens=10, output_tokens=seed % 10, total_tokens=10 + seed % 10)
+        return Response(model=model, output=ResponseOutput(content=f"seed {seed}"), usage=usage)
+
+    engine.generate_response.side_effect = slow_generate
+    response = client.post("/v1/chat/completions", json={"messages": MESSAGES, "n": 3, "seed": 0})
+    data = response.json()
+    assert peak == 3
+    assert [c["message"]["content"] for c in data["choices"]] == ["seed 0", "seed 1", "seed 2"]
+    assert data["usage"] == {"prompt_tokens": 30, "completion_tokens": 3, "total_tokens": 33}
+
+
+def test_invalid_requests_are_rejected(client):
+    assert client.post("/v1/chat/completions", json={"messages": []}).status_code == 422
+    too_many = client.post("/v1/chat/completions", json={"messages": MESSAGES, "n": settings.CHAT_MAX_N + 1})
+    assert too_many.status_code == 400
+
+
+def test_streamed_candidates_are_tagged_by_index(client):
+    response = client.post("/v1/chat/completions", json={"messages": MESSAGES, "n": 2, "stream": True})
+    assert response.status_code == 200
+    assert response.text.endswith("data: [DONE]\n\n")
+    events = [
+        json.loads(frame.removeprefix("data: "))
+        for frame in response.text.split("\n\n")
+        if frame.startswith("data: {")
+    ]
+    assert all(e["object"] == "chat.completion.chunk" for e in events)
+    assert events[0]["choices"] == [
+        {"index": 0, "delta": {"role": "assistant"}, "finish_reason": None},
+        {"index": 1, "delta": {"role": "assistant"}, "finish_reason": None},
+    ]
+    texts = {0: "", 1: ""}
+    for event in events[1:]:
+        for choice in event["choices"]:
+            texts[choice["index"]] += choice["delta"].get("content", "")
+    assert texts == {0: "ThisisamockedLLMresponse.", 1: "ThisisamockedLLMresponse."}
+
+
+def test_scheduler_slots_released_after_candidates(client):
+    from services.scheduler import scheduler
+
+    body = {"model": "chat-slot-test", "messages": MESSAGES, "n": 3}
+    client.post("/v1/chat/completions", json=body)
+    client.post("/v1/chat/completions", json={**body, "stream": True})
+    assert scheduler.stats()["chat-slot-test"]["running"] == 0
+
+
+def test_n_above_the_model_concurrency_limit_runs_in_turns(client, monkeypatch):
+    from services.scheduler import scheduler
+
+    monkeypatch.setitem(scheduler.model_concurrency, "chat-limit-test", 2)
+    monkeypatch.setattr(scheduler, "queue_timeout", 2.0)
+    engine = _engine(client)
+    running, peak = 0, 0
+
+    async def slow_generate(model, seed, admit, **_):
+        nonlocal running, peak
+        await admit()
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return Response(model=model, output=ResponseOutput(content=f"seed {seed}"))
+
+    async def slow_chunks(seed):
+        await asyncio.sleep(0.02)
+        yield f"seed {seed}"
+
+    async def slow_stream(model, seed, admit, **_):
+        await admit()
+        return model, slow_chunks(seed)
+
+    engine.generate_response.side_effect = slow_generate
+    engine.stream_response.side_effect = slow_stream
+    body = {"model": "chat-limit-test", "messages": MESSAGES, "n": 5, "seed": 0}
+
+    response = client.post("/v1/chat/completions", json=body)
+    assert response.status_code == 200
+    assert len(response.json()["choices"]) == 5
+    assert peak == 2
+
+    response = client.post("/v1/chat/completions", json={**body, "stream": True})
+    assert response.status_code == 200
+    assert sum('"content": "seed' in frame for frame in response.text.split("\n\n")) == 5
+    assert scheduler.stats()["chat-limit-test"]["running"] == 0
@@ -0,0 +1,174 @@
+"""
+Unit tests for aborting generations when the client disconnects.
+
+The client connection is a fake with a settable disconnected flag, or a raw
+ASGI client that hangs up, and Ollama is a slow fake stream — no running
+Ollama instance required.
+"""
+
+import asyncio
+import json
+
+import pytest
+from starlette.requests import ClientDisconnect, Request
+
+from core import metrics
+from core.config import settings
+from endpoints.common import ClientDisconnected, abort_on_disconnect, unless_disconnected
+from services.scheduler import scheduler
+
+
+class FakeConnection(Request):
+    def __init__(self):
+        super().__init__({"type": "http"})
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(settings, "DISCONNECT_POLL_INTERVAL", 0.01)
+
+
+@pytest.mark.asyncio
+async def test_stream_upstream_is_closed_on_disconnect():
+    closed = asyncio.Event()
+
+    async def upstream():
+        try:
+            while True:
+                await asyncio.sleep(0.005)
+                yield "token"
+        finally:
+            closed.set()
+
+    connection = FakeConnection()
+    before = metrics.cancelled_requests.value("m-stream", "stream")
+    received = []
+    async for chunk in abort_on_disconnect(upstream(), connection, "m-stream"):
+        received.append(chunk)
+        if len(received) == 3:
+            connection.disconnected = True
+
+    assert closed.is_set()
+    assert metrics.cancelled_requests.value("m-stream", "stream") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_stream_is_aborted_while_no_token_arrives():
+    closed = asyncio.Event()
+
+    async def upstream():
+        try:
+            yield "first"
+            await asyncio.sleep(10)
+            yield "never"
+        finally:
+            closed.set()
+
+    connection = FakeConnection()
+    stream = abort_on_disconnect(upstream(), connection, "m-idle")
+    assert await stream.__anext__() == "first"
+    connection.disconnected = True
+    with pytest.raises(StopAsyncIteration):
+        await asyncio.wait_for(stream.__anext__(), 1)
+    assert closed.is_set()
+
+
+@pytest.mark.asyncio
+async def test_completed_stream_is_not_counted_as_cancelled():
+    async def upstream():
+        yield "a"
+        yield "b"
+
+    before = metrics.cancelled_requests.value("m-done", "stream")
+    chunks = [c async for c in abort_on_disconnect(upstream(), FakeConnection(), "m-done")]
+    assert chunks == ["a", "b"]
+    assert metrics.cancelled_requests.value("m-done", "stream") == before
+
+
+@pytest.mark.asyncio
+async def test_non_streaming_generation_is_cancelled_on_disconnect():
+    cancelled = asyncio.Event()
+
+    async def generate():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    connection = FakeConnection()
+    asyncio.get_running_loop().call_later(0.02, setattr, connection, "disconnected", True)
+    with pytest.raises(ClientDisconnected):
+        await asyncio.wait_for(unless_disconnected(generate(), connection, "m"), 1)
+    assert cancelled.is_set()
+
+
+async def leave_before_the_body(path: str, body: dict) -> None:
+    """Call the app over raw ASGI with a client that is gone by the time the response starts."""
+    from main import app
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    messages = [{"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            raise OSError("connection reset by peer")
+
+    with pytest.raises(ClientDisconnect):
+        await app(scope, receive, send)
+
+
+@pytest.mark.asyncio
+async def test_stream_slot_is_released_when_the_client_leaves_before_the_body(client):
+    before = metrics.requests_total.value("m-early", "cancelled")
+    for _ in range(3):
+        await leave_before_the_body("/v1/responses", {"model": "m-early", "input": "hi", "stream": True})
+    assert scheduler.stats()["m-early"]["running"] == 0
+    assert metrics.requests_total.value("m-early", "cancelled") == before + 3
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_slot_is_released_when_the_client_leaves_before_the_body(client):
+    body = {"model": "m-early-chat", "messages": [{"role": "user", "content": "hi"}], "stream": True, "n": 2}
+    await leave_before_the_body("/v1/chat/completions", body)
+    assert scheduler.stats()["m-early-chat"]["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_upstream_is_paused_while_the_client_does_not_read(monkeypatch):
+    from endpoints import common
+
+    monkeypatch.setattr(common, "_READ_AHEAD", 4)
+    produced = 0
+
+    async def upstream():
+        nonlocal produced
+        for _ in range(100):
+            produced += 1
+            yield "token"
+
+    stream = abort_on_disconnect(upstream(), FakeConnection(), "m-slow")
+    assert await stream.__anext__() == "token"
+    await asyncio.sleep(0.05)
+    assert produced <= 6
+    await stream.aclose()
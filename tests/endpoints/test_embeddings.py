@@ -0,0 +1,55 @@
+"""
+API tests for the POST /v1/embeddings endpoint.
+
+Ollama is mocked — no running Ollama instance required.
+"""
+
+import httpx
+import pytest
+
+from core.config import settings
+from services import ollama_client
+from services.embedding_batcher import batcher
+
+
+@pytest.fixture
+def fake_embed(monkeypatch):
+    calls = []
+
+    async def embed(model, texts):
+        calls.append((model, list(texts)))
+        return [[float(len(t)), 0.5] for t in texts]
+
+    monkeypatch.setattr(ollama_client, "embed", embed)
+    batcher.clear()
+    yield calls
+    batcher.clear()
+
+
+def test_single_input(client, fake_embed):
+    response = client.post("/v1/embeddings", json={"input": "hello"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["object"] == "list"
+    assert data["model"] == settings.EMBEDDING_DEFAULT_MODEL
+    assert data["data"] == [{"object": "embedding", "index": 0, "embedding": [5.0, 0.5]}]
+
+
+def test_list_input_keeps_order(client, fake_embed):
+    response = client.post("/v1/embeddings", json={"model": "e", "input": ["a", "bbb"]})
+    assert [d["embedding"][0] for d in response.json()["data"]] == [1.0, 3.0]
+    assert fake_embed == [("e", ["a", "bbb"])]
+
+
+def test_empty_input_returns_422(client):
+    assert client.post("/v1/embeddings", json={"input": []}).status_code == 422
+
+
+def test_ollama_failure_returns_502(client, monkeypatch):
+    async def embed(model, texts):
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(ollama_client, "embed", embed)
+    batcher.clear()
+    response = client.post("/v1/embeddings", json={"input": "never cached"})
+    assert response.status_code == 502
@@ -0,0 +1,40 @@
+"""
+API tests for the GET /ready endpoint and fail-fast behaviour of /v1/responses.
+
+No running Ollama instance required.
+"""
+
+import pytest
+
+from services.backend_pool import pool
+
+
+@pytest.fixture
+def open_breakers():
+    for backend in pool.backends:
+        for _ in range(backend.breaker.failure_threshold):
+            backend.breaker.record_failure()
+    yield
+    for backend in pool.backends:
+        backend.breaker.record_success()
+
+
+def test_ready_reports_backends(client):
+    response = client.get("/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ready"] is True
+    assert data["backends"][0]["circuit"]["state"] == "closed"
+
+
+def test_not_ready_while_every_breaker_is_open(client, open_breakers):
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["backends"][0]["circuit"]["state"] == "open"
+    assert int(response.headers["retry-after"]) >= 1
+
+
+def test_responses_fail_fast_while_every_breaker_is_open(client, open_breakers):
+    response = client.post("/v1/responses", json={"input": "Hello"})
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
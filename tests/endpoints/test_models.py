@@ -0,0 +1,38 @@
+"""
+API tests for the GET /v1/models endpoint.
+
+The model catalog is fed a fixed snapshot — no running Ollama instance required.
+"""
+
+import pytest
+
+from services.model_catalog import catalog
+
+
+@pytest.fixture
+def models_snapshot(monkeypatch):
+    async def fake_get_models():
+        return [{"name": "tinyllama:latest", "size": 637875785}]
+
+    monkeypatch.setattr("services.model_catalog.get_ollama_models", fake_get_models)
+    monkeypatch.setattr(catalog, "snapshot", None)
+
+
+def test_list_models(client, models_snapshot):
+    response = client.get("/v1/models")
+    assert response.status_code == 200
+    assert response.json() == {"models": [{"id": "tinyllama:latest", "size": 637875785}]}
+    assert response.headers["etag"]
+
+
+def test_if_none_match_returns_304(client, models_snapshot):
+    etag = client.get("/v1/models").headers["etag"]
+    response = client.get("/v1/models", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_unknown_model_rejected_before_ollama(client, models_snapshot):
+    client.get("/v1/models")
+    assert client.post("/v1/responses", json={"model": "nope", "input": "Hi"}).status_code == 404
+    assert client.post("/v1/responses", json={"model": "tinyllama", "input": "Hi"}).status_code == 200
@@ -40,3 +40,192 @@ def test_with_temperature(client):
 def test_missing_input_returns_422(client):
     response = client.post("/v1/responses", json={})
     assert response.status_code == 422
+
+
+def test_streaming_response(client):
+    response = client.post("/v1/responses", json={"input": "Hello", "stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert '"content": "mocked"' in response.text
+    assert response.text.endswith("data: [DONE]\n\n")
+
+
+def test_full_queue_returns_429_with_retry_after(client, monkeypatch):
+    from services.scheduler import QueueFullError, scheduler
+
+    async def reject(*_):
+        raise QueueFullError("Queue for model 'tinyllama' is full", retry_after=7)
+
+    monkeypatch.setattr(scheduler, "acquire", reject)
+    response = client.post("/v1/responses", json={"input": "Hello"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "7"
+
+
+def test_scheduler_slot_released_after_request(client):
+    from services.scheduler import scheduler
+
+    client.post("/v1/responses", json={"model": "slot-test", "input": "Hello"})
+    client.post("/v1/responses", json={"model": "slot-test", "input": "Hello", "stream": True})
+    assert scheduler.stats()["slot-test"]["running"] == 0
+
+
+def test_streaming_with_tools_sends_tool_events(client):
+    from main import app
+    from services.llm_engine import LLMEngine
+
+    engine = app.dependency_overrides[LLMEngine]()
+
+    async def events():
+        yield {"type": "tool_call.start", "index": 0, "name": "get_weather", "arguments": {}}
+        yield {"type": "tool_call.end", "index": 0, "name": "get_weather", "result": "sunny"}
+        yield "Sunny."
+
+    async def fake_stream(model, use_tools=False, **_):
+        assert use_tools
+        return model or "tinyllama", events()
+
+    engine.stream_response.side_effect = fake_stream
+    app.dependency_overrides[LLMEngine] = lambda: engine
+
+    response = client.post("/v1/responses", json={"input": "Weather?", "stream": True, "tools": True})
+    assert response.status_code == 200
+    assert '"type": "tool_call.start"' in response.text
+    assert '"result": "sunny"' in response.text
+    assert '"content": "Sunny."' in response.text
+
+
+def test_batch_streams_ndjson_results_by_index(client):
+    import json
+
+    response = client.post(
+        "/v1/responses/batch",
+        json={"requests": [{"input": "a"}, {"model": "phi3", "input": "b"}, {"input": "c", "stream": True}]},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    by_index = {line["index"]: line for line in lines}
+    assert by_index[1]["response"]["model"] == "phi3"
+    assert by_index[2]["response"]["output"]["content"] != ""
+
+
+def test_batch_item_error_does_not_fail_batch(client):
+    import json
+    from main import app
+    from services.llm_engine import LLMEngine
+
+    engine = app.dependency_overrides[LLMEngine]()
+    succeed = engine.generate_response.side_effect
+
+    async def fail_on_b(model, messages, **kwargs):
+        if messages[-1]["content"] == "b":
+            raise RuntimeError("boom")
+        return await succeed(model, messages=messages, **kwargs)
+
+    engine.generate_response.side_effect = fail_on_b
+    app.dependency_overrides[LLMEngine] = lambda: engine
+
+    response = client.post("/v1/responses/batch", json={"requests": [{"input": "a"}, {"input": "b"}]})
+    lines = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+    assert "response" in lines[0]
+    assert lines[1]["error"] == {"status": 500, "detail": "boom"}
+
+
+def test_empty_batch_returns_422(client):
+    response = client.post("/v1/responses/batch", json={"requests": []})
+    assert response.status_code == 422
+
+
+def test_previous_response_id_continues_conversation(client):
+    from main import app
+    from services.llm_engine import LLMEngine
+
+    engine = app.dependency_overrides[LLMEngine]()
+    app.dependency_overrides[LLMEngine] = lambda: engine
+
+    first = client.post("/v1/responses", json={"instructions": "Be brief.", "input": "Hi"}).json()
+    assert first["id"].startswith("resp_")
+
+    second = client.post(
+        "/v1/responses", json={"input": "And then?", "previous_response_id": first["id"]}
+    )
+    assert second.status_code == 200
+    messages = engine.generate_response.call_args.kwargs["messages"]
+    assert messages == [
+        {"role": "system", "content": "Be brief."},
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": first["output"]["content"]},
+        {"role": "user", "content": "And then?"},
+    ]
+
+
+def test_streamed_response_can_be_continued(client):
+    import json
+    from main import app
+    from services.llm_engine import LLMEngine
+
+    engine = app.dependency_overrides[LLMEngine]()
+    app.dependency_overrides[LLMEngine] = lambda: engine
+
+    response = client.post("/v1/responses", json={"input": "Hi", "stream": True})
+    header = json.loads(response.text.split("\n\n")[0].removeprefix("data: "))
+
+    client.post("/v1/responses", json={"input": "More", "previous_response_id": header["id"]})
+    messages = engine.generate_response.call_args.kwargs["messages"]
+    assert messages[1]["role"] == "assistant"
+    assert messages[1]["content"] == "ThisisamockedLLMresponse."
+
+
+def test_unknown_previous_response_id_returns_404(client):
+    response = client.post(
+        "/v1/responses", json={"input": "Hi", "previous_response_id": "resp_missing"}
+    )
+    assert response.status_code == 404
+
+
+def test_unknown_tool_names_return_400(client):
+    response = client.post("/v1/responses", json={"input": "Hi", "tools": ["get_weather", "nope"]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown tools: nope"
+
+
+def test_output_limits_are_forwarded_to_the_engine(client):
+    from main import app
+    from services.llm_engine import LLMEngine
+
+    engine = app.dependency_overrides[LLMEngine]()
+    app.dependency_overrides[LLMEngine] = lambda: engine
+
+    response = client.post("/v1/responses", json={"input": "Hi", "max_output_tokens": 16, "stop": "\n"})
+    assert response.status_code == 200
+    kwargs = engine.generate_response.call_args.kwargs
+    assert kwargs["max_output_tokens"] == 16
+    assert kwargs["stop"] == ["\n"]
+
+
+def test_invalid_output_limits_return_422(client):
+    assert client.post("/v1/responses", json={"input": "Hi", "max_output_tokens": 0}).status_code == 422
+    assert client.post("/v1/responses", json={"input": "Hi", "stop": [""]}).status_code == 422
+    assert client.post("/v1/responses", json={"input": "Hi", "stop": list("abcde")}).status_code == 422
+
+
+def test_cache_hits_skip_a_full_queue(client, monkeypatch):
+    from main import app
+    from services import response_cache
+    from services.llm_engine import LLMEngine
+    from services.scheduler import QueueFullError, scheduler
+
+    async def reject(*_):
+        raise QueueFullError("Queue for model 'tinyllama' is full", retry_after=7)
+
+    monkeypatch.setattr(scheduler, "acquire", reject)
+    async def cached(key):
+        return "cached reply"
+
+    monkeypatch.setattr(response_cache.cache, "get", cached)
+    app.dependency_overrides[LLMEngine] = LLMEngine
+    body = {"input": "Hello", "temperature": 0.0}
+    assert client.post("/v1/responses", json=body).json()["output"]["content"] == "cached reply"
+    assert client.post("/v1/responses", json={**body, "stream": True}).status_code == 200
@@ -0,0 +1,93 @@
+"""
+Unit tests for SSE encoding and token coalescing in the /v1/responses stream.
+
+No running Ollama instance required.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from core.config import settings
+from endpoints.responses import _coalesce, _content_frame, _sse_generator
+
+
+async def source(*items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+@pytest.mark.parametrize("text", ["hello", ' "quoted" \\ ', "café ☕ 🚀", "\n\t\x00"])
+def test_content_frame_matches_json_dumps(text):
+    assert _content_frame(text) == f"data: {json.dumps({'content': text})}\n\n"
+
+
+@pytest.mark.asyncio
+async def test_coalesce_merges_tokens_and_keeps_event_order():
+    chunks = source("a", "b", {"type": "tool_call.start"}, "c", "d")
+    merged = [c async for c in _coalesce(chunks, window=1.0, max_bytes=100)]
+    assert merged == ["ab", {"type": "tool_call.start"}, "cd"]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_flushes_on_byte_threshold():
+    start = asyncio.get_running_loop().time()
+    merged = _coalesce(source(*"abcd", delay=0.01), window=10.0, max_bytes=3)
+    assert await merged.__anext__() == "abc"
+    assert asyncio.get_running_loop().time() - start < 1.0
+    assert [c async for c in merged] == ["d"]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_threshold_counts_utf8_bytes():
+    merged = _coalesce(source(*"éééé", delay=0.01), window=10.0, max_bytes=4)
+    assert await merged.__anext__() == "éé"
+    await merged.aclose()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_pauses_upstream_for_a_slow_reader(monkeypatch):
+    from endpoints import responses
+
+    monkeypatch.setattr(responses, "_COALESCE_QUEUE_SIZE", 4)
+    produced = 0
+
+    async def fast():
+        nonlocal produced
+        for _ in range(100):
+            produced += 1
+            yield {"type": "event"}
+
+    merged = _coalesce(fast(), window=0.01, max_bytes=100)
+    await merged.__anext__()
+    await asyncio.sleep(0.05)
+    assert produced <= 6
+    await merged.aclose()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_propagates_upstream_errors():
+    async def failing():
+        yield "a"
+        raise RuntimeError("upstream down")
+
+    merged = _coalesce(failing(), window=0.01, max_bytes=100)
+    with pytest.raises(RuntimeError):
+        [c async for c in merged]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_flushes_on_time_window():
+    chunks = source("a", "b", "c", delay=0.03)
+    merged = [c async for c in _coalesce(chunks, window=0.01, max_bytes=100)]
+    assert merged == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_sse_generator_with_coalescing(monkeypatch):
+    monkeypatch.setattr(settings, "SSE_COALESCE_MS", 50.0)
+    frames = [f async for f in _sse_generator("m", source("Hel", "lo"), 0.7, True)]
+    assert frames[1:] == [_content_frame("Hello"), "data: [DONE]\n\n"]
@@ -0,0 +1,109 @@
+"""
+Unit tests for the multi-backend Ollama pool.
+
+Each backend is a stub server served through an httpx.MockTransport keyed by
+host — no running Ollama instance required.
+"""
+
+import httpx
+import pytest
+
+from services.backend_pool import BackendPool
+
+
+def stub_servers(servers: dict[str, dict]):
+    """
+    Build a client routing each host to a stub Ollama.
+
+    servers maps host -> {"tags": [...], "ps": [...]} or {"down": True}.
+    """
+
+    def handler(request):
+        server = servers[request.url.host]
+        if server.get("down"):
+            raise httpx.ConnectError("connection refused", request=request)
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": n} for n in server["tags"]]})
+        if request.url.path == "/api/ps":
+            return httpx.Response(200, json={"models": [{"name": n} for n in server["ps"]]})
+        return httpx.Response(200, json={"message": {"content": request.url.host}})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture
+def servers():
+    return {
+        "a": {"tags": ["llama3", "mistral"], "ps": ["mistral"]},
+        "b": {"tags": ["llama3", "phi3"], "ps": ["llama3"]},
+    }
+
+
+@pytest.fixture
+def pool():
+    return BackendPool(["http://a", "http://b/"])
+
+
+def by_url(pool, url):
+    return next(b for b in pool.backends if b.url == url)
+
+
+@pytest.mark.asyncio
+async def test_routes_to_backend_with_model_loaded(pool, servers):
+    await pool.refresh(stub_servers(servers))
+    assert pool.pick("llama3").url == "http://b"
+    assert pool.pick("mistral").url == "http://a"
+    assert pool.pick("phi3").url == "http://b"
+
+
+@pytest.mark.asyncio
+async def test_least_outstanding_among_candidates(pool, servers):
+    servers["a"]["ps"] = ["llama3"]
+    await pool.refresh(stub_servers(servers))
+    by_url(pool, "http://a").outstanding = 3
+    assert pool.pick("llama3").url == "http://b"
+    async with pool.acquire("llama3") as backend:
+        assert backend.outstanding == 1
+    assert backend.outstanding == 0
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_backend_is_ejected_and_restored(pool, servers):
+    servers["b"]["down"] = True
+    client = stub_servers(servers)
+    await pool.refresh(client)
+    assert not by_url(pool, "http://b").healthy
+    assert pool.pick("llama3").url == "http://a"
+
+    servers["b"]["down"] = False
+    await pool.refresh(client)
+    assert by_url(pool, "http://b").healthy
+
+
+@pytest.mark.asyncio
+async def test_connection_error_during_request_ejects(pool, servers):
+    client = stub_servers(servers)
+    await pool.refresh(client)
+    servers["b"]["down"] = True
+    with pytest.raises(httpx.ConnectError):
+        async with pool.acquire("llama3") as backend:
+            await client.post(f"{backend.url}/api/chat")
+    assert not by_url(pool, "http://b").healthy
+    assert pool.pick("llama3").url == "http://a"
+
+
+@pytest.mark.asyncio
+async def test_fails_open_when_all_backends_are_down(pool, servers):
+    servers["a"]["down"] = servers["b"]["down"] = True
+    await pool.refresh(stub_servers(servers))
+    assert pool.pick("llama3") in pool.backends
+
+
+@pytest.mark.asyncio
+async def test_union_models_across_healthy_backends(pool, servers):
+    await pool.refresh(stub_servers(servers))
+    assert sorted(m["name"] for m in pool.union_models()) == ["llama3", "mistral", "phi3"]
+
+    servers["b"]["down"] = True
+    await pool.refresh(stub_servers(servers))
+    assert sorted(m["name"] for m in pool.union_models()) == ["llama3", "mistral"]
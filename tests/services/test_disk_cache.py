@@ -0,0 +1,110 @@
+"""
+Unit tests for the SQLite response store shared by workers.
+
+No running Ollama instance required.
+"""
+
+import hashlib
+
+import pytest
+
+from services import disk_cache
+from services.disk_cache import DiskCache
+from services.response_cache import ResponseCache
+
+
+def key(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache" / "responses.db")
+
+
+def test_round_trip_and_persistence(path):
+    store = DiskCache(path, max_bytes=1000, ttl=60)
+    assert store.get(key("a")) is None
+    store.set(key("a"), "réponse")
+    store.set(key("a"), "réponse")  # replacing does not count twice
+    assert store.get(key("a")) == "réponse"
+    store.close()
+
+    reopened = DiskCache(path, max_bytes=1000, ttl=60)
+    assert reopened.get(key("a")) == "réponse"
+    assert reopened.stats() == {"hits": 1, "misses": 0, "errors": 0, "entries": 1, "bytes": 8}
+
+
+def test_workers_share_entries(path):
+    worker_1 = DiskCache(path, max_bytes=1000, ttl=60)
+    worker_2 = DiskCache(path, max_bytes=1000, ttl=60)
+    worker_1.set(key("a"), "from worker 1")
+    assert worker_2.get(key("a")) == "from worker 1"
+
+
+def test_ttl_expiry(path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache.time, "time", lambda: now[0])
+    store = DiskCache(path, max_bytes=1000, ttl=10)
+    store.set(key("a"), "x")
+    now[0] += 11
+    assert store.get(key("a")) is None
+    store.set(key("b"), "y")  # expired entries are only purged every _PURGE_INTERVAL
+    assert store.stats()["entries"] == 2
+    now[0] += disk_cache._PURGE_INTERVAL
+    store.set(key("c"), "z")
+    assert store.stats()["entries"] == 1
+
+
+def test_oldest_entries_are_evicted_over_the_byte_bound(path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache.time, "time", lambda: now[0])
+    store = DiskCache(path, max_bytes=10, ttl=60)
+    for name in ("a", "b", "c"):
+        store.set(key(name), "1234")
+        now[0] += 1
+    assert store.get(key("a")) is None
+    assert store.get(key("b")) == store.get(key("c")) == "1234"
+    assert store.stats()["bytes"] == 8
+    store.set(key("big"), "x" * 11)  # larger than the whole store: not kept
+    assert store.get(key("big")) is None
+
+
+def test_errors_are_misses(tmp_path):
+    (tmp_path / "not-a-db").write_text("garbage" * 100)
+    store = DiskCache(str(tmp_path / "not-a-db"), max_bytes=1000, ttl=60)
+    assert store.get(key("a")) is None
+    store.set(key("a"), "x")
+    assert store.stats()["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_falls_back_to_disk(path):
+    store = DiskCache(path, max_bytes=1000, ttl=60)
+    cache = ResponseCache(max_entries=10, max_bytes=100, ttl=60, store=store)
+    cache.set(key("a"), "cached")
+    await cache.drain()
+
+    # A second worker (or the same one after a restart) starts with an empty memory cache
+    fresh = ResponseCache(max_entries=10, max_bytes=100, ttl=60, store=DiskCache(path, max_bytes=1000, ttl=60))
+    assert await fresh.get(key("a")) == "cached"
+    assert fresh.stats()["entries"] == 1  # now also in memory
+    assert await fresh.get(key("a")) == "cached"
+    assert fresh.stats()["disk"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_calls_run_off_the_event_loop(path, monkeypatch):
+    import threading
+
+    threads = []
+    store = DiskCache(path, max_bytes=1000, ttl=60)
+    for name in ("get", "set"):
+        call = getattr(store, name)
+        monkeypatch.setattr(store, name, lambda *args, call=call: threads.append(threading.get_ident()) or call(*args))
+    cache = ResponseCache(max_entries=10, max_bytes=100, ttl=60, store=store)
+    cache.set(key("a"), "cached")
+    await cache.drain()
+    assert await ResponseCache(max_entries=10, max_bytes=100, ttl=60, store=store).get(key("a")) == "cached"
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
@@ -0,0 +1,79 @@
+"""
+Unit tests for micro-batching and caching of embedding requests.
+
+Ollama is replaced by a fake that records every batch — no running Ollama
+instance required.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from services import ollama_client
+from services.embedding_batcher import EmbeddingBatcher
+
+
+@pytest.fixture
+def fake_embed(monkeypatch):
+    """Record the texts of every Ollama call; each text embeds to [len(text)]."""
+    batches = []
+
+    async def embed(model, texts):
+        batches.append(list(texts))
+        await asyncio.sleep(0.001)
+        return [[float(len(t))] for t in texts]
+
+    monkeypatch.setattr(ollama_client, "embed", embed)
+    return batches
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_batch(fake_embed):
+    batcher = EmbeddingBatcher(max_batch=32, max_wait=0.01, cache_entries=100)
+    results = await asyncio.gather(
+        batcher.embed("m", ["a"]), batcher.embed("m", ["bb"]), batcher.embed("m", ["ccc", "a"])
+    )
+    assert results == [[[1.0]], [[2.0]], [[3.0], [1.0]]]
+    assert fake_embed == [["a", "bb", "ccc"]]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_waiting(fake_embed):
+    batcher = EmbeddingBatcher(max_batch=2, max_wait=10, cache_entries=100)
+    result = await asyncio.wait_for(batcher.embed("m", ["a", "bb", "ccc", "dddd"]), 1)
+    assert result == [[1.0], [2.0], [3.0], [4.0]]
+    assert fake_embed == [["a", "bb"], ["ccc", "dddd"]]
+
+
+@pytest.mark.asyncio
+async def test_models_are_batched_separately(fake_embed):
+    batcher = EmbeddingBatcher(max_batch=32, max_wait=0.01, cache_entries=100)
+    await asyncio.gather(batcher.embed("m1", ["a"]), batcher.embed("m2", ["b"]))
+    assert sorted(fake_embed) == [["a"], ["b"]]
+
+
+@pytest.mark.asyncio
+async def test_repeated_texts_are_served_from_cache(fake_embed):
+    batcher = EmbeddingBatcher(max_batch=32, max_wait=0.001, cache_entries=2)
+    await batcher.embed("m", ["a", "bb"])
+    assert await batcher.embed("m", ["bb", "a"]) == [[2.0], [1.0]]
+    assert len(fake_embed) == 1
+    assert batcher.stats()["cache_hits"] == 2
+
+    await batcher.embed("m", ["ccc"])  # evicts the least recently used entry, "bb"
+    await batcher.embed("m", ["bb"])
+    assert fake_embed[-1] == ["bb"]
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_caller(monkeypatch):
+    async def embed(model, texts):
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(ollama_client, "embed", embed)
+    batcher = EmbeddingBatcher(max_batch=32, max_wait=0.001, cache_entries=100)
+    results = await asyncio.gather(
+        batcher.embed("m", ["a"]), batcher.embed("m", ["b"]), return_exceptions=True
+    )
+    assert all(isinstance(r, httpx.ConnectError) for r in results)
@@ -0,0 +1,66 @@
+"""
+Unit tests for the model catalog snapshot.
+
+Ollama is replaced by a counting fake — no running Ollama instance required.
+"""
+
+import asyncio
+
+import pytest
+
+from services import model_catalog
+from services.model_catalog import ModelCatalog
+
+
+@pytest.fixture
+def fake_tags(monkeypatch):
+    """Serve a mutable list of models and count fetches."""
+    state = {"models": [{"name": "llama3:latest", "size": 1}], "calls": 0}
+
+    async def fake_get_models():
+        state["calls"] += 1
+        await asyncio.sleep(0.01)
+        return list(state["models"])
+
+    monkeypatch.setattr(model_catalog, "get_ollama_models", fake_get_models)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_first_read_fetches_then_serves_snapshot(fake_tags):
+    catalog = ModelCatalog(interval=60)
+    first = await catalog.get()
+    second = await catalog.get()
+    assert first is second
+    assert first.models == [{"id": "llama3:latest", "size": 1}]
+    assert fake_tags["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_is_served_while_refreshing(fake_tags):
+    catalog = ModelCatalog(interval=0)
+    old = await catalog.get()
+    fake_tags["models"].append({"name": "phi3:latest", "size": 2})
+
+    assert await catalog.get() is old  # stale data returned immediately
+    await asyncio.sleep(0.05)
+    new = await catalog.get()
+    assert {m["id"] for m in new.models} == {"llama3:latest", "phi3:latest"}
+    assert new.etag != old.etag
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_share_one_fetch(fake_tags):
+    catalog = ModelCatalog(interval=60)
+    await asyncio.gather(*(catalog.refresh() for _ in range(5)))
+    assert fake_tags["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_is_known(fake_tags):
+    catalog = ModelCatalog(interval=60)
+    assert catalog.is_known("anything")  # no snapshot yet: don't block requests
+    await catalog.get()
+    assert catalog.is_known("llama3")
+    assert catalog.is_known("llama3:latest")
+    assert not catalog.is_known("mistral")
@@ -0,0 +1,107 @@
+"""
+Unit tests for the async Ollama client.
+
+Ollama is replaced by an httpx.MockTransport — no running Ollama instance required.
+"""
+
+import json
+
+import httpx
+import pytest
+
+from services import ollama_client
+
+
+@pytest.fixture
+def mock_ollama(monkeypatch):
+    """Install a shared client whose transport is served by `handler`."""
+
+    def install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(ollama_client, "_client", client)
+        return client
+
+    return install
+
+
+@pytest.mark.asyncio
+async def test_chat_with_ollama_returns_message(mock_ollama):
+    def handler(request):
+        body = json.loads(request.content)
+        assert body["stream"] is False
+        assert body["options"] == {"temperature": 0.2}
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": "Hi"}})
+
+    mock_ollama(handler)
+    body = await ollama_client.chat_with_ollama("tinyllama", [], 0.2)
+    assert body["message"]["content"] == "Hi"
+
+
+@pytest.mark.asyncio
+async def test_stream_from_ollama_yields_chunks(mock_ollama):
+    lines = [
+        {"message": {"content": "Hel"}, "done": False},
+        {"message": {"content": "lo"}, "done": False},
+        {"message": {"content": ""}, "done": True, "prompt_eval_count": 5, "eval_count": 2},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines)
+    mock_ollama(lambda request: httpx.Response(200, text=body))
+
+    chunks = [c async for c in ollama_client.stream_from_ollama("tinyllama", [], 0.7)]
+    assert chunks == [
+        "Hel",
+        "lo",
+        {"usage": {"input_tokens": 5, "output_tokens": 2, "total_tokens": 7}, "finish_reason": "stop"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_output_limits_are_sent_as_options(mock_ollama):
+    def handler(request):
+        body = json.loads(request.content)
+        assert body["options"] == {"temperature": 0.0, "num_predict": 8, "stop": ["\n"]}
+        line = {"message": {"content": ""}, "done": True, "done_reason": "length", "eval_count": 8}
+        return httpx.Response(200, text=json.dumps(line))
+
+    mock_ollama(handler)
+    options = {"num_predict": 8, "stop": ["\n"]}
+    chunks = [c async for c in ollama_client.stream_from_ollama("tinyllama", [], 0.0, options=options)]
+    assert chunks[-1]["finish_reason"] == "length"
+
+
+@pytest.mark.asyncio
+async def test_get_ollama_models_hits_tags(mock_ollama):
+    def handler(request):
+        assert request.url.path in ("/api/tags", "/api/ps")
+        return httpx.Response(200, json={"models": [{"name": "tinyllama"}]})
+
+    mock_ollama(handler)
+    assert await ollama_client.get_ollama_models() == [{"name": "tinyllama"}]
+
+
+@pytest.mark.asyncio
+async def test_http_error_is_raised(mock_ollama):
+    mock_ollama(lambda request: httpx.Response(500))
+    with pytest.raises(httpx.HTTPStatusError):
+        await ollama_client.chat_with_ollama("tinyllama", [], 0.7)
+
+
+@pytest.mark.asyncio
+async def test_client_lifecycle_reuses_one_pool():
+    await ollama_client.close_client()
+    client = ollama_client.init_client()
+    assert ollama_client.init_client() is client
+    assert ollama_client.get_client() is client
+    await ollama_client.close_client()
+    assert ollama_client._client is None
+
+
+@pytest.mark.asyncio
+async def test_embed_returns_embeddings(mock_ollama):
+    def handler(request):
+        assert request.url.path == "/api/embed"
+        body = json.loads(request.content)
+        return httpx.Response(200, json={"embeddings": [[float(len(t))] for t in body["input"]]})
+
+    mock_ollama(handler)
+    assert await ollama_client.embed("nomic-embed-text", ["a", "bcd"]) == [[1.0], [3.0]]
@@ -0,0 +1,102 @@
+"""
+Unit tests for the output limits (max_output_tokens and stop sequences).
+"""
+
+import pytest
+
+from services.output_limits import StopMatcher, limit_stream, options, truncate
+
+
+async def _collect(chunks):
+    return [c async for c in chunks]
+
+
+class _Upstream:
+    """Async iterator of chunks that records whether it was closed."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.read = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+        self.read += 1
+        return chunk
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_stop_sequence_split_across_tokens_is_found():
+    matcher = StopMatcher(["</answer>"])
+    emitted = []
+    for token in ["The", " end", "</", "ans", "wer>", " more"]:
+        text, matched = matcher.feed(token)
+        emitted.append(text)
+        if matched:
+            break
+    assert "".join(emitted) == "The end"
+    assert matched
+
+
+def test_partial_match_is_released_when_it_is_not_a_stop_sequence():
+    matcher = StopMatcher(["STOP"])
+    assert matcher.feed("a ST") == ("a ", False)
+    assert matcher.feed("ART") == ("START", False)
+    assert matcher.feed("ST") == ("", False)
+    assert matcher.flush() == "ST"
+
+
+def test_earliest_stop_sequence_wins():
+    assert truncate("one, two. three", [".", ","]) == ("one", True)
+    assert truncate("no stop here", ["\n"]) == ("no stop here", False)
+
+
+def test_options_map_to_ollama_names():
+    assert options(None, None) == {}
+    assert options(32, ["\n"]) == {"num_predict": 32, "stop": ["\n"]}
+
+
+@pytest.mark.asyncio
+async def test_stream_is_cut_at_stop_sequence_and_upstream_closed():
+    upstream = _Upstream(["Hello", " wor", "ld", "\n\n", "never", "sent"])
+    chunks = await _collect(limit_stream(upstream, None, ["\n\n"]))
+    assert "".join(c for c in chunks if isinstance(c, str)) == "Hello world"
+    assert chunks[-1] == {"finish_reason": "stop"}
+    assert upstream.closed
+    assert upstream.read == 4
+
+
+@pytest.mark.asyncio
+async def test_stream_is_cut_at_max_tokens():
+    upstream = _Upstream(["a", "b", "c", "d", "e"])
+    chunks = await _collect(limit_stream(upstream, 3, None))
+    assert chunks == ["a", "b", "c", {"finish_reason": "length"}]
+    assert upstream.closed
+    assert upstream.read == 3
+
+
+@pytest.mark.asyncio
+async def test_ollama_finish_reason_is_kept_and_held_text_flushed():
+    final = {"usage": {"input_tokens": 1, "output_tokens": 2, "total_tokens": 3}, "finish_reason": "length"}
+    chunks = await _collect(limit_stream(_Upstream(["x", "EN", final]), 3, ["END"]))
+    assert chunks == ["x", "EN", final]
+
+
+@pytest.mark.asyncio
+async def test_stream_without_finish_reason_ends_with_stop():
+    chunks = await _collect(limit_stream(_Upstream(["cached reply"]), None, None))
+    assert chunks == ["cached reply", {"finish_reason": "stop"}]
+
+
+@pytest.mark.asyncio
+async def test_held_text_is_flushed_at_max_tokens():
+    chunks = await _collect(limit_stream(_Upstream(["x", "EN", "D"]), 2, ["END"]))
+    assert chunks == ["x", "EN", {"finish_reason": "length"}]
@@ -4,7 +4,12 @@ Unit tests for prompt_builder utility functions.
 These tests cover pure functions with no external dependencies.
 """
 
-from services.prompt_builder import build_messages_from_response
+from services.prompt_builder import (
+    build_messages_from_chat,
+    build_messages_from_response,
+    estimate_tokens,
+    trim_history,
+)
 
 
 def test_build_messages_from_response_without_instructions():
@@ -18,3 +23,56 @@ def test_build_messages_from_response_with_instructions():
         {"role": "system", "content": "You are a pirate."},
         {"role": "user", "content": "What is the weather?"},
     ]
+
+
+def test_history_is_inserted_before_input():
+    history = [
+        {"role": "system", "content": "Be brief."},
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "Hello!"},
+    ]
+    result = build_messages_from_response(None, "How are you?", history)
+    assert result == [*history, {"role": "user", "content": "How are you?"}]
+
+
+def test_new_instructions_replace_history_system_message():
+    history = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "Hi"}]
+    result = build_messages_from_response("Be verbose.", "Again", history)
+    assert [m["content"] for m in result] == ["Be verbose.", "Hi", "Again"]
+
+
+def test_history_is_trimmed_to_token_budget():
+    history = []
+    for i in range(10):
+        history.append({"role": "user", "content": f"question {i} " * 10})
+        history.append({"role": "assistant", "content": f"answer {i} " * 10})
+    result = build_messages_from_response("sys", "last", history, max_tokens=100)
+
+    assert result[0] == {"role": "system", "content": "sys"}
+    assert result[-1] == {"role": "user", "content": "last"}
+    assert result[1]["role"] == "user"
+    assert result[-2] == history[-1]
+    assert estimate_tokens(result) <= 100
+
+
+def test_trim_history_keeps_whole_turns():
+    history = [
+        {"role": "user", "content": "x" * 400},
+        {"role": "assistant", "content": "short"},
+    ]
+    assert trim_history(history, 10) == []
+
+
+def test_chat_messages_keep_system_and_last_message_when_trimmed():
+    messages = [{"role": "system", "content": "sys"}]
+    for i in range(10):
+        messages.append({"role": "user", "content": f"question {i} " * 10})
+        messages.append({"role": "assistant", "content": f"answer {i} " * 10})
+    messages.append({"role": "user", "content": "last"})
+    result = build_messages_from_chat(messages, max_tokens=100)
+
+    assert result[0] == messages[0]
+    assert result[1]["role"] == "user"
+    assert result[-1] == messages[-1]
+    assert estimate_tokens(result) <= 100
+    assert build_messages_from_chat(messages) == messages
@@ -0,0 +1,93 @@
+"""
+Unit tests for the model residency manager and per-model keep_alive.
+
+Ollama is a stub served through an httpx.MockTransport that loads a model
+when /api/chat is called for it — no running Ollama instance required.
+"""
+
+import json
+
+import httpx
+import pytest
+
+from core import metrics
+from core.config import settings
+from services import ollama_client
+from services.backend_pool import BackendPool
+from services.residency import ResidencyManager
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Install a stub Ollama; returns its state (available, loaded and received chat payloads)."""
+    state = {"tags": ["llama3:latest", "phi3:latest"], "ps": set(), "chats": []}
+
+    def handler(request):
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": n} for n in state["tags"]]})
+        if request.url.path == "/api/ps":
+            return httpx.Response(200, json={"models": [{"name": n} for n in state["ps"]]})
+        body = json.loads(request.content)
+        state["chats"].append(body)
+        state["ps"].add(f"{body['model']}:latest")
+        return httpx.Response(200, json={"message": {"content": "ok"}, "load_duration": 2_000_000_000})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(ollama_client, "_client", client)
+    return state
+
+
+def manager(hot=(), pinned=()):
+    return ResidencyManager(BackendPool(["http://a"]), list(hot), list(pinned), interval=60)
+
+
+def test_keep_alive_for(monkeypatch):
+    monkeypatch.setattr(settings, "PINNED_MODELS", ["llama3"])
+    monkeypatch.setattr(settings, "MODEL_KEEP_ALIVE", {"phi3": "10m"})
+    monkeypatch.setattr(settings, "DEFAULT_KEEP_ALIVE", None)
+    assert ollama_client.keep_alive_for("llama3") == -1
+    assert ollama_client.keep_alive_for("phi3") == "10m"
+    assert ollama_client.keep_alive_for("mistral") is None
+
+
+@pytest.mark.asyncio
+async def test_warm_up_loads_hot_models_with_prompt(server, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_WARMUP_PROMPTS", {"llama3": "Hello"})
+    monkeypatch.setattr(settings, "PINNED_MODELS", ["llama3"])
+    residency = manager(hot=["llama3", "mistral"], pinned=["llama3"])
+    await residency.warm_up()
+
+    # mistral is not available on the backend, so only llama3 is loaded
+    assert [c["model"] for c in server["chats"]] == ["llama3"]
+    chat = server["chats"][0]
+    assert chat["messages"] == [{"role": "user", "content": "Hello"}]
+    assert chat["options"] == {"num_predict": 1}
+    assert chat["keep_alive"] == -1
+    assert residency.events[-1]["model"] == "llama3:latest"
+    assert residency.events[-1]["event"] == "loaded"
+
+
+@pytest.mark.asyncio
+async def test_check_reloads_evicted_pinned_models(server):
+    residency = manager(pinned=["llama3"])
+    await residency.warm_up()
+    server["ps"].clear()
+
+    await residency.check()
+    assert [e["event"] for e in residency.events] == ["loaded", "unloaded"]
+    assert residency.reloads == 1
+    assert len(server["chats"]) == 2
+
+    await residency.check()
+    assert residency.events[-1]["event"] == "loaded"
+    assert residency.reloads == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_load_counts_as_cold_start_except_for_warm_up(server, monkeypatch):
+    monkeypatch.setattr(settings, "COLD_START_THRESHOLD", 1.0)
+    before = metrics.cold_starts.value("phi3")
+    await ollama_client.load_model("http://a", "phi3")
+    assert metrics.cold_starts.value("phi3") == before
+    metrics.record_ollama_stats("phi3", {"load_duration": 2_000_000_000})
+    assert metrics.cold_starts.value("phi3") == before + 1
@@ -0,0 +1,150 @@
+"""
+Unit tests for retries, hedging, first-token timeouts and circuit breaking.
+
+Each backend is a stub served through an httpx.MockTransport keyed by host —
+no running Ollama instance required.
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from core.config import settings
+from services import ollama_client, resilience
+from services.backend_pool import BackendPool
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+DONE = {"message": {"role": "assistant", "content": ""}, "done": True, "eval_count": 1}
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "OLLAMA_RETRY_BACKOFF", 0.001)
+    monkeypatch.setattr(settings, "OLLAMA_RETRIES", 2)
+    monkeypatch.setattr(settings, "OLLAMA_HEDGE_DELAY", 0.0)
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    """Install a two-backend pool; returns a function taking host -> async handler."""
+
+    def install(handlers: dict):
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url.host)
+            return await handlers[request.url.host](request)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(ollama_client, "_client", client)
+        test_pool = BackendPool(list(f"http://{host}" for host in handlers))
+        monkeypatch.setattr(resilience, "pool", test_pool)
+        return test_pool, calls
+
+    return install
+
+
+async def ok(request):
+    return httpx.Response(200, json={"message": {"role": "assistant", "content": request.url.host}})
+
+
+async def refused(request):
+    raise httpx.ConnectError("connection refused", request=request)
+
+
+def test_breaker_opens_and_half_opens(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.is_open()
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert breaker.state == "half_open"
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_connect_error_is_retried_on_another_backend(backends):
+    _, calls = backends({"a": refused, "b": ok})
+    body = await ollama_client.chat_with_ollama("m", [], 0.0)
+    assert body["message"]["content"] == "b"
+    assert calls[-1] == "b"
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(backends):
+    async def bad_request(request):
+        return httpx.Response(400)
+
+    _, calls = backends({"a": bad_request})
+    with pytest.raises(httpx.HTTPStatusError):
+        await ollama_client.chat_with_ollama("m", [], 0.0)
+    assert calls == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded(backends):
+    _, calls = backends({"a": refused})
+    with pytest.raises(httpx.ConnectError):
+        await ollama_client.chat_with_ollama("m", [], 0.0)
+    assert len(calls) == settings.OLLAMA_RETRIES + 1
+
+
+@pytest.mark.asyncio
+async def test_open_breakers_fail_fast(backends, monkeypatch):
+    monkeypatch.setattr(settings, "OLLAMA_RETRIES", 0)
+    test_pool, calls = backends({"a": refused})
+    for _ in range(settings.BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(httpx.ConnectError):
+            await ollama_client.chat_with_ollama("m", [], 0.0)
+    assert test_pool.unavailable_for() is not None
+
+    with pytest.raises(CircuitOpenError):
+        await ollama_client.chat_with_ollama("m", [], 0.0)
+    assert len(calls) == settings.BREAKER_FAILURE_THRESHOLD
+
+
+@pytest.mark.asyncio
+async def test_first_token_timeout_retries_stream(backends, monkeypatch):
+    monkeypatch.setattr(settings, "OLLAMA_FIRST_TOKEN_TIMEOUT", 0.05)
+
+    async def stalled(request):
+        async def body():
+            await asyncio.sleep(1)
+            yield b""
+
+        return httpx.Response(200, content=body())
+
+    async def streaming(request):
+        lines = [{"message": {"content": "hi"}, "done": False}, DONE]
+        return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines).encode())
+
+    backends({"a": stalled, "b": streaming})
+    chunks = [c async for c in ollama_client.stream_from_ollama("m", [], 0.0)]
+    assert chunks[0] == "hi"
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_uses_fastest_backend(backends, monkeypatch):
+    monkeypatch.setattr(settings, "OLLAMA_HEDGE_DELAY", 0.02)
+
+    async def slow(request):
+        await asyncio.sleep(0.5)
+        return await ok(request)
+
+    test_pool, _ = backends({"a": slow, "b": ok})
+    before = resilience.hedges.value("m")
+    started = time.perf_counter()
+    body = await ollama_client.chat_with_ollama("m", [], 0.0)
+    assert body["message"]["content"] == "b"
+    assert time.perf_counter() - started < 0.4
+    assert resilience.hedges.value("m") == before + 1
+    await asyncio.sleep(0)
+    assert all(b.outstanding == 0 for b in test_pool.backends)
@@ -0,0 +1,140 @@
+"""
+Unit tests for the exact-match response cache and its use in LLMEngine.
+
+Ollama is replaced by a counting fake — no running Ollama instance required.
+"""
+
+import pytest
+
+from services import llm_engine, response_cache
+from services.llm_engine import LLMEngine
+from services.response_cache import ResponseCache, make_key
+
+MESSAGES = [{"role": "user", "content": "Classify: hello"}]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    response_cache.cache.clear()
+    yield
+    response_cache.cache.clear()
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    """Count calls to Ollama and answer with a fixed reply."""
+    calls = []
+
+    async def fake_chat(model, messages, temperature, tools=None, options=None):
+        calls.append(model)
+        return {"message": {"role": "assistant", "content": "greeting"}}
+
+    async def fake_stream(model, messages, temperature, options=None):
+        calls.append(model)
+        for chunk in ("greet", "ing"):
+            yield chunk
+
+    monkeypatch.setattr(llm_engine, "chat_with_ollama", fake_chat)
+    monkeypatch.setattr(llm_engine, "stream_from_ollama", fake_stream)
+    return calls
+
+
+def test_key_is_canonical():
+    a = make_key("m", [{"role": "user", "content": "x"}], 0.0)
+    b = make_key("m", [{"content": "x", "role": "user"}], 0.0)
+    assert a == b
+    assert a != make_key("m", [{"role": "user", "content": "x"}], 0.1)
+    assert a != make_key("m", [{"role": "user", "content": "x"}], 0.0, tools=[{"t": 1}])
+    assert a != make_key("m", [{"role": "user", "content": "x"}], 0.0, options={"num_predict": 8})
+    assert a == make_key("m", [{"role": "user", "content": "x"}], 0.0, options={})
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10, ttl=60)
+    cache.set("a", "1234")
+    cache.set("b", "1234")
+    await cache.get("a")  # a becomes most recently used
+    cache.set("c", "1234")
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1234"
+    cache.set("d", "123456789")
+    assert cache.stats()["bytes"] <= 10
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry(monkeypatch):
+    cache = ResponseCache(max_entries=10, max_bytes=100, ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache.set("a", "x")
+    now[0] += 11
+    assert await cache.get("a") is None
+    assert cache.stats() == {"hits": 0, "misses": 1, "entries": 0, "bytes": 0}
+
+
+@pytest.mark.asyncio
+async def test_deterministic_request_is_cached(fake_ollama):
+    engine = LLMEngine()
+    first = await engine.generate_response("m", MESSAGES, temperature=0.0)
+    second = await engine.generate_response("m", MESSAGES, temperature=0.0)
+    assert first.output == second.output
+    assert second.usage is None  # served from cache, no tokens spent
+    assert len(fake_ollama) == 1
+    assert response_cache.cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sampled_request_and_bypass_are_not_cached(fake_ollama):
+    engine = LLMEngine()
+    await engine.generate_response("m", MESSAGES, temperature=0.7)
+    await engine.generate_response("m", MESSAGES, temperature=0.7)
+    await engine.generate_response("m", MESSAGES, temperature=0.0, use_cache=False)
+    await engine.generate_response("m", MESSAGES, temperature=0.0, use_cache=False)
+    assert len(fake_ollama) == 4
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_cached_text(fake_ollama):
+    engine = LLMEngine()
+    _, chunks = await engine.stream_response("m", MESSAGES, temperature=0.0)
+    assert [c async for c in chunks] == ["greet", "ing", {"finish_reason": "stop"}]
+    _, chunks = await engine.stream_response("m", MESSAGES, temperature=0.0)
+    assert [c async for c in chunks] == ["greeting", {"finish_reason": "stop"}]
+    assert len(fake_ollama) == 1
+    # Stream and non-stream share the same entry
+    response = await engine.generate_response("m", MESSAGES, temperature=0.0)
+    assert response.output.content == "greeting"
+    assert len(fake_ollama) == 1
+
+
+@pytest.mark.asyncio
+async def test_truncated_reply_is_not_cached(monkeypatch):
+    calls = []
+
+    async def fake_chat(model, messages, temperature, tools=None, options=None):
+        calls.append(options)
+        return {"message": {"role": "assistant", "content": "gree"}, "done_reason": "length"}
+
+    monkeypatch.setattr(llm_engine, "chat_with_ollama", fake_chat)
+    engine = LLMEngine()
+    for _ in range(2):
+        response = await engine.generate_response("m", MESSAGES, temperature=0.0, max_output_tokens=2)
+        assert response.finish_reason == "length"
+    assert calls == [{"num_predict": 2}, {"num_predict": 2}]
+
+
+@pytest.mark.asyncio
+async def test_only_cache_misses_are_admitted(fake_ollama):
+    admitted = []
+
+    async def admit():
+        admitted.append(len(fake_ollama))
+
+    engine = LLMEngine()
+    await engine.generate_response("m", MESSAGES, temperature=0.0, admit=admit)
+    await engine.generate_response("m", MESSAGES, temperature=0.0, admit=admit)
+    _, chunks = await engine.stream_response("m", MESSAGES, temperature=0.0, admit=admit)
+    assert [c async for c in chunks] == ["greeting", {"finish_reason": "stop"}]
+    # Admitted once, before the only Ollama call
+    assert admitted == [0]
@@ -0,0 +1,122 @@
+"""
+Unit tests for the admission-control scheduler.
+
+Pure asyncio — no running Ollama instance required.
+"""
+
+import asyncio
+
+import pytest
+
+from services.scheduler import QueueFullError, QueueTimeoutError, Scheduler
+
+
+def make_scheduler(**overrides):
+    options = {"max_concurrency": 1, "max_queue": 10, "queue_timeout": 1.0}
+    options.update(overrides)
+    return Scheduler(**options)
+
+
+@pytest.mark.asyncio
+async def test_limits_concurrency_per_model():
+    scheduler = make_scheduler(model_concurrency={"big": 1, "small": 2})
+    running = {"big": 0, "small": 0}
+    peak = {"big": 0, "small": 0}
+
+    async def job(model):
+        async with scheduler.slot(model):
+            running[model] += 1
+            peak[model] = max(peak[model], running[model])
+            await asyncio.sleep(0.01)
+            running[model] -= 1
+
+    await asyncio.gather(*(job(m) for m in ["big"] * 3 + ["small"] * 4))
+    assert peak == {"big": 1, "small": 2}
+    assert scheduler.stats()["big"]["waited"] == 3
+
+
+async def _granted_order(scheduler, requests):
+    """Queue (api_key, priority) requests and return the keys in grant order."""
+    order = []
+
+    async def job(key, priority):
+        await scheduler.acquire("m", api_key=key, priority=priority)
+        order.append(key)
+
+    tasks = [asyncio.create_task(job(k, p)) for k, p in requests]
+    await asyncio.sleep(0)
+    return order, tasks
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_goes_first():
+    scheduler = make_scheduler()
+    holder = await scheduler.acquire("m")
+    order, tasks = await _granted_order(scheduler, [("a", 0), ("b", 5)])
+    scheduler.release(holder)
+    await asyncio.sleep(0.01)
+    assert order == ["b"]
+    for task in tasks:
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_fair_share_across_api_keys():
+    scheduler = make_scheduler(max_concurrency=2)
+    await scheduler.acquire("m", api_key="heavy")
+    other = await scheduler.acquire("m", api_key="other")
+    order, tasks = await _granted_order(scheduler, [("heavy", 0), ("heavy", 0), ("light", 0)])
+    assert scheduler.stats()["m"]["queued"] == 3
+    scheduler.release(other)
+    await asyncio.sleep(0.01)
+    assert order == ["light"]
+    for task in tasks:
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_retry_after():
+    scheduler = make_scheduler(max_queue=1)
+    await scheduler.acquire("m")
+    waiting = asyncio.create_task(scheduler.acquire("m"))
+    await asyncio.sleep(0)
+    with pytest.raises(QueueFullError) as exc:
+        await scheduler.acquire("m")
+    assert exc.value.retry_after >= 1
+    assert scheduler.stats()["m"]["rejected"] == 1
+    waiting.cancel()
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_timeout():
+    scheduler = make_scheduler(queue_timeout=0.01)
+    await scheduler.acquire("m")
+    with pytest.raises(QueueTimeoutError):
+        await scheduler.acquire("m")
+    stats = scheduler.stats()["m"]
+    assert stats["queued"] == 0
+    assert stats["timed_out"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_its_place():
+    scheduler = make_scheduler()
+    ticket = await scheduler.acquire("m")
+    waiter = asyncio.create_task(scheduler.acquire("m"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(0)
+    scheduler.release(ticket)
+    assert scheduler.stats()["m"]["running"] == 0
+    async with scheduler.slot("m"):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_releasing_a_ticket_twice_frees_one_slot():
+    scheduler = make_scheduler(max_concurrency=2)
+    first = await scheduler.acquire("m")
+    await scheduler.acquire("m")
+    scheduler.release(first)
+    scheduler.release(first)
+    assert scheduler.stats()["m"]["running"] == 1
@@ -0,0 +1,134 @@
+"""
+Unit tests for the semantic response cache and its use in LLMEngine.
+
+Embeddings come from a bag-of-words fake and Ollama chat is a counting fake —
+no running Ollama instance required.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from core.config import settings
+from services import llm_engine, response_cache, semantic_cache
+from services.llm_engine import LLMEngine
+from services.semantic_cache import Query, SemanticIndex, normalize
+
+VOCABULARY = ["how", "do", "can", "i", "reset", "my", "password", "the", "weather", "today"]
+
+
+async def fake_embed(model, inputs):
+    return [[float(text.split().count(word)) for word in VOCABULARY] for text in inputs]
+
+
+def unit(*values, scope=1, text="q"):
+    vector = np.asarray(values, dtype=np.float32)
+    return Query(scope=scope, text=text, vector=vector / np.linalg.norm(vector))
+
+
+@pytest.fixture(autouse=True)
+def semantic(monkeypatch):
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_THRESHOLD", 0.8)
+    monkeypatch.setattr(semantic_cache, "embed", fake_embed)
+    response_cache.cache.clear()
+    semantic_cache.index.clear()
+    yield
+    response_cache.cache.clear()
+    semantic_cache.index.clear()
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    calls = []
+
+    async def fake_chat(model, messages, temperature, tools=None, options=None):
+        calls.append(messages[-1]["content"])
+        return {"message": {"role": "assistant", "content": f"reply {len(calls)}"}}
+
+    monkeypatch.setattr(llm_engine, "chat_with_ollama", fake_chat)
+    return calls
+
+
+def test_normalize():
+    assert normalize("  How do I   RESET my password?? ") == "how do i reset my password"
+
+
+def test_search_returns_best_match_in_scope():
+    index = SemanticIndex(capacity=4, ttl=60)
+    index.add(unit(1, 0, 0, text="a"), "A")
+    index.add(unit(0, 1, 0, text="b"), "B")
+    index.add(unit(1, 0, 0, scope=2, text="other scope"), "C")
+
+    match = index.search(unit(0.9, 0.1, 0), threshold=0.9)
+    assert match is not None
+    assert match.content == "A"
+    assert match.score > 0.99
+    assert index.search(unit(1, 1, 0), threshold=0.9) is None
+    assert index.search(unit(1, 0, 0, scope=3), threshold=0.5) is None
+
+
+def test_lru_row_is_replaced_when_full():
+    index = SemanticIndex(capacity=2, ttl=60)
+    index.add(unit(1, 0, 0), "A")
+    index.add(unit(0, 1, 0), "B")
+    index.search(unit(1, 0, 0), threshold=0.9)  # A becomes most recently used
+    index.add(unit(0, 0, 1), "C")
+
+    assert index.stats()["entries"] == 2
+    assert index.search(unit(0, 1, 0), threshold=0.9) is None
+    match = index.search(unit(1, 0, 0), threshold=0.9)
+    assert match is not None and match.content == "A"
+
+
+def test_expired_rows_do_not_match(monkeypatch):
+    index = SemanticIndex(capacity=2, ttl=10)
+    index.add(unit(1, 0, 0), "A")
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert index.search(unit(1, 0, 0), threshold=0.5) is None
+
+
+@pytest.mark.asyncio
+async def test_paraphrase_is_served_from_semantic_cache(fake_ollama):
+    engine = LLMEngine()
+    first = await engine.generate_response(
+        "m", [{"role": "user", "content": "How do I reset my password?"}], 0.0
+    )
+    second = await engine.generate_response(
+        "m", [{"role": "user", "content": "how can I reset my password"}], 0.0
+    )
+    assert len(fake_ollama) == 1
+    assert second.output.content == first.output.content
+    assert second.usage is None
+
+
+@pytest.mark.asyncio
+async def test_scope_includes_instructions_and_model(fake_ollama):
+    engine = LLMEngine()
+    question = [{"role": "user", "content": "How do I reset my password?"}]
+    await engine.generate_response("m", question, 0.0)
+    await engine.generate_response("other", question, 0.0)
+    await engine.generate_response("m", [{"role": "system", "content": "Be terse."}, *question], 0.0)
+    assert len(fake_ollama) == 3
+
+
+@pytest.mark.asyncio
+async def test_unrelated_input_and_sampled_requests_miss(fake_ollama):
+    engine = LLMEngine()
+    await engine.generate_response("m", [{"role": "user", "content": "reset my password"}], 0.0)
+    await engine.generate_response("m", [{"role": "user", "content": "the weather today"}], 0.0)
+    await engine.generate_response("m", [{"role": "user", "content": "reset my password"}], 0.7)
+    assert len(fake_ollama) == 3
+
+
+@pytest.mark.asyncio
+async def test_truncated_reply_is_not_indexed(monkeypatch):
+    async def fake_chat(model, messages, temperature, tools=None, options=None):
+        return {"message": {"role": "assistant", "content": "To reset"}, "done_reason": "length"}
+
+    monkeypatch.setattr(llm_engine, "chat_with_ollama", fake_chat)
+    engine = LLMEngine()
+    await engine.generate_response("m", [{"role": "user", "content": "How do I reset my password?"}], 0.0)
+    assert semantic_cache.index.stats()["entries"] == 0
@@ -0,0 +1,67 @@
+"""
+Unit tests for the conversation session store.
+
+These tests cover the store in isolation, with no external dependencies.
+"""
+
+import time
+
+from services.session_store import SessionStore, to_messages, to_records
+
+
+def make_store(**overrides):
+    params = {"max_entries": 10, "max_bytes": 10_000, "ttl": 60.0}
+    params.update(overrides)
+    return SessionStore(**params)
+
+
+def test_records_round_trip():
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "Hi"}]
+    assert to_messages(to_records(messages)) == messages
+
+
+def test_get_returns_stored_history():
+    store = make_store()
+    history = (("user", "Hi"), ("assistant", "Hello"))
+    store.add("resp_1", history)
+    assert store.get("resp_1") == history
+    assert store.get("resp_unknown") is None
+
+
+def test_shared_content_is_not_charged_twice():
+    store = make_store()
+    first = (("user", "a" * 100), ("assistant", "b" * 100))
+    store.add("resp_1", first)
+    after_first = store.stats()["bytes"]
+
+    second = to_records(to_messages(first)) + (("user", "c"), ("assistant", "d"))
+    store.add("resp_2", second, parent=first)
+    assert store.stats()["bytes"] - after_first < 100
+
+
+def test_lru_eviction_by_entry_count():
+    store = make_store(max_entries=2)
+    store.add("a", (("user", "1"),))
+    store.add("b", (("user", "2"),))
+    store.get("a")
+    store.add("c", (("user", "3"),))
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.stats()["evictions"] == 1
+
+
+def test_eviction_by_byte_size():
+    store = make_store(max_bytes=300)
+    store.add("a", (("user", "x" * 200),))
+    store.add("b", (("user", "y" * 200),))
+    assert store.get("a") is None
+    assert store.get("b") is not None
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    store = make_store(ttl=10.0)
+    store.add("a", (("user", "1"),))
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert store.get("a") is None
+    assert store.stats()["entries"] == 0
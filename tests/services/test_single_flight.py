@@ -0,0 +1,144 @@
+"""
+Unit tests for single-flight coalescing of identical in-flight requests.
+
+Ollama is replaced by slow fakes — no running Ollama instance required.
+"""
+
+import asyncio
+
+import pytest
+
+from core.config import settings
+from services import llm_engine, response_cache, single_flight
+from services.llm_engine import LLMEngine
+
+MESSAGES = [{"role": "user", "content": "Hello"}]
+
+
+@pytest.fixture(autouse=True)
+def enable_coalescing(monkeypatch):
+    monkeypatch.setattr(settings, "COALESCE_ENABLED", True)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+    response_cache.cache.clear()
+
+
+@pytest.fixture
+def slow_ollama(monkeypatch):
+    """Fake Ollama that takes a little while and counts generations."""
+    calls = []
+
+    async def fake_chat(model, messages, temperature, tools=None, options=None):
+        calls.append(model)
+        await asyncio.sleep(0.05)
+        return {"message": {"role": "assistant", "content": "shared"}}
+
+    async def fake_stream(model, messages, temperature, options=None):
+        calls.append(model)
+        for chunk in ("a", "b", "c"):
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    monkeypatch.setattr(llm_engine, "chat_with_ollama", fake_chat)
+    monkeypatch.setattr(llm_engine, "stream_from_ollama", fake_stream)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_generation(slow_ollama):
+    engine = LLMEngine()
+    results = await asyncio.gather(
+        *(engine.generate_response("m", MESSAGES, temperature=0.0) for _ in range(5))
+    )
+    assert {r.output.content for r in results} == {"shared"}
+    assert len(slow_ollama) == 1
+    assert single_flight._calls == {}
+
+
+@pytest.mark.asyncio
+async def test_sampled_requests_are_not_coalesced(slow_ollama):
+    engine = LLMEngine()
+    await asyncio.gather(
+        *(engine.generate_response("m", MESSAGES, temperature=0.7) for _ in range(3))
+    )
+    assert len(slow_ollama) == 3
+
+
+@pytest.mark.asyncio
+async def test_disabled_by_default(slow_ollama, monkeypatch):
+    monkeypatch.setattr(settings, "COALESCE_ENABLED", False)
+    engine = LLMEngine()
+    await asyncio.gather(
+        *(engine.generate_response("m", MESSAGES, temperature=0.0) for _ in range(2))
+    )
+    assert len(slow_ollama) == 2
+
+
+@pytest.mark.asyncio
+async def test_late_stream_subscriber_gets_replayed_tokens(slow_ollama):
+    engine = LLMEngine()
+    _, first = await engine.stream_response("m", MESSAGES, temperature=0.0)
+    first_chunks = [await first.__anext__()]
+
+    _, second = await engine.stream_response("m", MESSAGES, temperature=0.0)
+    first_chunks += [c async for c in first]
+    second_chunks = [c async for c in second]
+
+    assert first_chunks == second_chunks == ["a", "b", "c", {"finish_reason": "stop"}]
+    assert len(slow_ollama) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_error_propagates_to_subscribers():
+    async def failing():
+        yield "a"
+        raise RuntimeError("upstream down")
+
+    chunks = single_flight.stream("k", failing)
+    assert await chunks.__anext__() == "a"
+    with pytest.raises(RuntimeError):
+        await chunks.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_shared_generation_cancelled_when_every_caller_leaves():
+    cancelled = asyncio.Event()
+
+    async def generate():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    callers = [asyncio.create_task(single_flight.run("leave", generate)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    callers[0].cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()
+    callers[1].cancel()
+    await asyncio.sleep(0.01)
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_shared_stream_cancelled_when_last_subscriber_leaves():
+    closed = asyncio.Event()
+
+    async def upstream():
+        try:
+            while True:
+                await asyncio.sleep(0.005)
+                yield "x"
+        finally:
+            closed.set()
+
+    first = single_flight.stream("leave-stream", upstream)
+    second = single_flight.stream("leave-stream", upstream)
+    await first.__anext__()
+    await second.__anext__()
+    await first.aclose()
+    await asyncio.sleep(0.02)
+    assert not closed.is_set()
+    await second.aclose()
+    await asyncio.sleep(0.01)
+    assert closed.is_set()
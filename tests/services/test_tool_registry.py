@@ -0,0 +1,333 @@
+"""
+Unit tests for tool execution in tool_registry and the engine's tool loop.
+
+Ollama is replaced by a scripted fake — no running Ollama instance required.
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+import pytest
+
+from core.config import settings
+from services import llm_engine, response_cache, tool_registry
+from services.llm_engine import LLMEngine
+
+
+def tool_schema(name: str) -> dict:
+    return {
+        "type": "function",
+        "function": {"name": name, "parameters": {"type": "object", "properties": {}}},
+    }
+
+
+def tool_call(name: str, **arguments) -> dict:
+    return {"function": {"name": name, "arguments": arguments}}
+
+
+def square(x):
+    """Module-level so that it can be pickled into the process pool."""
+    return x * x
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    monkeypatch.setattr(tool_registry, "_registry", {})
+    monkeypatch.setattr(tool_registry, "_plugins_loaded", True)
+    monkeypatch.setattr(tool_registry, "_selections", {})
+    response_cache.cache.clear()
+    yield
+    tool_registry.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_of_a_round_run_concurrently():
+    async def slow_async(delay):
+        await asyncio.sleep(delay)
+        return f"async {delay}"
+
+    def slow_sync(delay):
+        time.sleep(delay)
+        return f"sync {delay}"
+
+    tool_registry.register(tool_schema("slow_async"), slow_async)
+    tool_registry.register(tool_schema("slow_sync"), slow_sync)
+
+    start = time.monotonic()
+    results = await tool_registry.execute_many([
+        tool_call("slow_sync", delay=0.2),
+        tool_call("slow_async", delay=0.1),
+        tool_call("slow_async", delay=0.2),
+    ])
+    assert time.monotonic() - start < 0.4
+    assert results == ["sync 0.2", "async 0.1", "async 0.2"]
+
+
+@pytest.mark.asyncio
+async def test_tool_timeout_returns_error():
+    async def hang():
+        await asyncio.sleep(10)
+
+    tool_registry.register(tool_schema("hang"), hang, timeout=0.01)
+    result = await tool_registry.execute("hang", {})
+    assert result.startswith("Error:") and "timed out" in result
+
+
+@pytest.mark.asyncio
+async def test_cpu_bound_tool_runs_in_process_pool():
+    tool_registry.register(tool_schema("square"), square, cpu_bound=True)
+    assert await tool_registry.execute("square", '{"x": 7}') == "49"
+
+
+@pytest.mark.asyncio
+async def test_unknown_tool_and_bad_arguments():
+    tool_registry.register(tool_schema("square"), square)
+    assert await tool_registry.execute("nope", {}) == "Error: unknown tool 'nope'"
+    assert (await tool_registry.execute("square", {"y": 1})).startswith("Error:")
+
+
+@pytest.mark.asyncio
+async def test_tool_loop_stops_after_max_iterations(monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_MAX_ITERATIONS", 2)
+    tool_registry.register(tool_schema("ping"), lambda: "pong")
+    seen_tools = []
+
+    async def always_calls_tools(model, messages, temperature, tools=None, options=None):
+        seen_tools.append(tools)
+        return {"message": {"content": f"round {len(seen_tools)}", "tool_calls": [tool_call("ping")]}}
+
+    monkeypatch.setattr(llm_engine, "chat_with_ollama", always_calls_tools)
+    response = await LLMEngine().generate_response("m", [], temperature=0.7, use_tools=True)
+    assert response.output.content == "round 3"
+    assert [bool(t) for t in seen_tools] == [True, True, False]
+    assert tool_registry.stats()["ping"]["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_streaming_tool_loop_stops_after_max_iterations(monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_MAX_ITERATIONS", 2)
+    tool_registry.register(tool_schema("ping"), lambda: "pong")
+    seen_tools = []
+
+    async def always_calls_tools(model, messages, temperature, tools=None, options=None):
+        seen_tools.append(tools)
+        yield f"round {len(seen_tools)}"
+        yield {"tool_calls": [tool_call("ping")]}
+
+    monkeypatch.setattr(llm_engine, "stream_from_ollama", always_calls_tools)
+    _, chunks = await LLMEngine().stream_response("m", [], temperature=0.7, use_tools=True)
+    events = [c async for c in chunks]
+    assert [e for e in events if isinstance(e, str)] == ["round 1", "round 2", "round 3"]
+    assert [bool(t) for t in seen_tools] == [True, True, False]
+    assert len([e for e in events if isinstance(e, dict) and e.get("type") == "tool_call.end"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_cacheable_tool_is_memoized_per_arguments():
+    calls = []
+
+    def lookup(city, unit="C"):
+        calls.append(city)
+        return f"{city}: 22{unit}"
+
+    tool_registry.register(tool_schema("lookup"), lookup, cacheable=True)
+    assert await tool_registry.execute("lookup", {"city": "Paris", "unit": "C"}) == "Paris: 22C"
+    assert await tool_registry.execute("lookup", '{"unit": "C", "city": "Paris"}') == "Paris: 22C"
+    await tool_registry.execute("lookup", {"city": "Lyon"})
+    assert calls == ["Paris", "Lyon"]
+
+    stats = tool_registry.stats()["lookup"]
+    assert stats["calls"] == 2
+    assert stats["cache_hits"] == 1
+    assert stats["cache_misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_execution():
+    calls = []
+
+    async def slow(q):
+        calls.append(q)
+        await asyncio.sleep(0.05)
+        return q.upper()
+
+    tool_registry.register(tool_schema("slow"), slow, cacheable=True)
+    results = await asyncio.gather(*(tool_registry.execute("slow", {"q": "a"}) for _ in range(5)))
+    assert results == ["A"] * 5
+    assert calls == ["a"]
+    assert tool_registry.stats()["slow"]["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_memoized():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("temporary")
+        return "ok"
+
+    tool_registry.register(tool_schema("flaky"), flaky, cacheable=True)
+    assert (await tool_registry.execute("flaky", {})).startswith("Error:")
+    assert await tool_registry.execute("flaky", {}) == "ok"
+    assert tool_registry.stats()["flaky"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_max_entries_evicts_oldest():
+    tool_registry.register(tool_schema("echo"), lambda v: v, cacheable=True, cache_max_entries=1)
+    await tool_registry.execute("echo", {"v": 1})
+    await tool_registry.execute("echo", {"v": 2})
+    await tool_registry.execute("echo", {"v": 1})
+    assert tool_registry.stats()["echo"]["calls"] == 3
+
+
+@pytest.mark.asyncio
+async def test_streaming_tool_loop_emits_tool_events(monkeypatch):
+    async def weather(city):
+        await asyncio.sleep(0.01)
+        return f"{city}: sunny"
+
+    tool_registry.register(tool_schema("weather"), weather)
+    rounds = []
+
+    async def fake_stream(model, messages, temperature, tools=None, options=None):
+        rounds.append(list(messages))
+        if len(rounds) == 1:
+            yield "Checking"
+            yield {"tool_calls": [tool_call("weather", city="Paris"), tool_call("weather", city="Oslo")]}
+        else:
+            for token in ("It is", " sunny"):
+                yield token
+
+    monkeypatch.setattr(llm_engine, "stream_from_ollama", fake_stream)
+    _, chunks = await LLMEngine().stream_response("m", [], temperature=0.7, use_tools=True)
+    events = [c async for c in chunks]
+
+    assert events[0] == "Checking"
+    starts = [e for e in events if isinstance(e, dict) and e.get("type") == "tool_call.start"]
+    ends = [e for e in events if isinstance(e, dict) and e.get("type") == "tool_call.end"]
+    assert [e["index"] for e in starts] == [0, 1]
+    assert sorted(e["result"] for e in ends) == ["Oslo: sunny", "Paris: sunny"]
+    assert events[-3:-1] == ["It is", " sunny"]
+    assert events[-1] == {
+        "usage": {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+        "finish_reason": "stop",
+    }
+    # Results are fed back to the model in call order
+    assert [m["content"] for m in rounds[1] if m["role"] == "tool"] == ["Paris: sunny", "Oslo: sunny"]
+
+
+@pytest.mark.asyncio
+async def test_usage_is_summed_over_tool_rounds(monkeypatch):
+    tool_registry.register(tool_schema("ping"), lambda: "pong")
+    replies = iter([
+        {"message": {"content": "", "tool_calls": [tool_call("ping")]}, "prompt_eval_count": 10, "eval_count": 3},
+        {"message": {"content": "done"}, "prompt_eval_count": 20, "eval_count": 5},
+    ])
+
+    async def fake_chat(model, messages, temperature, tools=None, options=None):
+        return next(replies)
+
+    monkeypatch.setattr(llm_engine, "chat_with_ollama", fake_chat)
+    response = await LLMEngine().generate_response("m", [], temperature=0.7, use_tools=True)
+    assert response.usage is not None
+    assert response.usage.model_dump() == {"input_tokens": 30, "output_tokens": 8, "total_tokens": 38}
+
+
+def test_plugins_are_loaded_on_first_use(monkeypatch, caplog):
+    monkeypatch.setattr(tool_registry, "_plugins_loaded", False)
+    monkeypatch.setattr(settings, "TOOL_PLUGINS", ["tools.weather", "tools.missing"])
+    monkeypatch.delitem(sys.modules, "tools.weather", raising=False)
+
+    loads = []
+
+    class FakeEntryPoint:
+        name = "ping"
+
+        def load(self):
+            loads.append(self.name)
+            return lambda: tool_registry.register(tool_schema("ping"), lambda: "pong")
+
+    monkeypatch.setattr(tool_registry, "entry_points", lambda group: [FakeEntryPoint()])
+    assert tool_registry.stats() == {}
+
+    names = [s["function"]["name"] for s in tool_registry.get_schemas()]
+    assert names == ["get_weather", "ping"]
+    assert "tools.missing" in caplog.text
+    tool_registry.get_schemas()
+    assert loads == ["ping"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_arguments_are_rejected_before_the_handler():
+    calls = []
+    schema = {
+        "type": "function",
+        "function": {
+            "name": "get_weather",
+            "parameters": {
+                "type": "object",
+                "properties": {"city": {"type": "string"}},
+                "required": ["city"],
+            },
+        },
+    }
+    tool_registry.register(schema, lambda city: calls.append(city) or f"{city}: sunny")
+
+    result = json.loads(await tool_registry.execute("get_weather", {"city": 7}))
+    assert result == {
+        "error": "invalid_arguments",
+        "tool": "get_weather",
+        "details": [{"path": "city", "message": "expected string, got integer"}],
+    }
+    result = json.loads(await tool_registry.execute("get_weather", "{not json"))
+    assert result["details"][0]["message"].startswith("invalid JSON")
+    assert calls == []
+    assert tool_registry.stats()["get_weather"]["invalid"] == 2
+    assert await tool_registry.execute("get_weather", '{"city": "Oslo"}') == "Oslo: sunny"
+
+
+def test_tool_sets_are_built_once_and_frozen():
+    schema = tool_schema("a")
+    tool_registry.register(schema, lambda: "a")
+    tool_registry.register(tool_schema("b"), lambda: "b")
+    schema["function"]["name"] = "changed"  # the registry keeps its own copy
+
+    everything = tool_registry.select()
+    assert tool_registry.select() is everything
+    assert [s["function"]["name"] for s in everything.schemas] == ["a", "b"]
+
+    subset = tool_registry.select(["b"])
+    assert tool_registry.select(["b", "b"]) is subset
+    assert subset.names == {"b"}
+    assert subset.fingerprint != everything.fingerprint
+
+    tool_registry.register(tool_schema("c"), lambda: "c")
+    assert len(tool_registry.select().schemas) == 3
+    with pytest.raises(ValueError):
+        tool_registry.select(["missing"])
+
+
+@pytest.mark.asyncio
+async def test_engine_offers_and_runs_only_the_requested_tools(monkeypatch):
+    tool_registry.register(tool_schema("ping"), lambda: "pong")
+    tool_registry.register(tool_schema("rm"), lambda: "removed")
+    offered, results = [], []
+    replies = iter([
+        {"message": {"content": "", "tool_calls": [tool_call("ping"), tool_call("rm")]}},
+        {"message": {"content": "done"}},
+    ])
+
+    async def fake_chat(model, messages, temperature, tools=None, options=None):
+        offered.append([t["function"]["name"] for t in tools or []])
+        results.extend(m["content"] for m in messages if m["role"] == "tool")
+        return next(replies)
+
+    monkeypatch.setattr(llm_engine, "chat_with_ollama", fake_chat)
+    await LLMEngine().generate_response("m", [], temperature=0.7, use_tools=["ping"])
+    assert offered == [["ping"], ["ping"]]
+    assert results == ["pong", "Error: unknown tool 'rm'"]
@@ -0,0 +1,73 @@
+"""
+Unit tests for the argument validators compiled from tool schemas.
+
+No running Ollama instance required.
+"""
+
+from services.tool_validation import compile_validator
+
+WEATHER = {
+    "type": "object",
+    "properties": {
+        "city": {"type": "string", "minLength": 1},
+        "days": {"type": "integer", "minimum": 1, "maximum": 7},
+        "unit": {"type": "string", "enum": ["celsius", "fahrenheit"]},
+        "tags": {"type": "array", "items": {"type": "string"}, "maxItems": 2},
+    },
+    "required": ["city"],
+    "additionalProperties": False,
+}
+
+
+def messages(errors):
+    return {e["path"]: e["message"] for e in errors}
+
+
+def test_valid_arguments_have_no_errors():
+    validate = compile_validator(WEATHER)
+    assert validate({"city": "Paris"}) == []
+    assert validate({"city": "Paris", "days": 3.0, "unit": "celsius", "tags": ["a"]}) == []
+
+
+def test_every_problem_is_reported_with_its_path():
+    errors = compile_validator(WEATHER)(
+        {"days": True, "unit": "kelvin", "tags": ["a", 2, "c"], "country": "FR"}
+    )
+    assert messages(errors) == {
+        "city": "is required",
+        "days": "expected integer, got boolean",
+        "unit": "must be one of ['celsius', 'fahrenheit']",
+        "tags[1]": "expected string, got integer",
+        "tags": "must have at most 2 items",
+        "country": "is not an allowed argument",
+    }
+
+
+def test_bounds_and_lengths():
+    validate = compile_validator(WEATHER)
+    assert messages(validate({"city": "", "days": 9})) == {
+        "city": "must be at least 1 characters",
+        "days": "must be <= 7",
+    }
+
+
+def test_nested_objects_and_union_types():
+    validate = compile_validator({
+        "type": "object",
+        "properties": {
+            "point": {
+                "type": "object",
+                "properties": {"x": {"type": "number"}, "label": {"type": ["string", "null"]}},
+                "required": ["x"],
+            }
+        },
+    })
+    assert validate({"point": {"x": 1.5, "label": None}}) == []
+    assert messages(validate({"point": {"label": 3}})) == {
+        "point.x": "is required",
+        "point.label": "expected string or null, got integer",
+    }
+
+
+def test_empty_schema_accepts_anything():
+    assert compile_validator({})({"anything": [1, {"a": None}]}) == []